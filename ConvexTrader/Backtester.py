@@ -0,0 +1,338 @@
+import numpy as np
+from functools import partial
+from typing import Callable, List, NamedTuple, Optional, Union
+from .single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+    validate_engine,
+)
+from .multi_period_optimization import RecedingHorizonOptimizer
+from .native_solver import TRADE_COST, HOLD_COST
+from .batch_optimization import INVALID, SOLVER_ERROR
+from .portfolio_exceptions import ValidationError, OptimizationError
+
+# Optimizers the Backtester can drive
+METHODS = ("single", "multi")
+
+# Status reported for periods where the optimizer found a solution
+OPTIMAL = "optimal"
+
+
+def _scaled_cost(phi, scale, x):
+    """Cost function phi weighted by scale"""
+    return scale * phi(x)
+
+
+class BacktestResult(NamedTuple):
+    """
+    Per-period outcome of a walk-forward backtest.
+
+    Row k of every array refers to the k-th simulated period, i.e. period
+    start + k of the returns matrix.
+
+    Attributes:
+        weights: Post-trade weights held over each period, shape (T, n).
+        trades: Trade vector executed at the start of each period, shape (T, n).
+        gross_returns: Portfolio return before costs, weights @ returns.
+        trading_costs: trade_cost times the turnover of each period.
+        holding_costs: hold_cost times the sum of squared post-trade weights.
+        net_returns: gross_returns minus trading and holding costs.
+        turnover: L1 norm of each trade vector.
+        values: Portfolio value at the end of each period, starting from
+            initial_value.
+        status: Status of each period, "optimal", "invalid" or "solver_error";
+            periods where the optimizer failed keep the drifted weights without
+            trading.
+        errors: Error message of each failed period, None for successful periods.
+    """
+
+    weights: np.ndarray
+    trades: np.ndarray
+    gross_returns: np.ndarray
+    trading_costs: np.ndarray
+    holding_costs: np.ndarray
+    net_returns: np.ndarray
+    turnover: np.ndarray
+    values: np.ndarray
+    status: List[str]
+    errors: List[Optional[str]]
+
+
+class Backtester:
+    """
+    Walk-forward backtest of the single- or multi-period optimizer.
+
+    At every period t the forecast callable receives the realized returns of the
+    periods before t and returns expected returns; the optimizer then trades from
+    the current weights, the post-trade weights earn the realized returns of
+    period t and drift into the weights of period t + 1. Each step reuses the
+    compiled problem of the previous one and warm starts from its solution. The
+    multi-period method runs as receding-horizon control, executing the first
+    trade of each plan and warm starting from the shifted plan, and with the
+    default cost functions and coefficients the single-period steps use the
+    native solver. Both methods optimize the trade_cost and hold_cost that are
+    attributed, and weigh the risk by gamma / n. Returns, costs and turnover
+    are computed afterwards on the full (T, n) weight and trade matrices.
+
+    Example:
+        >>> backtester = Backtester(returns, lambda t, history: history[-20:].mean(axis=0))
+        >>> result = backtester.run(start=20)
+        >>> result.values[-1]
+    """
+
+    def __init__(
+        self,
+        returns: np.ndarray,
+        forecast: Union[Callable, np.ndarray],
+        gamma: float = 0.5,
+        method: str = "single",
+        horizon: int = None,
+        phi_trade=default_phi_trade,
+        phi_hold=default_phi_hold,
+        engine: str = "auto",
+        psi: float = 1.0,
+        trade_cost: float = TRADE_COST,
+        hold_cost: float = HOLD_COST,
+        initial_weights=None,
+        initial_value: float = 1.0,
+    ):
+        """
+        Configure a backtest.
+
+        Args:
+            returns: Realized simple returns, array of shape (T, n)
+            forecast: Callable forecast(t, history) returning the expected returns
+                for period t given history = returns[:t]. For method "single" it
+                returns a length n vector, for "multi" a (horizon, n) matrix whose
+                row k is the forecast for period t + k. A
+                precomputed (T, n) array of single-period forecasts is also accepted.
+            gamma: Risk aversion parameter
+            method: "single" or "multi"
+            horizon: Number of forecast periods the multi-period problem plans over
+            phi_trade: Trading cost function of the single-period problem,
+                weighted by trade_cost
+            phi_hold: Holding cost function of the single-period problem,
+                weighted by hold_cost
+            engine: Engine of the single-period problem, "auto", "cvxpy" or
+                "native"; costs other than the defaults require the CVXPY engine
+            psi: Risk factor of the multi-period problem
+            trade_cost: Cost per unit of turnover, used for cost attribution and
+                as the trading cost of both optimizers
+            hold_cost: Cost per unit of squared weight, used for cost attribution
+                and as the quadratic holding cost of both optimizers
+            initial_weights: Starting weights, or a Portfolio whose weights are
+                used; defaults to equal weights
+            initial_value: Portfolio value before the first period
+
+        Raises:
+            ValidationError: If the inputs are invalid
+        """
+        returns = np.asarray(returns, dtype=float)
+        if returns.ndim != 2 or returns.shape[0] == 0 or returns.shape[1] == 0:
+            raise ValidationError(
+                "Invalid returns matrix",
+                details=f"Expected a non-empty (T, n) array, got shape {returns.shape}",
+            )
+        if not np.all(np.isfinite(returns)):
+            raise ValidationError(
+                "Invalid returns matrix", details="Contains infinite or NaN values"
+            )
+        T, n = returns.shape
+
+        if not callable(forecast):
+            forecast = np.asarray(forecast, dtype=float)
+            if method != "single" or forecast.shape != returns.shape:
+                raise ValidationError(
+                    "Invalid forecast",
+                    details="Expected a callable or a (T, n) array for method 'single'",
+                )
+
+        if method not in METHODS:
+            raise ValidationError(
+                "Invalid backtest method",
+                details=f"Expected one of {METHODS}, got {method}",
+            )
+        if method == "multi" and (not isinstance(horizon, int) or horizon < 1):
+            raise ValidationError(
+                "Invalid horizon parameter",
+                details=f"horizon must be integer >= 1, got {horizon}",
+            )
+        if gamma < 0:
+            raise ValidationError(
+                "Invalid risk aversion parameter",
+                details=f"gamma must be non-negative, got {gamma}",
+            )
+
+        # The single-period problem weighs its cost functions by TRADE_COST and
+        # HOLD_COST, so other coefficients are folded into the functions
+        if trade_cost != TRADE_COST:
+            phi_trade = partial(_scaled_cost, phi_trade, trade_cost / TRADE_COST)
+        if hold_cost != HOLD_COST:
+            phi_hold = partial(_scaled_cost, phi_hold, hold_cost / HOLD_COST)
+        validate_engine(engine, phi_trade, phi_hold)
+
+        if initial_weights is None:
+            initial_weights = np.full(n, 1.0 / n)
+        elif hasattr(initial_weights, "weights_vector"):
+            initial_weights = initial_weights.weights_vector
+        initial_weights = np.array(initial_weights, dtype=float)
+        if initial_weights.shape != (n,):
+            raise ValidationError(
+                "Invalid initial weights",
+                details=f"Expected shape ({n},), got {initial_weights.shape}",
+            )
+
+        self.returns = returns
+        self.forecast = forecast
+        self.gamma = gamma
+        self.method = method
+        self.horizon = horizon
+        self.phi_trade = phi_trade
+        self.phi_hold = phi_hold
+        self.engine = engine
+        self.psi = psi
+        self.trade_cost = trade_cost
+        self.hold_cost = hold_cost
+        self.initial_weights = initial_weights
+        self.initial_value = initial_value
+        self._receding_horizon = None
+
+    @classmethod
+    def from_prices(cls, prices: np.ndarray, forecast, **kwargs) -> "Backtester":
+        """
+        Create a Backtester from a (T + 1, n) matrix of prices.
+
+        Period t earns the simple return from prices[t] to prices[t + 1].
+
+        Args:
+            prices: Asset prices, array of shape (T + 1, n)
+            forecast: Forecast callable or array, see __init__
+            **kwargs: Other arguments of __init__
+
+        Raises:
+            ValidationError: If the prices are not positive
+        """
+        prices = np.asarray(prices, dtype=float)
+        if prices.ndim != 2 or len(prices) < 2 or not np.all(prices > 0):
+            raise ValidationError(
+                "Invalid price matrix",
+                details="Expected at least two rows of positive prices",
+            )
+        return cls(prices[1:] / prices[:-1] - 1.0, forecast, **kwargs)
+
+    def _expected_returns(self, t: int) -> np.ndarray:
+        """Forecast for period t from the realized returns before it"""
+        if callable(self.forecast):
+            return np.asarray(self.forecast(t, self.returns[:t]), dtype=float)
+        return self.forecast[t]
+
+    def _trade(self, t: int, w: np.ndarray) -> np.ndarray:
+        """Optimal trade at the start of period t from weights w"""
+        r_hat = self._expected_returns(t)
+
+        if self.method == "single":
+            return single_period_optimization(
+                r_hat, w, self.gamma, self.phi_trade, self.phi_hold, self.engine
+            )
+
+        n = len(w)
+        if r_hat.shape != (self.horizon, n):
+            raise ValidationError(
+                "Invalid forecast",
+                details=f"Expected shape ({self.horizon}, {n}), got {r_hat.shape}",
+            )
+
+        # Row 0 of the multi-period inputs is the current, pre-trade period and
+        # never enters the objective, so forecast row k goes in row k + 1 and the
+        # first planned trade is the one held over period t
+        H = self.horizon + 1
+        r_t = np.vstack([np.zeros((1, n)), r_hat])
+        # The holding cost is quadratic, as in the cost attribution, so it is
+        # folded into the diagonal risk coefficients gamma_t * psi_t. The risk
+        # is divided by n as in the single-period problem, so both methods
+        # weigh the same gamma the same way
+        return self._receding_horizon.step(
+            w,
+            r_t,
+            np.ones(H),
+            np.full(H, self.gamma * self.psi / n + self.hold_cost),
+            np.full(H, self.trade_cost),
+            np.zeros(H),
+        )
+
+    def run(self, start: int = 0, stop: int = None) -> BacktestResult:
+        """
+        Simulate periods start to stop - 1.
+
+        Args:
+            start: First simulated period; earlier periods only serve as history
+                for the forecast
+            stop: One past the last simulated period, defaults to T
+
+        Returns:
+            BacktestResult: Weights, trades, returns, costs and values per period
+
+        Raises:
+            ValidationError: If the period range is invalid
+        """
+        T, n = self.returns.shape
+        stop = T if stop is None else stop
+        if not 0 <= start < stop <= T:
+            raise ValidationError(
+                "Invalid backtest period range",
+                details=f"Expected 0 <= start < stop <= {T}, got {start} and {stop}",
+            )
+
+        returns = self.returns[start:stop]
+        periods = len(returns)
+        weights = np.empty((periods, n))
+        trades = np.zeros((periods, n))
+        status, errors = [], []
+
+        if self.method == "multi":
+            self._receding_horizon = RecedingHorizonOptimizer(n, self.horizon + 1)
+
+        w = self.initial_weights.copy()
+        for k in range(periods):
+            try:
+                trades[k] = self._trade(start + k, w)
+                status.append(OPTIMAL)
+                errors.append(None)
+            except ValidationError as e:
+                status.append(INVALID)
+                errors.append(str(e))
+            except OptimizationError as e:
+                status.append(SOLVER_ERROR)
+                errors.append(str(e))
+
+            np.add(w, trades[k], out=weights[k])
+            # Weights drift with the realized returns of the period
+            w = weights[k] * (1.0 + returns[k])
+            total = np.sum(w)
+            if not total > 0:
+                raise ValidationError(
+                    "Portfolio value depleted",
+                    details=f"Drifted weights sum to {total} after period {start + k}",
+                )
+            w /= total
+
+        gross_returns = np.einsum("ij,ij->i", weights, returns)
+        turnover = np.sum(np.abs(trades), axis=1)
+        trading_costs = self.trade_cost * turnover
+        holding_costs = self.hold_cost * np.einsum("ij,ij->i", weights, weights)
+        net_returns = gross_returns - trading_costs - holding_costs
+        values = self.initial_value * np.cumprod(1.0 + net_returns)
+
+        return BacktestResult(
+            weights,
+            trades,
+            gross_returns,
+            trading_costs,
+            holding_costs,
+            net_returns,
+            turnover,
+            values,
+            status,
+            errors,
+        )
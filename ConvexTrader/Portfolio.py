@@ -1,29 +1,171 @@
+import os
 import numpy as np
-import cvxpy as cp
+from collections.abc import Mapping
 from typing import List, Dict
 from .Trade import Trade, TradeType
-from .single_period_optimization import single_period_optimization
-from .multi_period_optimization import multi_period_optimization
+from .TradeLog import (
+    TradeLog,
+    SIDE_BY_TYPE,
+    datetime_to_timestamp,
+    dates_to_timestamps,
+    types_to_sides,
+)
+from .TradeJournal import TradeJournal, encode_symbols, decode_symbols
+from .valuation import SymbolAlignment, PriceBook
 from .portfolio_exceptions import ValidationError, OptimizationError
 
+# Initial number of slots in the holdings and weights backing arrays
+INITIAL_CAPACITY = 16
+
+# Column names accepted by Portfolio.execute_trades for DataFrames and array mappings
+TRADE_COLUMNS = ("symbol", "quantity", "price", "trade_date", "trade_type")
+
+# Number of journal records replayed per vectorized batch during recovery
+REPLAY_CHUNK_SIZE = 1 << 20
+
 
 class Portfolio:
-    def __init__(self, gamma=0.5):
+    def __init__(
+        self, gamma=0.5, journal=None, snapshot_path=None, snapshot_interval=None
+    ):
         """
         Initialize a portfolio with empty holdings, trades, symbols, and vectors for holdings and weights.
         - holdings: Dictionary to store the quantity of each stock symbol.
-        - trades: List to store all trade transactions.
+        - trades: Columnar TradeLog storing all trade transactions; Trade objects are built on access.
         - symbols: List to keep track of all unique stock symbols in the portfolio.
         - holdings_vector: Numpy array representing quantities of each stock in the same order as symbols.
         - weights_vector: Numpy array representing the proportion of each stock in the portfolio.
+        - price_book: PriceBook of the latest price of each stock in the same order as symbols.
         - gamma: double representing the risk metric gamma, set to 0.5 automatically but can be customized by the user
+
+        holdings_vector, weights_vector and the price book's prices are views of the live length
+        of backing arrays whose capacity doubles as symbols are added, and symbols are located through a symbol to index map.
+
+        A running total of holdings is kept up to date on every trade, and weights_vector is only
+        recomputed from it when read after a trade, so each fill costs O(1) regardless of the
+        number of symbols.
+
+        When a journal is given, every successfully executed trade is appended to it, and when
+        snapshot_path and snapshot_interval are also given, a snapshot is written after every
+        snapshot_interval journaled trades. Use Portfolio.recover to rebuild a portfolio from them.
+
+        Args:
+            gamma: Risk aversion parameter
+            journal: Optional TradeJournal, or path of one, to record executed trades in
+            snapshot_path: Optional path of the .npz file periodic snapshots are written to
+            snapshot_interval: Number of journaled trades between periodic snapshots
         """
         self.holdings: Dict[str, int] = {}
-        self.trades: List[Trade] = []
         self.symbols: List[str] = []
-        self.holdings_vector: np.ndarray = np.array([])
-        self.weights_vector: np.ndarray = np.array([])
+        self.trades: TradeLog = TradeLog(self.symbols)
+        self._symbol_index: Dict[str, int] = {}
+        self._holdings_buffer: np.ndarray = np.zeros(INITIAL_CAPACITY)
+        self._weights_buffer: np.ndarray = np.zeros(INITIAL_CAPACITY)
+        self._market_weights_buffer: np.ndarray = np.zeros(INITIAL_CAPACITY)
+        self.price_book = PriceBook(self.symbols, self._symbol_index, INITIAL_CAPACITY)
+        self._total_holdings = 0.0
+        self._weights_dirty = False
         self.gamma = gamma
+        self.journal = journal
+        if journal is not None and not isinstance(journal, TradeJournal):
+            self.journal = TradeJournal(journal)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_position = 0
+        self._receding_horizon = None
+        # Name of the solver of the last optimization
+        self.last_solver = None
+
+    @property
+    def holdings_vector(self) -> np.ndarray:
+        """
+        Numpy array of the quantity of each stock, in the same order as symbols.
+
+        This is a view of the backing array; it reflects later trades until the
+        backing array grows to make room for new symbols. Call update_weights after
+        modifying it in place.
+        """
+        return self._holdings_buffer[: len(self.symbols)]
+
+    @holdings_vector.setter
+    def holdings_vector(self, values: np.ndarray):
+        self._holdings_buffer = self._set_buffer(self._holdings_buffer, values)
+        self._total_holdings = float(np.sum(self.holdings_vector))
+        self._weights_dirty = True
+
+    @property
+    def weights_vector(self) -> np.ndarray:
+        """
+        Numpy array of the proportion of each stock, in the same order as symbols.
+
+        Weights are recomputed from the running total of holdings on the first read
+        after a trade. This is a view of the backing array, like holdings_vector, and
+        is only refreshed when read through this property again.
+        """
+        if self._weights_dirty:
+            self._materialize_weights()
+        return self._weights_buffer[: len(self.symbols)]
+
+    @weights_vector.setter
+    def weights_vector(self, values: np.ndarray):
+        self._weights_buffer = self._set_buffer(self._weights_buffer, values)
+        self._weights_dirty = False
+
+    @property
+    def market_weights_vector(self) -> np.ndarray:
+        """
+        Numpy array of the share of each stock in the market value of the portfolio,
+        in the same order as symbols, at the prices of price_book.
+
+        The weights are recomputed in place on every read, so this is a view of a
+        backing array that can be passed to the optimizers as current weights without
+        copying. Unpriced held symbols make every weight NaN; weights are zero when
+        the portfolio has no market value.
+        """
+        n = len(self.symbols)
+        weights = self._market_weights_buffer[:n]
+        np.multiply(self.holdings_vector, self.price_book.prices, out=weights)
+        total = np.sum(weights)
+        if total > 0:
+            weights /= total
+        elif not np.isnan(total):
+            weights[:] = 0
+        return weights
+
+    def _set_buffer(self, buffer: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Copy values into the live part of a backing array"""
+        values = np.asarray(values, dtype=float)
+        if values.shape != (len(self.symbols),):
+            raise ValidationError(
+                "Vector length mismatch",
+                details=f"Expected {len(self.symbols)}, got {values.shape}",
+            )
+        buffer[: len(values)] = values
+        return buffer
+
+    def _reserve(self, capacity: int):
+        """Grow the backing arrays to hold at least capacity symbols"""
+        current = len(self._holdings_buffer)
+        if capacity <= current:
+            return
+
+        new_capacity = max(2 * current, capacity)
+        n = len(self.symbols)
+        for name in ("_holdings_buffer", "_weights_buffer", "_market_weights_buffer"):
+            buffer = np.zeros(new_capacity)
+            buffer[:n] = getattr(self, name)[:n]
+            setattr(self, name, buffer)
+        self.price_book._reserve(new_capacity)
+
+    def _register_symbol(self, symbol: str) -> int:
+        """Return the index of a symbol, appending it to the portfolio if it is new"""
+        index = self._symbol_index.get(symbol)
+        if index is None:
+            index = len(self.symbols)
+            self._reserve(index + 1)
+            self._symbol_index[symbol] = index
+            self.symbols.append(symbol)
+        return index
 
     def execute_trade(self, trade: Trade):
         """
@@ -42,53 +184,364 @@ class Portfolio:
                 "Invalid trade object", details=f"Expected Trade, got {type(trade)}"
             )
 
-        self.trades.append(trade)
+        if self.journal is not None:
+            # Fail before any state changes if the trade cannot be journaled
+            encode_symbols([trade.symbol])
+
+        # Reject oversells before any state changes, so a failed trade never
+        # reaches the trades log, the symbols or the journal
+        if trade.trade_type == TradeType.SELL and (
+            trade.symbol not in self.holdings
+            or self.holdings[trade.symbol] < trade.quantity
+        ):
+            raise ValidationError(
+                f"Insufficient shares to sell {trade.symbol}",
+                details=f"Requested: {trade.quantity}, Available: {self.holdings.get(trade.symbol, 0)}",
+            )
 
-        if trade.symbol not in self.symbols:
-            self.symbols.append(trade.symbol)
-            self.holdings_vector = np.append(self.holdings_vector, 0)
-            self.weights_vector = np.append(self.weights_vector, 0)
+        symbol_index = self._register_symbol(trade.symbol)
 
-        symbol_index = self.symbols.index(trade.symbol)
+        self.trades.append(trade, symbol_index)
 
         if trade.trade_type == TradeType.BUY:
             self.holdings[trade.symbol] = (
                 self.holdings.get(trade.symbol, 0) + trade.quantity
             )
-            self.holdings_vector[symbol_index] += trade.quantity
+            self._holdings_buffer[symbol_index] += trade.quantity
+            self._total_holdings += trade.quantity
 
         elif trade.trade_type == TradeType.SELL:
+            self.holdings[trade.symbol] -= trade.quantity
+            self._holdings_buffer[symbol_index] -= trade.quantity
+            self._total_holdings -= trade.quantity
+
+            if self.holdings[trade.symbol] == 0:
+                del self.holdings[trade.symbol]
+
+        self._weights_dirty = True
+
+        if self.journal is not None:
+            self._journal_columns(
+                [trade.symbol],
+                [trade.quantity],
+                [trade.price],
+                [datetime_to_timestamp(trade.trade_date)],
+                [SIDE_BY_TYPE[trade.trade_type]],
+            )
+
+    def execute_trades(self, trades):
+        """
+        Executes many trades at once, in order, with a single vectorized update of the holdings.
+
+        Accepts an iterable of Trade objects, a pandas DataFrame, or a mapping of parallel arrays.
+        DataFrames and mappings must provide the columns in TRADE_COLUMNS: symbol, quantity, price,
+        trade_date and trade_type, where trade_type holds TradeType members or their names.
+
+        Oversells are checked for the whole batch in trade order before anything is applied, so
+        either every trade is executed or none is. Weights are recomputed once at the end.
+
+        Args:
+            trades: Iterable of Trade objects, DataFrame or mapping of column arrays
+
+        Raises:
+            ValidationError: If a trade is invalid or a sell exceeds the shares held at that point
+        """
+        columns = self._trade_columns(trades)
+        if len(columns[0]) == 0:
+            return
+
+        if self.journal is not None:
+            encode_symbols(columns[0])
+
+        self._apply_columns(*columns)
+        if self.journal is not None:
+            self._journal_columns(*columns)
+
+    def _apply_columns(self, symbols, quantities, prices, timestamps, sides):
+        """
+        Apply a batch of trades given as column arrays, the core of execute_trades.
+
+        Raises:
+            ValidationError: If a symbol is invalid or a sell exceeds the shares held at that point
+        """
+        signed_quantities = quantities * sides
+
+        try:
+            unique_symbols, first_seen, inverse = np.unique(
+                symbols, return_index=True, return_inverse=True
+            )
+        except TypeError as e:
+            raise ValidationError("Invalid symbol", details=str(e))
+        for symbol in unique_symbols:
+            if not isinstance(symbol, str) or not symbol:
+                raise ValidationError(
+                    "Invalid symbol",
+                    details=f"Symbol must be non-empty string, got {type(symbol)}",
+                )
+        unique_symbols = [str(symbol) for symbol in unique_symbols]
+
+        inverse = inverse.ravel()
+        current = np.array(
+            [self.holdings.get(symbol, 0) for symbol in unique_symbols], dtype=np.int64
+        )
+
+        # Running position of each fill's symbol, grouping fills by symbol while
+        # keeping trade order within each group
+        order = np.argsort(inverse, kind="stable")
+        grouped = signed_quantities[order]
+        running = np.cumsum(grouped)
+        group_starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+        offsets = np.repeat(
+            running[group_starts] - grouped[group_starts],
+            np.diff(np.r_[group_starts, len(order)]),
+        )
+        positions = current[inverse[order]] + running - offsets
+
+        oversold = positions < 0
+        if np.any(oversold):
+            first = np.min(order[oversold])
+            available = positions[np.flatnonzero(order == first)[0]] + quantities[first]
+            raise ValidationError(
+                f"Insufficient shares to sell {symbols[first]}",
+                details=f"Requested: {quantities[first]}, Available: {available}",
+            )
+
+        # Register new symbols in order of first appearance
+        indices = np.empty(len(unique_symbols), dtype=np.int64)
+        for k in np.argsort(first_seen):
+            indices[k] = self._register_symbol(unique_symbols[k])
+
+        deltas = np.bincount(inverse, weights=signed_quantities)
+        self._holdings_buffer[indices] += deltas
+        self._total_holdings += float(np.sum(deltas))
+
+        for symbol, quantity in zip(unique_symbols, current + deltas.astype(np.int64)):
+            if quantity == 0:
+                self.holdings.pop(symbol, None)
+            else:
+                self.holdings[symbol] = int(quantity)
+
+        self.trades.extend(indices[inverse], quantities, prices, timestamps, sides)
+        self._weights_dirty = True
+
+    def _journal_columns(self, symbols, quantities, prices, timestamps, sides):
+        """Append executed trades to the journal and take a periodic snapshot when due"""
+        self.journal.append(symbols, quantities, prices, timestamps, sides)
+
+        if (
+            self.snapshot_path is not None
+            and self.snapshot_interval
+            and len(self.journal) - self._snapshot_position >= self.snapshot_interval
+        ):
+            self.save_snapshot(self.snapshot_path)
+
+    def save_snapshot(self, path):
+        """
+        Write the symbols, holdings, weights and prices of the portfolio to an .npz snapshot.
+
+        The snapshot also records how many journal records it covers, so recovery only
+        replays the journal from that point. The file is written to a temporary path and
+        renamed into place, so a crash never leaves a partial snapshot behind.
+
+        Args:
+            path: Path of the snapshot file
+        """
+        path = os.fspath(path)
+        position = len(self.journal) if self.journal is not None else 0
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez(
+                f,
+                symbols=np.array(self.symbols, dtype=str),
+                holdings=self.holdings_vector,
+                weights=self.weights_vector,
+                prices=self.price_book.prices,
+                journal_position=np.int64(position),
+            )
+        os.replace(temporary_path, path)
+        self._snapshot_position = position
+
+    def _load_snapshot(self, path) -> int:
+        """Restore symbols, holdings, weights and prices from a snapshot and return its journal position"""
+        with np.load(path) as snapshot:
+            symbols = [str(symbol) for symbol in snapshot["symbols"]]
+            holdings = snapshot["holdings"]
+            weights = snapshot["weights"]
+            # Snapshots written before the price book have no prices
+            prices = snapshot["prices"] if "prices" in snapshot.files else None
+            position = int(snapshot["journal_position"])
+
+        self._reserve(len(symbols))
+        for symbol in symbols:
+            self._register_symbol(symbol)
+        self.holdings_vector = holdings
+        self.weights_vector = weights
+        if prices is not None:
+            self.price_book.prices[:] = prices
+        self.holdings = {
+            symbol: int(quantity)
+            for symbol, quantity in zip(symbols, holdings)
+            if quantity != 0
+        }
+        return position
+
+    @classmethod
+    def recover(
+        cls, journal, snapshot_path=None, gamma=0.5, snapshot_interval=None
+    ) -> "Portfolio":
+        """
+        Rebuild a portfolio from its latest snapshot and the tail of its trade journal.
+
+        Only the journal records written after the snapshot are replayed, in vectorized
+        chunks read through a memory map, so recovery time depends on the activity since
+        the last snapshot rather than on the whole history. The recovered portfolio keeps
+        journaling to the same journal; its trades log only holds the replayed tail.
+
+        Args:
+            journal: TradeJournal, or path of one, the portfolio was journaling to
+            snapshot_path: Optional path of the latest snapshot; a missing file means
+                the whole journal is replayed
+            gamma: Risk aversion parameter
+            snapshot_interval: Number of journaled trades between periodic snapshots
+
+        Returns:
+            Portfolio: The recovered portfolio
+
+        Raises:
+            ValidationError: If the snapshot covers more records than the journal holds
+        """
+        portfolio = cls(
+            gamma,
+            journal=journal,
+            snapshot_path=snapshot_path,
+            snapshot_interval=snapshot_interval,
+        )
+        journal = portfolio.journal
+
+        position = 0
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            position = portfolio._load_snapshot(snapshot_path)
+            if position > len(journal):
+                raise ValidationError(
+                    "Snapshot is ahead of journal",
+                    details=f"Snapshot position: {position}, Journal records: {len(journal)}",
+                )
+
+        for start in range(position, len(journal), REPLAY_CHUNK_SIZE):
+            records = journal.read(start, start + REPLAY_CHUNK_SIZE)
+            portfolio._apply_columns(
+                decode_symbols(records["symbol"]),
+                np.asarray(records["quantity"], dtype=np.int64),
+                np.asarray(records["price"], dtype=np.float64),
+                np.asarray(records["timestamp"], dtype=np.int64),
+                np.asarray(records["side"], dtype=np.int8),
+            )
+
+        portfolio._snapshot_position = position
+        return portfolio
+
+    @staticmethod
+    def _trade_columns(trades):
+        """
+        Convert the inputs accepted by execute_trades into validated column arrays.
+
+        Returns:
+            Tuple of symbols (str or object), quantities (int64), prices (float64),
+            timestamps (int64 microseconds) and sides (int8) arrays
+        """
+        if isinstance(trades, Mapping) or hasattr(trades, "columns"):
+            missing = [column for column in TRADE_COLUMNS if column not in trades]
+            if missing:
+                raise ValidationError(
+                    "Missing trade columns", details=f"Missing: {missing}"
+                )
+
+            columns = [np.asarray(trades[column]) for column in TRADE_COLUMNS]
+            if len({len(column) for column in columns}) > 1:
+                raise ValidationError(
+                    "Trade column length mismatch",
+                    details=f"Lengths: {[len(column) for column in columns]}",
+                )
+
+            symbols, quantities, prices, trade_dates, trade_types = columns
+            if len(symbols) == 0:
+                return (
+                    np.array([], dtype=object),
+                    np.array([], dtype=np.int64),
+                    np.array([]),
+                    np.array([], dtype=np.int64),
+                    np.array([], dtype=np.int8),
+                )
+
+            if not np.issubdtype(quantities.dtype, np.integer) or np.any(
+                quantities <= 0
+            ):
+                raise ValidationError(
+                    "Invalid quantity",
+                    details="Quantities must be positive integers",
+                )
             if (
-                trade.symbol not in self.holdings
-                or self.holdings[trade.symbol] < trade.quantity
+                not np.issubdtype(prices.dtype, np.number)
+                or np.issubdtype(prices.dtype, np.bool_)
+                or not np.all(prices > 0)
             ):
                 raise ValidationError(
-                    f"Insufficient shares to sell {trade.symbol}",
-                    details=f"Requested: {trade.quantity}, Available: {self.holdings.get(trade.symbol, 0)}",
+                    "Invalid price", details="Prices must be positive numbers"
                 )
 
-            self.holdings[trade.symbol] -= trade.quantity
-            self.holdings_vector[symbol_index] -= trade.quantity
+            return (
+                # Unicode arrays stay native, which sorts much faster in np.unique
+                symbols if symbols.dtype.kind == "U" else symbols.astype(object),
+                quantities.astype(np.int64),
+                prices.astype(np.float64),
+                dates_to_timestamps(trade_dates),
+                types_to_sides(trade_types),
+            )
 
-            if self.holdings[trade.symbol] == 0:
-                del self.holdings[trade.symbol]
+        trades = list(trades)
+        for trade in trades:
+            if not isinstance(trade, Trade):
+                raise ValidationError(
+                    "Invalid trade object", details=f"Expected Trade, got {type(trade)}"
+                )
 
-        self.update_weights()
+        return (
+            np.array([trade.symbol for trade in trades], dtype=object),
+            np.array([trade.quantity for trade in trades], dtype=np.int64),
+            np.array([trade.price for trade in trades], dtype=np.float64),
+            np.array(
+                [datetime_to_timestamp(trade.trade_date) for trade in trades],
+                dtype=np.int64,
+            ),
+            np.array(
+                [SIDE_BY_TYPE[trade.trade_type] for trade in trades], dtype=np.int8
+            ),
+        )
 
     def update_weights(self):
         """
         Updates the portfolio weights based on the current holdings.
+
+        Trades keep weights up to date lazily, so this is only needed after modifying
+        holdings_vector in place; it also resynchronizes the running total of holdings.
         """
-        total_holdings = np.sum(
-            self.holdings_vector
-        )  # Calculate total number of shares across all holdings
+        self._total_holdings = float(np.sum(self.holdings_vector))
+        self._materialize_weights()
 
-        if total_holdings > 0:
+    def _materialize_weights(self):
+        """Recompute the weights from the running total of holdings"""
+        n = len(self.symbols)
+        if self._total_holdings > 0:
             # If total holdings are greater than zero, calculate the weight of each stock
-            self.weights_vector = self.holdings_vector / total_holdings
+            np.divide(
+                self._holdings_buffer[:n],
+                self._total_holdings,
+                out=self._weights_buffer[:n],
+            )
         else:
             # If there are no holdings, set all weights to zero
-            self.weights_vector = np.zeros(len(self.symbols))
+            self._weights_buffer[:n] = 0
+        self._weights_dirty = False
 
     def get_weights(self) -> Dict[str, float]:
         """
@@ -98,59 +551,304 @@ class Portfolio:
             symbol: weight for symbol, weight in zip(self.symbols, self.weights_vector)
         }
 
-    def total_value(self, current_prices: Dict[str, float]) -> float:
+    def total_value(self, current_prices: Dict[str, float] = None) -> float:
         """
         Calculates the total market value of the portfolio based on current stock prices.
+
+        Without current_prices the prices of price_book are used, with no per-symbol lookups.
+        For many snapshots, or repeated calls with the same feed, use value_series.
+
+        Args:
+            current_prices: Optional dictionary of the price of every symbol.
+
+        Raises:
+            ValidationError: If the price book has no price for a symbol
         """
+        if current_prices is None:
+            value = np.dot(self.holdings_vector, self.price_book.prices)
+            if np.isnan(value):
+                unpriced = self.price_book.unpriced()
+                raise ValidationError(
+                    "Missing prices",
+                    details=f"No price for {len(unpriced)} symbols, e.g. {unpriced[:5]}",
+                )
+            return value
         # Create a vector of current prices in the same order as the symbols list
-        prices_vector = np.array([current_prices[symbol] for symbol in self.symbols])
+        prices_vector = np.fromiter(
+            (current_prices[symbol] for symbol in self.symbols),
+            dtype=float,
+            count=len(self.symbols),
+        )
         # Return the dot product of the holdings vector and prices vector to get the portfolio's total value
         return np.dot(self.holdings_vector, prices_vector)
 
+    def symbol_alignment(self, feed_symbols) -> SymbolAlignment:
+        """
+        Prepare the mapping of a price feed's columns to the portfolio symbols for value_series.
+
+        The alignment is tied to the current symbols; prepare a new one after trades
+        add symbols.
+
+        Args:
+            feed_symbols: Symbols of the feed columns in order, e.g. DataFrame.columns or
+                the keys of a price dict.
+
+        Returns:
+            SymbolAlignment: Feed column of each portfolio symbol.
+
+        Raises:
+            ValidationError: If the feed lacks a price for a portfolio symbol
+        """
+        return SymbolAlignment(self.symbols, feed_symbols)
+
+    def value_series(self, prices, alignment: SymbolAlignment = None) -> np.ndarray:
+        """
+        Market value of the portfolio at many price snapshots in one matrix-vector product.
+
+        Args:
+            prices: Without alignment, a (T, n) matrix, or (n,) vector, of prices whose
+                columns follow symbols. With alignment, any feed the alignment was
+                prepared for: an array, DataFrame or dict in the feed's column order.
+            alignment: Optional SymbolAlignment from symbol_alignment.
+
+        Returns:
+            Numpy array: Value at each of the T snapshots, or a scalar for a single snapshot.
+
+        Raises:
+            ValidationError: If the prices do not match the symbols or the alignment is stale
+        """
+        if alignment is not None:
+            if len(alignment.symbols) != len(self.symbols):
+                raise ValidationError(
+                    "Stale symbol alignment",
+                    details=f"Prepared for {len(alignment.symbols)} symbols, "
+                    f"the portfolio has {len(self.symbols)}",
+                )
+            return alignment.values(self.holdings_vector, prices)
+
+        prices = np.asarray(prices, dtype=float)
+        if prices.ndim not in (1, 2) or prices.shape[-1] != len(self.symbols):
+            raise ValidationError(
+                "Price matrix shape mismatch",
+                details=f"Expected {len(self.symbols)} columns, got shape {prices.shape}",
+            )
+        return prices @ self.holdings_vector
+
+    def _check_single_period_inputs(self, expected_returns, gamma) -> np.ndarray:
+        """Validate single-period inputs against the portfolio; returns dense expected returns"""
+        from .sparse_utils import to_dense_vector
+
+        expected_returns = to_dense_vector(expected_returns)
+        if len(expected_returns) != len(self.weights_vector):
+            raise ValidationError(
+                "Expected returns length mismatch",
+                details=f"Expected {len(self.weights_vector)}, got {len(expected_returns)}",
+            )
+        if gamma < 0:
+            raise ValidationError(
+                "Invalid risk aversion parameter",
+                details=f"gamma must be non-negative, got {gamma}",
+            )
+        return expected_returns
+
+    def _check_multi_period_inputs(self, H, r_t, gamma_t, psi_t, phi_trade, phi_hold):
+        """Validate multi-period inputs against the portfolio; returns dense r_t, psi_t, phi_trade, phi_hold"""
+        from .sparse_utils import to_dense
+
+        r_t, psi_t, phi_trade, phi_hold = (
+            to_dense(values) for values in (r_t, psi_t, phi_trade, phi_hold)
+        )
+        if r_t.shape[1] != len(self.weights_vector):
+            raise ValidationError(
+                "Number of assets mismatch",
+                details=f"Expected {len(self.weights_vector)} assets, got {r_t.shape[1]}",
+            )
+        if (
+            len(gamma_t) != H
+            or len(psi_t) != H
+            or len(phi_trade) != H
+            or len(phi_hold) != H
+        ):
+            raise ValidationError(
+                "Input length mismatch",
+                details=f"All period inputs must have length {H}",
+            )
+        return r_t, psi_t, phi_trade, phi_hold
+
     def single_period_optimize(
-        self, expected_returns: np.ndarray, gamma: float
+        self,
+        expected_returns: np.ndarray,
+        gamma: float,
+        engine: str = "auto",
+        sigma=None,
+        sparse: bool = False,
+        solver=None,
     ) -> np.ndarray:
         """
         Solve the single-period optimization problem using the provided single_period_optimization function.
+        By default the problem is solved exactly by the native NumPy solver; with engine="cvxpy"
+        the compiled CVXPY problem is cached per number of assets, so repeated calls only
+        update parameter values and re-solve with warm start.
 
         Args:
             expected_returns: Numpy array of expected returns for each stock in the portfolio.
             gamma: Risk-aversion parameter.
+            engine: "auto" or "native" for the native solver, "cvxpy" for the CVXPY problem.
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel or
+                FactorRiskModel replacing the default identity risk; requires the CVXPY engine.
+            sparse: Whether to return the trade vector as a scipy.sparse array.
+            solver: Solver name or SolverConfig for the CVXPY engine; the solver used is
+                stored in last_solver.
 
         Returns:
-            Numpy array: Optimal trade vector (z).
+            Numpy array: Optimal trade vector (z), or a scipy.sparse array if sparse is set.
 
         Raises:
             ValidationError: If input parameters are invalid
             OptimizationError: If optimization fails
         """
-        w_t = self.weights_vector
+        # Deferred so that bookkeeping-only users never import cvxpy
+        from .single_period_optimization import (
+            single_period_optimization,
+            default_phi_trade,
+            default_phi_hold,
+        )
+
+        expected_returns = self._check_single_period_inputs(expected_returns, gamma)
+
+        # Module-level cost functions keep the compiled problem cache warm
+        result, self.last_solver = single_period_optimization(
+            expected_returns,
+            self.weights_vector,
+            gamma,
+            default_phi_trade,
+            default_phi_hold,
+            engine,
+            sigma,
+            sparse,
+            solver,
+            return_solver=True,
+        )
+
+        if result is None:
+            raise OptimizationError("Single-period optimization failed")
+
+        return result
+
+    async def single_period_optimize_async(
+        self,
+        expected_returns: np.ndarray,
+        gamma: float,
+        engine: str = "auto",
+        sigma=None,
+        sparse: bool = False,
+        solver=None,
+        executor=None,
+        timeout: float = None,
+    ) -> np.ndarray:
+        """
+        Awaitable single_period_optimize that solves on an OptimizationExecutor,
+        leaving the event loop free for other requests.
+
+        The weights are snapshotted before the coroutine first suspends, so trades
+        executed while the solve runs do not race with it; the trades are relative
+        to the weights at that time.
+
+        Args:
+            expected_returns, gamma, engine, sigma, sparse, solver: As for
+                single_period_optimize.
+            executor: OptimizationExecutor to solve on, or None for the shared default.
+            timeout: Optional number of seconds to wait for the result.
+
+        Returns:
+            Numpy array: Optimal trade vector (z), or a scipy.sparse array if sparse is set.
+
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization fails, the executor is full or the
+                timeout expires
+        """
+        from .async_optimization import single_period_optimization_async
 
-        def phi_trade(z):
-            return cp.sum(cp.abs(z))
+        expected_returns = self._check_single_period_inputs(expected_returns, gamma)
 
-        def phi_hold(w):
-            return cp.sum(cp.square(w))
+        result, solver_used = await single_period_optimization_async(
+            expected_returns,
+            self.weights_vector,
+            gamma,
+            engine=engine,
+            sigma=sigma,
+            sparse=sparse,
+            solver=solver,
+            return_solver=True,
+            executor=executor,
+            timeout=timeout,
+        )
+        self.last_solver = solver_used
+
+        if result is None:
+            raise OptimizationError("Single-period optimization failed")
+
+        return result
+
+    def efficient_frontier(
+        self,
+        expected_returns: np.ndarray,
+        gammas: np.ndarray,
+        max_workers: int = None,
+        engine: str = "auto",
+    ):
+        """
+        Trace the risk/return frontier of single-period optimizations over a grid of gammas.
+
+        By default the whole grid is solved at once by the native NumPy solver. With
+        engine="cvxpy" each solve is warm-started from the previous point on the grid
+        and, with max_workers set, the grid is split into contiguous chunks solved in
+        worker processes.
+
+        Args:
+            expected_returns: Numpy array of expected returns for each stock in the portfolio.
+            gammas: Grid of risk-aversion parameters, solved in the given order.
+            max_workers: Number of worker processes for the CVXPY engine, or None to
+                solve in this process.
+            engine: "auto" or "native" for the native solver, "cvxpy" for the CVXPY problem.
+
+        Returns:
+            EfficientFrontier: Trades, expected returns, risks and status for each gamma.
+
+        Raises:
+            ValidationError: If input parameters are invalid, or max_workers is set
+                for the native solver
+            OptimizationError: If every point on the frontier fails
+        """
+        from .single_period_optimization import default_phi_trade, default_phi_hold
+        from .batch_optimization import efficient_frontier
 
         if len(expected_returns) != len(self.weights_vector):
             raise ValidationError(
                 "Expected returns length mismatch",
                 details=f"Expected {len(self.weights_vector)}, got {len(expected_returns)}",
             )
-        if gamma < 0:
+        if np.any(np.asarray(gammas) < 0):
             raise ValidationError(
                 "Invalid risk aversion parameter",
-                details=f"gamma must be non-negative, got {gamma}",
+                details="gamma must be non-negative",
             )
 
-        result = single_period_optimization(
-            expected_returns, w_t, gamma, phi_trade, phi_hold
+        frontier = efficient_frontier(
+            expected_returns,
+            self.weights_vector,
+            gammas,
+            default_phi_trade,
+            default_phi_hold,
+            max_workers=max_workers,
+            engine=engine,
         )
 
-        if result is None:
-            raise OptimizationError("Single-period optimization failed")
+        if np.all(np.isnan(frontier.trades)):
+            raise OptimizationError("Efficient frontier optimization failed")
 
-        return result
+        return frontier
 
     def multi_period_optimize(
         self,
@@ -160,6 +858,9 @@ class Portfolio:
         psi_t: np.ndarray,
         phi_trade: List[np.ndarray],
         phi_hold: List[np.ndarray],
+        sigma=None,
+        sparse: bool = False,
+        solver=None,
     ) -> np.ndarray:
         """
         Solve the multi-period optimization problem using the multi_period_optimization function.
@@ -171,35 +872,173 @@ class Portfolio:
             psi_t: Vector of risk factors for each period.
             phi_trade: List of transaction cost vectors for each period.
             phi_hold: List of holding cost vectors for each period.
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel or
+                FactorRiskModel whose risk is added in every period.
+            sparse: Whether to return the trades as a scipy.sparse array.
+            solver: Solver name or SolverConfig; the solver used is stored in
+                last_solver.
+
+        Per-period inputs may be given as scipy.sparse matrices.
 
         Returns:
-            Numpy array: Optimal trade vectors over all periods (z matrix).
+            Numpy array: Optimal trade vectors over all periods (z matrix), or a
+            scipy.sparse array if sparse is set.
 
         Raises:
             ValidationError: If input parameters are invalid
             OptimizationError: If optimization fails
         """
-        if r_t.shape[1] != len(self.weights_vector):
-            raise ValidationError(
-                "Number of assets mismatch",
-                details=f"Expected {len(self.weights_vector)} assets, got {r_t.shape[1]}",
-            )
-        if (
-            len(gamma_t) != H
-            or len(psi_t) != H
-            or len(phi_trade) != H
-            or len(phi_hold) != H
-        ):
-            raise ValidationError(
-                "Input length mismatch",
-                details=f"All period inputs must have length {H}",
-            )
+        from .multi_period_optimization import multi_period_optimization
+
+        r_t, psi_t, phi_trade, phi_hold = self._check_multi_period_inputs(
+            H, r_t, gamma_t, psi_t, phi_trade, phi_hold
+        )
+
+        result, self.last_solver = multi_period_optimization(
+            H,
+            r_t,
+            self,
+            gamma_t,
+            psi_t,
+            phi_trade,
+            phi_hold,
+            sigma,
+            sparse,
+            solver,
+            return_solver=True,
+        )
+
+        if result is None:
+            raise OptimizationError("Multi-period optimization failed")
+
+        return result
+
+    async def multi_period_optimize_async(
+        self,
+        H: int,
+        r_t: np.ndarray,
+        gamma_t: np.ndarray,
+        psi_t: np.ndarray,
+        phi_trade: List[np.ndarray],
+        phi_hold: List[np.ndarray],
+        sigma=None,
+        sparse: bool = False,
+        solver=None,
+        executor=None,
+        timeout: float = None,
+    ) -> np.ndarray:
+        """
+        Awaitable multi_period_optimize that solves on an OptimizationExecutor,
+        leaving the event loop free for other requests.
+
+        The weights are snapshotted before the coroutine first suspends, so trades
+        executed while the solve runs do not race with it.
+
+        Args:
+            H, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma, sparse, solver: As
+                for multi_period_optimize.
+            executor: OptimizationExecutor to solve on, or None for the shared default.
+            timeout: Optional number of seconds to wait for the result.
+
+        Returns:
+            Numpy array: Optimal trade vectors over all periods (z matrix), or a
+            scipy.sparse array if sparse is set.
 
-        result = multi_period_optimization(
-            H, r_t, self, gamma_t, psi_t, phi_trade, phi_hold
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization fails, the executor is full or the
+                timeout expires
+        """
+        from .async_optimization import (
+            multi_period_optimization_async,
+            snapshot_portfolio,
+        )
+
+        r_t, psi_t, phi_trade, phi_hold = self._check_multi_period_inputs(
+            H, r_t, gamma_t, psi_t, phi_trade, phi_hold
         )
 
+        result, solver_used = await multi_period_optimization_async(
+            H,
+            r_t,
+            snapshot_portfolio(self),
+            gamma_t,
+            psi_t,
+            phi_trade,
+            phi_hold,
+            sigma=sigma,
+            sparse=sparse,
+            solver=solver,
+            return_solver=True,
+            executor=executor,
+            timeout=timeout,
+        )
+        self.last_solver = solver_used
+
         if result is None:
             raise OptimizationError("Multi-period optimization failed")
 
         return result
+
+    def multi_period_step(
+        self,
+        H: int,
+        r_t: np.ndarray,
+        gamma_t: np.ndarray,
+        psi_t: np.ndarray,
+        phi_trade: List[np.ndarray],
+        phi_hold: List[np.ndarray],
+        sigma=None,
+        sparse: bool = False,
+        solver=None,
+    ) -> np.ndarray:
+        """
+        Receding-horizon (model-predictive control) version of multi_period_optimize.
+
+        Solves the same H-period problem but returns only the trade for the next period.
+        The portfolio keeps one RecedingHorizonOptimizer per number of assets and horizon,
+        so successive calls reuse the compiled problem and warm start from the previous
+        plan shifted forward by one period.
+
+        Args:
+            H: Number of future periods to optimize.
+            r_t: Matrix of expected returns, where each row corresponds to a future period.
+            gamma_t: Vector of risk-aversion parameters for each period.
+            psi_t: Vector of risk factors for each period.
+            phi_trade: List of transaction cost vectors for each period.
+            phi_hold: List of holding cost vectors for each period.
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel or
+                FactorRiskModel whose risk is added in every period.
+            sparse: Whether to return the trade vector as a scipy.sparse array.
+            solver: Solver name or SolverConfig; the solver used is stored in
+                last_solver.
+
+        Returns:
+            Numpy array: Trade vector for the next period, or a scipy.sparse array if
+            sparse is set.
+
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization fails
+        """
+        from .multi_period_optimization import (
+            check_inputs as check_multi_period_inputs,
+            RecedingHorizonOptimizer,
+        )
+        from .sparse_utils import to_dense, sparse_trades
+
+        r_t, psi_t, phi_trade, phi_hold = (
+            to_dense(values) for values in (r_t, psi_t, phi_trade, phi_hold)
+        )
+        check_multi_period_inputs(H, r_t, self, gamma_t, psi_t, phi_trade, phi_hold)
+
+        n = len(self.symbols)
+        mpc = self._receding_horizon
+        if mpc is None or mpc.n_assets != n or mpc.H != H:
+            mpc = self._receding_horizon = RecedingHorizonOptimizer(n, H)
+
+        z = mpc.step(
+            self.weights_vector, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma, solver
+        )
+        self.last_solver = mpc.solver_used
+        return sparse_trades(z) if sparse else z
@@ -20,6 +20,8 @@ class Trade:
     the price per share, the date of the trade, and the type of trade (BUY or SELL).
     """
 
+    __slots__ = ("symbol", "quantity", "price", "trade_date", "trade_type")
+
     def __init__(
         self,
         symbol: str,
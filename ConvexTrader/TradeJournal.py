@@ -0,0 +1,161 @@
+import os
+import numpy as np
+from .portfolio_exceptions import ValidationError
+
+# Magic bytes at the start of every journal file, padded to HEADER_SIZE
+JOURNAL_MAGIC = b"CTJRNL01"
+HEADER_SIZE = 16
+
+# Longest symbol, in UTF-8 bytes, that fits in a journal record
+MAX_SYMBOL_BYTES = 16
+
+# One executed trade per record, 41 bytes, little-endian and unpadded
+RECORD_DTYPE = np.dtype(
+    [
+        ("symbol", f"S{MAX_SYMBOL_BYTES}"),
+        ("quantity", "<i8"),
+        ("price", "<f8"),
+        ("timestamp", "<i8"),
+        ("side", "i1"),
+    ]
+)
+
+
+def encode_symbols(symbols) -> np.ndarray:
+    """
+    Encode symbols as fixed-width UTF-8 byte strings for journal records.
+
+    Raises:
+        ValidationError: If a symbol is longer than MAX_SYMBOL_BYTES once encoded
+    """
+    encoded = np.char.encode(np.asarray(symbols, dtype=str), "utf-8")
+    if encoded.size and encoded.dtype.itemsize > MAX_SYMBOL_BYTES:
+        too_long = encoded[np.char.str_len(encoded) > MAX_SYMBOL_BYTES]
+        raise ValidationError(
+            "Symbol too long for journal",
+            details=f"At most {MAX_SYMBOL_BYTES} bytes, got {too_long[0]!r}",
+        )
+    return encoded
+
+
+def decode_symbols(symbols: np.ndarray) -> np.ndarray:
+    """Decode journal symbol bytes back to an array of str"""
+    return np.char.decode(symbols, "utf-8")
+
+
+class TradeJournal:
+    """
+    Append-only on-disk journal of executed trades.
+
+    The file is a 16 byte header followed by fixed-width binary records of
+    RECORD_DTYPE, so the n-th trade lives at a known offset and any range of the
+    journal can be memory-mapped without parsing what comes before it. Records
+    are only ever appended; a partial record left by a crash mid-write is
+    truncated the next time the journal is opened.
+
+    Example:
+        >>> journal = TradeJournal("trades.journal")
+        >>> portfolio = Portfolio(journal=journal)
+        >>> portfolio.execute_trade(trade)
+        >>> journal.read(start=0)["quantity"]
+    """
+
+    def __init__(self, path, fsync: bool = False):
+        """
+        Open a journal, creating the file if it does not exist.
+
+        Args:
+            path: Path of the journal file
+            fsync: Whether to fsync after every append, trading speed for durability
+                against power loss rather than just process crashes
+
+        Raises:
+            ValidationError: If the file exists but is not a trade journal
+        """
+        self.path = os.fspath(path)
+        self.fsync = fsync
+
+        if os.path.exists(self.path):
+            self._file = open(self.path, "r+b")
+            if self._file.read(HEADER_SIZE)[: len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+                self._file.close()
+                raise ValidationError(
+                    "Invalid journal file", details=f"Bad header in {self.path}"
+                )
+            size = os.path.getsize(self.path) - HEADER_SIZE
+            self._length = size // RECORD_DTYPE.itemsize
+            # Drop a partially written trailing record
+            self._file.truncate(HEADER_SIZE + self._length * RECORD_DTYPE.itemsize)
+        else:
+            self._file = open(self.path, "w+b")
+            self._file.write(JOURNAL_MAGIC.ljust(HEADER_SIZE, b"\0"))
+            self._file.flush()
+            self._length = 0
+
+        self._file.seek(0, os.SEEK_END)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self):
+        return f"<TradeJournal(path={self.path!r}, records={self._length})>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the underlying file"""
+        self._file.close()
+
+    def append(self, symbols, quantities, prices, timestamps, sides):
+        """
+        Append trades given as parallel column arrays and flush them to disk.
+
+        Args:
+            symbols: Symbol of each trade
+            quantities: Number of shares of each trade
+            prices: Price per share of each trade
+            timestamps: Trade times in microseconds since the epoch
+            sides: +1 for BUY and -1 for SELL
+
+        Raises:
+            ValidationError: If a symbol does not fit in a record
+        """
+        records = np.empty(len(symbols), dtype=RECORD_DTYPE)
+        records["symbol"] = encode_symbols(symbols)
+        records["quantity"] = quantities
+        records["price"] = prices
+        records["timestamp"] = timestamps
+        records["side"] = sides
+
+        self._file.write(records.tobytes())
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._length += len(records)
+
+    def read(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Memory-map a range of records.
+
+        Args:
+            start: Index of the first record
+            stop: Index one past the last record, defaults to the end of the journal
+
+        Returns:
+            Read-only structured array of RECORD_DTYPE backed by the journal file
+        """
+        start, stop, _ = slice(start, stop).indices(self._length)
+        if stop <= start:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        return np.memmap(
+            self.path,
+            dtype=RECORD_DTYPE,
+            mode="r",
+            offset=HEADER_SIZE + start * RECORD_DTYPE.itemsize,
+            shape=(stop - start,),
+        )
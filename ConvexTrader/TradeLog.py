@@ -0,0 +1,255 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import Iterator, List
+from .Trade import Trade, TradeType
+from .portfolio_exceptions import ValidationError
+
+# Initial number of rows in the column arrays of a TradeLog
+INITIAL_CAPACITY = 1024
+
+# Encoding of TradeType in the side column
+SIDE_BY_TYPE = {TradeType.BUY: 1, TradeType.SELL: -1}
+TYPE_BY_SIDE = {side: trade_type for trade_type, side in SIDE_BY_TYPE.items()}
+
+COLUMN_DTYPES = {
+    "symbol_ids": np.int32,
+    "quantities": np.int64,
+    "prices": np.float64,
+    "timestamps": np.int64,
+    "sides": np.int8,
+}
+
+
+def datetime_to_timestamp(trade_date: datetime) -> int:
+    """
+    Convert a datetime to integer microseconds since the epoch.
+
+    Naive datetimes are stored as-is; timezone-aware datetimes are converted to
+    UTC first, and come back from the log as naive UTC datetimes.
+    """
+    if trade_date.tzinfo is not None:
+        trade_date = trade_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(trade_date, "us").astype(np.int64))
+
+
+def timestamp_to_datetime(timestamp: int) -> datetime:
+    """Convert integer microseconds since the epoch back to a naive datetime"""
+    return np.datetime64(int(timestamp), "us").astype(datetime)
+
+
+def dates_to_timestamps(trade_dates) -> np.ndarray:
+    """
+    Convert an array of datetime64 values or datetime objects to int64 timestamps.
+
+    Raises:
+        ValidationError: If an element is not a datetime
+    """
+    trade_dates = np.asarray(trade_dates)
+    if np.issubdtype(trade_dates.dtype, np.datetime64):
+        return trade_dates.astype("datetime64[us]").astype(np.int64)
+
+    timestamps = np.empty(len(trade_dates), dtype=np.int64)
+    for i, trade_date in enumerate(trade_dates.tolist()):
+        if not isinstance(trade_date, datetime):
+            raise ValidationError(
+                "Invalid trade date",
+                details=f"Expected datetime object, got {type(trade_date)}",
+            )
+        timestamps[i] = datetime_to_timestamp(trade_date)
+    return timestamps
+
+
+def types_to_sides(trade_types) -> np.ndarray:
+    """
+    Convert an array of TradeType members or their names to the int8 side encoding.
+
+    Raises:
+        ValidationError: If an element is not a valid trade type
+    """
+    trade_types = np.asarray(trade_types, dtype=object)
+    sides = np.zeros(len(trade_types), dtype=np.int8)
+    for trade_type, side in SIDE_BY_TYPE.items():
+        sides[(trade_types == trade_type) | (trade_types == trade_type.name)] = side
+
+    if not np.all(sides):
+        invalid = trade_types[np.flatnonzero(sides == 0)[0]]
+        raise ValidationError(
+            "Invalid trade type",
+            details=f"Expected TradeType enum, got {type(invalid)}",
+        )
+    return sides
+
+
+class TradeLog:
+    """
+    Columnar, append-only store of executed trades.
+
+    Each trade is stored as one row across growable numpy columns: symbol id,
+    quantity, price, int64 timestamp in microseconds and side (+1 for BUY, -1 for
+    SELL), which takes 29 bytes per trade. Symbol ids index into a symbols list
+    shared with the owning Portfolio. Trade objects are only created when the log
+    is indexed or iterated.
+
+    Example:
+        >>> log = portfolio.trades
+        >>> log.quantities[:5]
+        >>> log.net_quantities()
+    """
+
+    def __init__(self, symbols: List[str] = None, capacity: int = INITIAL_CAPACITY):
+        """
+        Initialize an empty trade log.
+
+        Args:
+            symbols: List of symbols that symbol ids refer to, usually Portfolio.symbols
+            capacity: Initial number of rows to allocate
+        """
+        self.symbols: List[str] = symbols if symbols is not None else []
+        self._length = 0
+        self._columns = {
+            name: np.zeros(max(capacity, 1), dtype=dtype)
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        """Return the Trade at an integer index, or a list of Trades for a slice"""
+        if isinstance(index, slice):
+            return [self._make_trade(i) for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("TradeLog index out of range")
+        return self._make_trade(index)
+
+    def __iter__(self) -> Iterator[Trade]:
+        for i in range(self._length):
+            yield self._make_trade(i)
+
+    def __repr__(self):
+        return f"<TradeLog(trades={self._length}, symbols={len(self.symbols)})>"
+
+    def _make_trade(self, i: int) -> Trade:
+        """Build the Trade object for row i"""
+        columns = self._columns
+        return Trade(
+            self.symbols[columns["symbol_ids"][i]],
+            int(columns["quantities"][i]),
+            float(columns["prices"][i]),
+            timestamp_to_datetime(columns["timestamps"][i]),
+            TYPE_BY_SIDE[int(columns["sides"][i])],
+        )
+
+    def _reserve(self, capacity: int):
+        """Grow the column arrays to hold at least capacity rows"""
+        current = len(self._columns["sides"])
+        if capacity <= current:
+            return
+
+        new_capacity = max(2 * current, capacity)
+        for name, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[: self._length] = column[: self._length]
+            self._columns[name] = grown
+
+    def append(self, trade: Trade, symbol_id: int):
+        """
+        Append a single trade.
+
+        Args:
+            trade: Executed Trade
+            symbol_id: Index of the trade's symbol in the symbols list
+        """
+        i = self._length
+        self._reserve(i + 1)
+        columns = self._columns
+        columns["symbol_ids"][i] = symbol_id
+        columns["quantities"][i] = trade.quantity
+        columns["prices"][i] = trade.price
+        columns["timestamps"][i] = datetime_to_timestamp(trade.trade_date)
+        columns["sides"][i] = SIDE_BY_TYPE[trade.trade_type]
+        self._length = i + 1
+
+    def extend(self, symbol_ids, quantities, prices, timestamps, sides):
+        """
+        Append many trades given as parallel column arrays.
+
+        Args:
+            symbol_ids: Index of each trade's symbol in the symbols list
+            quantities: Number of shares of each trade
+            prices: Price per share of each trade
+            timestamps: Trade times in microseconds since the epoch
+            sides: +1 for BUY and -1 for SELL
+        """
+        values = dict(
+            zip(COLUMN_DTYPES, (symbol_ids, quantities, prices, timestamps, sides))
+        )
+        count = len(symbol_ids)
+        start = self._length
+        self._reserve(start + count)
+        for name, column in self._columns.items():
+            column[start : start + count] = values[name]
+        self._length = start + count
+
+    @property
+    def symbol_ids(self) -> np.ndarray:
+        """Symbol id of each trade"""
+        return self._columns["symbol_ids"][: self._length]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        """Number of shares of each trade"""
+        return self._columns["quantities"][: self._length]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Price per share of each trade"""
+        return self._columns["prices"][: self._length]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Trade time of each trade in microseconds since the epoch"""
+        return self._columns["timestamps"][: self._length]
+
+    @property
+    def sides(self) -> np.ndarray:
+        """Side of each trade, +1 for BUY and -1 for SELL"""
+        return self._columns["sides"][: self._length]
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes used by the live rows of the log"""
+        return self._length * sum(
+            np.dtype(dtype).itemsize for dtype in COLUMN_DTYPES.values()
+        )
+
+    def signed_quantities(self) -> np.ndarray:
+        """Quantity of each trade, negative for sells"""
+        return self.quantities * self.sides
+
+    def _by_symbol(self, weights) -> np.ndarray:
+        """Sum per-trade values per symbol id"""
+        return np.bincount(
+            self.symbol_ids, weights=weights, minlength=len(self.symbols)
+        )
+
+    def net_quantities(self) -> np.ndarray:
+        """Net shares bought minus sold per symbol, in the order of symbols"""
+        return self._by_symbol(self.signed_quantities())
+
+    def traded_volume(self) -> np.ndarray:
+        """Total shares traded per symbol, in the order of symbols"""
+        return self._by_symbol(self.quantities)
+
+    def notional(self) -> np.ndarray:
+        """Total traded value (price times quantity) per symbol, in the order of symbols"""
+        return self._by_symbol(self.prices * self.quantities)
+
+    def vwap(self) -> np.ndarray:
+        """Volume-weighted average trade price per symbol, NaN for untraded symbols"""
+        volume = self.traded_volume()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(volume > 0, self.notional() / volume, np.nan)
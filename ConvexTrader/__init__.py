@@ -1,6 +1,68 @@
+from importlib import import_module
 from .Portfolio import Portfolio
 from .Trade import Trade, TradeType
+from .TradeLog import TradeLog
+from .TradeJournal import TradeJournal
+from .valuation import SymbolAlignment, PriceBook
 
 __version__ = "0.0.3"
 
-__all__ = ["Portfolio", "Trade", "TradeType"]
+# Exports whose modules import cvxpy or scipy, loaded on first access so that
+# bookkeeping-only users of Portfolio and Trade never pay for the solver stack
+_LAZY_EXPORTS = {
+    "Backtester": ".Backtester",
+    "BacktestResult": ".Backtester",
+    "RunningCovariance": ".risk_models",
+    "EWMACovariance": ".risk_models",
+    "LedoitWolfCovariance": ".risk_models",
+    "FactorRiskModel": ".risk_models",
+    "SolverConfig": ".solver_config",
+    "OptimizationStats": ".instrumentation",
+    "register_hook": ".instrumentation",
+    "unregister_hook": ".instrumentation",
+    "ResultCache": ".result_cache",
+    "OptimizationExecutor": ".async_optimization",
+    "OptimizationClient": ".client",
+    "ProblemCache": ".problem_cache",
+    "set_problem_cache": ".problem_cache",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Later accesses find the attribute directly and skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
+
+
+__all__ = [
+    "Portfolio",
+    "Trade",
+    "TradeType",
+    "TradeLog",
+    "TradeJournal",
+    "SymbolAlignment",
+    "PriceBook",
+    "Backtester",
+    "BacktestResult",
+    "RunningCovariance",
+    "EWMACovariance",
+    "LedoitWolfCovariance",
+    "FactorRiskModel",
+    "SolverConfig",
+    "OptimizationStats",
+    "register_hook",
+    "unregister_hook",
+    "ResultCache",
+    "OptimizationExecutor",
+    "OptimizationClient",
+    "ProblemCache",
+    "set_problem_cache",
+]
@@ -0,0 +1,377 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from threading import Lock
+from typing import NamedTuple
+import numpy as np
+from .portfolio_exceptions import ValidationError, OptimizationError
+
+# Number of optimizations a default executor runs at once
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Number of optimizations queued or running before submissions are rejected
+DEFAULT_MAX_PENDING = 64
+
+# Kinds of worker pools accepted by OptimizationExecutor
+EXECUTOR_KINDS = ("thread", "process")
+
+_default_executor = None
+_default_executor_lock = Lock()
+
+
+class PortfolioSnapshot(NamedTuple):
+    """
+    Copy of the symbols and weights of a Portfolio, taken when an optimization
+    is submitted so that trades executed during the solve do not affect it.
+    It can be passed wherever the optimizers expect a portfolio.
+    """
+
+    symbols: tuple
+    weights_vector: np.ndarray
+
+
+def snapshot_portfolio(portfolio) -> PortfolioSnapshot:
+    """PortfolioSnapshot of the current symbols and weights of a portfolio"""
+    return PortfolioSnapshot(
+        tuple(portfolio.symbols), np.array(portfolio.weights_vector, dtype=float)
+    )
+
+
+def _copy_input(value):
+    """Copy a numpy input or list of them, so that callers may modify theirs during the solve"""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copy_input(v) for v in value]
+    return value
+
+
+def _copy_inputs(values):
+    return tuple(_copy_input(v) for v in values)
+
+
+def _init_worker_thread():
+    """Give a worker thread its own optimizer caches; also imports cvxpy off the event loop"""
+    from . import single_period_optimization, multi_period_optimization
+
+    single_period_optimization.use_thread_optimizer_cache()
+    multi_period_optimization.use_thread_optimizer_cache()
+
+
+class OptimizationExecutor:
+    """
+    Pool of worker threads or processes running optimizations for asyncio code.
+
+    Optimizations are submitted with run, which returns once the worker is done
+    without blocking the event loop. At most max_pending optimizations may be
+    queued or running; further submissions raise OptimizationError instead of
+    piling up behind a slow solve, so a service can shed load.
+
+    Worker threads each keep their own compiled problems, so optimizations of
+    different portfolios overlap even when they have the same number of assets.
+    Threads still share the GIL, so CPU-bound solves only run in parallel with
+    kind="process"; the cost functions, risk models and solver settings must
+    then be picklable, and a ResultCache is not shared between processes.
+
+    Example:
+        >>> executor = OptimizationExecutor(max_workers=4, max_pending=32)
+        >>> z = await executor.run(single_period_optimization, r_t, w_t, 1.0,
+        ...                        phi_trade, phi_hold, timeout=5.0)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        kind: str = "thread",
+    ):
+        """
+        Create an executor; workers are started on the first submission.
+
+        Args:
+            max_workers: Number of optimizations run at once
+            max_pending: Number of optimizations queued or running at once,
+                at least max_workers
+            kind: "thread" or "process"
+
+        Raises:
+            ValidationError: If a setting is invalid
+        """
+        if not isinstance(max_workers, (int, np.integer)) or max_workers <= 0:
+            raise ValidationError(
+                "Invalid number of workers",
+                details=f"max_workers must be a positive integer, got {max_workers}",
+            )
+        if not isinstance(max_pending, (int, np.integer)) or max_pending < max_workers:
+            raise ValidationError(
+                "Invalid queue size",
+                details=f"max_pending must be an integer of at least {max_workers}, "
+                f"got {max_pending}",
+            )
+        if kind not in EXECUTOR_KINDS:
+            raise ValidationError(
+                "Invalid executor kind",
+                details=f"kind must be one of {EXECUTOR_KINDS}, got {kind!r}",
+            )
+
+        self.max_workers = int(max_workers)
+        self.max_pending = int(max_pending)
+        self.kind = kind
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                self.max_workers,
+                thread_name_prefix="ConvexTrader",
+                initializer=_init_worker_thread,
+            )
+        else:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        self._pending = 0
+        self._closed = False
+        self._lock = Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of optimizations queued or running"""
+        return self._pending
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func, *args, timeout: float = None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker and return its result.
+
+        Cancelling the awaiting task withdraws the call if it is still queued;
+        a call that already started runs to completion in the background and
+        its result is discarded, since solvers cannot be interrupted.
+
+        Args:
+            func: Callable to run; module-level for kind="process"
+            *args: Positional arguments of func
+            timeout: Optional number of seconds to wait for the result; the
+                call is then cancelled as described above
+            **kwargs: Keyword arguments of func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            OptimizationError: If the executor is full or shut down, or the
+                timeout expires
+        """
+        with self._lock:
+            if self._closed:
+                raise OptimizationError("Optimization executor is shut down")
+            if self._pending >= self.max_pending:
+                raise OptimizationError(
+                    "Optimization queue is full",
+                    details=f"{self._pending} optimizations are queued or running",
+                )
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        # The slot is freed when the worker is done, not when the caller gives up
+        future.add_done_callback(self._release)
+
+        result = asyncio.wrap_future(future)
+        if timeout is None:
+            return await result
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError:
+            raise OptimizationError(
+                "Optimization timed out", details=f"No result after {timeout}s"
+            ) from None
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = True):
+        """
+        Stop accepting optimizations and release the workers.
+
+        Args:
+            wait: Whether to wait for running optimizations to finish
+            cancel_futures: Whether to cancel optimizations that have not started
+        """
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def __repr__(self):
+        return (
+            f"OptimizationExecutor(max_workers={self.max_workers}, "
+            f"max_pending={self.max_pending}, kind={self.kind!r})"
+        )
+
+
+def get_default_executor() -> OptimizationExecutor:
+    """Shared thread executor used when no executor is given, created on first use"""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None or _default_executor._closed:
+            _default_executor = OptimizationExecutor()
+        return _default_executor
+
+
+def _single_period_job(r_t, w_t, gamma, phi_trade, phi_hold, kwargs):
+    """Worker side of single_period_optimization_async"""
+    from .single_period_optimization import (
+        single_period_optimization,
+        default_phi_trade,
+        default_phi_hold,
+    )
+
+    return single_period_optimization(
+        r_t,
+        w_t,
+        gamma,
+        default_phi_trade if phi_trade is None else phi_trade,
+        default_phi_hold if phi_hold is None else phi_hold,
+        **kwargs,
+    )
+
+
+def _multi_period_job(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold, kwargs):
+    """Worker side of multi_period_optimization_async"""
+    from .multi_period_optimization import multi_period_optimization
+
+    return multi_period_optimization(
+        H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold, **kwargs
+    )
+
+
+async def single_period_optimization_async(
+    r_t,
+    w_t,
+    gamma,
+    phi_trade=None,
+    phi_hold=None,
+    engine="auto",
+    sigma=None,
+    sparse=False,
+    solver=None,
+    return_solver=False,
+    return_stats=False,
+    cache=None,
+    executor=None,
+    timeout=None,
+):
+    """
+    Run single_period_optimization on an OptimizationExecutor.
+
+    The input arrays are copied before the coroutine first suspends, so the
+    caller may modify them while the solve runs.
+
+    Args:
+        r_t, w_t, gamma, engine, sigma, sparse, solver, return_solver,
+            return_stats, cache: As for single_period_optimization
+        phi_trade: Trading cost function, or None for default_phi_trade
+        phi_hold: Holding cost function, or None for default_phi_hold
+        executor: OptimizationExecutor to run on, or None for the default one
+        timeout: Optional number of seconds to wait for the result
+
+    Returns:
+        The result of single_period_optimization
+
+    Raises:
+        ValidationError: If input parameters are invalid
+        OptimizationError: If optimization fails, the executor is full or the
+            timeout expires
+    """
+    r_t, w_t = _copy_inputs((r_t, w_t))
+    kwargs = dict(
+        engine=engine,
+        sigma=sigma,
+        sparse=sparse,
+        solver=solver,
+        return_solver=return_solver,
+        return_stats=return_stats,
+        cache=cache,
+    )
+    executor = executor or get_default_executor()
+    return await executor.run(
+        _single_period_job,
+        r_t,
+        w_t,
+        gamma,
+        phi_trade,
+        phi_hold,
+        kwargs,
+        timeout=timeout,
+    )
+
+
+async def multi_period_optimization_async(
+    H,
+    r_t,
+    portfolio,
+    gamma_t,
+    psi_t,
+    phi_trade,
+    phi_hold,
+    sigma=None,
+    sparse=False,
+    solver=None,
+    return_solver=False,
+    return_stats=False,
+    cache=None,
+    executor=None,
+    timeout=None,
+):
+    """
+    Run multi_period_optimization on an OptimizationExecutor.
+
+    The weights of portfolio are snapshotted and the input arrays copied before
+    the coroutine first suspends, so trades executed while the solve runs do
+    not affect it.
+
+    Args:
+        H, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma, sparse, solver,
+            return_solver, return_stats, cache: As for multi_period_optimization
+        portfolio: Portfolio or PortfolioSnapshot
+        executor: OptimizationExecutor to run on, or None for the default one
+        timeout: Optional number of seconds to wait for the result
+
+    Returns:
+        The result of multi_period_optimization
+
+    Raises:
+        ValidationError: If input parameters are invalid
+        OptimizationError: If optimization fails, the executor is full or the
+            timeout expires
+    """
+    if not isinstance(portfolio, PortfolioSnapshot):
+        portfolio = snapshot_portfolio(portfolio)
+    r_t, gamma_t, psi_t, phi_trade, phi_hold = _copy_inputs(
+        (r_t, gamma_t, psi_t, phi_trade, phi_hold)
+    )
+    kwargs = dict(
+        sigma=sigma,
+        sparse=sparse,
+        solver=solver,
+        return_solver=return_solver,
+        return_stats=return_stats,
+        cache=cache,
+    )
+    executor = executor or get_default_executor()
+    return await executor.run(
+        _multi_period_job,
+        H,
+        r_t,
+        portfolio,
+        gamma_t,
+        psi_t,
+        phi_trade,
+        phi_hold,
+        kwargs,
+        timeout=timeout,
+    )
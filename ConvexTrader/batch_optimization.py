@@ -0,0 +1,542 @@
+import os
+import pickle
+import numpy as np
+import cvxpy as cp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import List, NamedTuple, Optional
+from .single_period_optimization import (
+    default_phi_trade,
+    default_phi_hold,
+    get_single_period_optimizer,
+    trade_cap,
+    validate_cost_functions,
+    validate_engine,
+    validate_inputs,
+)
+from .native_solver import solve_default_batch, zero_return_rows
+from .portfolio_exceptions import ValidationError, OptimizationError
+
+# Status reported for rows whose inputs fail validation
+INVALID = "invalid"
+# Status reported for rows where the solver raised an error
+SOLVER_ERROR = "solver_error"
+
+BACKENDS = ("auto", "serial", "process", "stacked", "native")
+
+# Maximum number of compiled block-stacked problems kept in memory
+STACKED_CACHE_SIZE = 8
+
+_stacked_cache = OrderedDict()
+_stacked_cache_lock = Lock()
+
+
+class BatchResult(NamedTuple):
+    """
+    Result of a batch of single-period optimizations.
+
+    Attributes:
+        trades: Array of shape (m, n) with one trade vector per row. Rows that
+            failed are filled with NaN.
+        status: Solver status of each row, e.g. "optimal", "invalid" or
+            "solver_error".
+        errors: Error message of each failed row, None for successful rows.
+    """
+
+    trades: np.ndarray
+    status: List[str]
+    errors: List[Optional[str]]
+
+
+class EfficientFrontier(NamedTuple):
+    """
+    Points on the risk/return frontier traced over a grid of gamma values.
+
+    Attributes:
+        gammas: Risk aversion parameters, in the order they were solved.
+        trades: Array of shape (k, n) with the optimal trade for each gamma.
+        expected_returns: Expected return r_t @ (w_t + z) of each post-trade
+            portfolio.
+        risks: Risk (w_t + z) @ (w_t + z) / n of each post-trade portfolio, the
+            quantity penalized by gamma in the single-period objective.
+        status: Solver status of each point.
+    """
+
+    gammas: np.ndarray
+    trades: np.ndarray
+    expected_returns: np.ndarray
+    risks: np.ndarray
+    status: List[str]
+
+
+def validate_batch_inputs(R, W, gammas):
+    """Validate the shapes of batch inputs and broadcast gammas to one per row"""
+    if not isinstance(R, np.ndarray) or R.ndim != 2:
+        raise ValidationError(
+            "Expected returns must be a 2-D numpy array",
+            details=f"Got {type(R).__name__} with shape {np.shape(R)}",
+        )
+
+    if not isinstance(W, np.ndarray) or W.shape != R.shape:
+        raise ValidationError(
+            "Dimension mismatch between returns and weights",
+            details=f"Returns: {R.shape}, Weights: {np.shape(W)}",
+        )
+
+    gammas = np.asarray(gammas, dtype=float)
+    if gammas.ndim == 0:
+        gammas = np.full(R.shape[0], float(gammas))
+    if gammas.shape != (R.shape[0],):
+        raise ValidationError(
+            "Invalid risk aversion parameters",
+            details=f"Expected a scalar or length {R.shape[0]}, got {gammas.shape}",
+        )
+    return gammas
+
+
+def _invalid_rows(R, W, gammas):
+    """Return a boolean mask of rows that cannot be solved and their messages"""
+    finite = np.all(np.isfinite(R), axis=1) & np.all(np.isfinite(W), axis=1)
+    valid_gamma = gammas >= 0
+    invalid = ~(finite & valid_gamma)
+
+    errors = [None] * len(R)
+    for i in np.flatnonzero(invalid):
+        if not finite[i]:
+            errors[i] = "Invalid returns - Details: Contains infinite or NaN values"
+        else:
+            errors[i] = (
+                "Risk aversion parameter must be non-negative - "
+                f"Details: Got gamma={gammas[i]}"
+            )
+    return invalid, errors
+
+
+def _solve_rows(R, W, gammas, phi_trade, phi_hold):
+    """
+    Solve rows one at a time with a cached SinglePeriodOptimizer.
+
+    This is also the process-pool worker: each worker process keeps its own
+    optimizer cache, so compiled problems are reused across the chunks it solves.
+    """
+    m, n = R.shape
+    trades = np.full((m, n), np.nan)
+    status = [INVALID] * m
+    errors = [None] * m
+
+    invalid, row_errors = _invalid_rows(R, W, gammas)
+    if np.all(invalid):
+        return trades, status, row_errors
+
+    # Cost function errors concern the whole batch and are raised
+    optimizer = get_single_period_optimizer(n, phi_trade, phi_hold)
+
+    for i in range(m):
+        if invalid[i]:
+            errors[i] = row_errors[i]
+            continue
+        try:
+            trades[i] = optimizer._solve(R[i], W[i], gammas[i])
+            status[i] = optimizer.problem.status
+        except OptimizationError as e:
+            status[i] = (
+                SOLVER_ERROR
+                if e.message == "Solver failed"
+                else optimizer.problem.status
+            )
+            errors[i] = str(e)
+
+    return trades, status, errors
+
+
+def _solve_process(R, W, gammas, phi_trade, phi_hold, max_workers, executor):
+    """
+    Split rows into contiguous chunks and solve them in worker processes.
+
+    There is one chunk per worker, max_workers or else os.cpu_count(), the
+    default size of a ProcessPoolExecutor.
+
+    Errors raised in a worker, such as OptimizationError for invalid cost
+    functions, propagate unchanged.
+
+    Raises:
+        OptimizationError: If the cost functions cannot be sent to the workers,
+            e.g. lambdas, or a worker process dies
+    """
+    # Checked before submitting so that pickling errors are never confused
+    # with errors raised by the workers
+    try:
+        pickle.dumps((phi_trade, phi_hold))
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise OptimizationError(
+            "Cannot send inputs to worker processes",
+            details=f"Cost functions must be picklable module-level functions: {e}",
+        )
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    try:
+        n_chunks = min(len(R), max_workers or os.cpu_count() or 1)
+        chunks = np.array_split(np.arange(len(R)), max(n_chunks, 1))
+        futures = [
+            executor.submit(
+                _solve_rows, R[idx], W[idx], gammas[idx], phi_trade, phi_hold
+            )
+            for idx in chunks
+        ]
+
+        trades = np.full(R.shape, np.nan)
+        status, errors = [], []
+        for idx, future in zip(chunks, futures):
+            chunk_trades, chunk_status, chunk_errors = future.result()
+            trades[idx] = chunk_trades
+            status.extend(chunk_status)
+            errors.extend(chunk_errors)
+        return trades, status, errors
+    except BrokenProcessPool as e:
+        raise OptimizationError("Worker process failed", details=str(e))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+class StackedSinglePeriodOptimizer:
+    """
+    Block-stacked single-period problem for many small portfolios.
+
+    All m independent problems are combined into one CVXPY problem whose
+    variables are (m, n) matrices, so a single solver call handles the whole
+    batch. The returns, weights and risk aversion of every row are parameters,
+    and the problem is compiled once per (m, n) and pair of cost functions.
+    Building it calls the cost functions once per row, so this backend suits
+    small n.
+    """
+
+    def __init__(self, m, n, phi_trade, phi_hold):
+        """
+        Build the parameterized problem.
+
+        Args:
+            m: Number of rows (portfolios) in the batch
+            n: Number of assets
+            phi_trade: Trading cost function
+            phi_hold: Holding cost function
+
+        Raises:
+            OptimizationError: If the cost functions are invalid
+        """
+        self.m = m
+        self.n = n
+
+        self.R = cp.Parameter((m, n), name="R")
+        self.W = cp.Parameter((m, n), name="W")
+        self.gammas = cp.Parameter(m, nonneg=True, name="gammas")
+        self.trade_caps = cp.Parameter(m, nonneg=True, name="trade_caps")
+
+        self.Z = cp.Variable((m, n), name="Z")
+        self.W_next = cp.Variable((m, n), name="W_next")
+        expected_return = cp.Variable(name="expected_return")
+
+        try:
+            trade_cost = 0.01 * cp.sum(
+                cp.hstack([phi_trade(self.Z[i]) for i in range(m)])
+            )
+            hold_cost = 0.01 * cp.sum(
+                cp.hstack([phi_hold(self.W_next[i]) for i in range(m)])
+            )
+            validate_cost_functions(trade_cost, hold_cost)
+        except Exception as e:
+            raise OptimizationError("Invalid cost functions", details=str(e))
+
+        risk = self.gammas @ cp.sum(cp.square(self.W_next), axis=1) / n
+
+        objective = cp.Maximize(expected_return - risk - trade_cost - hold_cost)
+        constraints = [
+            expected_return <= cp.vec(self.R, order="C") @ cp.vec(self.Z, order="C"),
+            self.W_next == self.W + self.Z,
+            cp.sum(self.W_next, axis=1) == 1,
+            self.W_next >= 0,
+            cp.sum(cp.abs(self.Z), axis=1) <= self.trade_caps,
+        ]
+
+        self.problem = cp.Problem(objective, constraints)
+
+        if not self.problem.is_dcp():
+            raise OptimizationError("Problem does not satisfy DCP rules")
+
+        self._lock = Lock()
+
+    def solve(self, R, W, gammas):
+        """
+        Solve all rows in one solver call.
+
+        Args:
+            R: Expected returns of shape (m, n)
+            W: Current weights of shape (m, n)
+            gammas: Risk aversion parameter of each row
+
+        Returns:
+            numpy.ndarray: Optimal trade vectors of shape (m, n)
+
+        Raises:
+            OptimizationError: If the stacked problem fails to solve
+        """
+        with self._lock:
+            self.R.value = R
+            self.W.value = W
+            self.gammas.value = gammas
+            self.trade_caps.value = np.array(
+                [trade_cap(r, w) for r, w in zip(R, W)], dtype=float
+            )
+
+            try:
+                self.problem.solve(warm_start=True)
+            except cp.error.SolverError as e:
+                raise OptimizationError("Solver failed", details=str(e))
+
+            if self.problem.status != cp.OPTIMAL:
+                raise OptimizationError(
+                    "Optimization failed",
+                    details=f"Solver status: {self.problem.status}",
+                )
+            return self.Z.value.copy()
+
+
+def get_stacked_optimizer(m, n, phi_trade, phi_hold):
+    """Return a cached StackedSinglePeriodOptimizer for the given shape"""
+    key = (m, n, phi_trade, phi_hold)
+    with _stacked_cache_lock:
+        optimizer = _stacked_cache.get(key)
+        if optimizer is not None:
+            _stacked_cache.move_to_end(key)
+            return optimizer
+
+    optimizer = StackedSinglePeriodOptimizer(m, n, phi_trade, phi_hold)
+
+    with _stacked_cache_lock:
+        optimizer = _stacked_cache.setdefault(key, optimizer)
+        _stacked_cache.move_to_end(key)
+        while len(_stacked_cache) > STACKED_CACHE_SIZE:
+            _stacked_cache.popitem(last=False)
+    return optimizer
+
+
+def _solve_stacked(R, W, gammas, phi_trade, phi_hold):
+    """
+    Solve all valid rows as one block-stacked problem.
+
+    Invalid rows are replaced by a trivial placeholder problem and reported
+    individually. If the stacked solve fails, the valid rows are re-solved one at
+    a time so that each row still gets its own status.
+    """
+    invalid, errors = _invalid_rows(R, W, gammas)
+    m, n = R.shape
+
+    R_solve = np.where(invalid[:, None], 0.0, R)
+    W_solve = np.where(invalid[:, None], 1.0 / n, W)
+    gammas_solve = np.where(invalid, 0.0, gammas)
+
+    optimizer = get_stacked_optimizer(m, n, phi_trade, phi_hold)
+    try:
+        solved = optimizer.solve(R_solve, W_solve, gammas_solve)
+    except OptimizationError:
+        return _solve_rows(R, W, gammas, phi_trade, phi_hold)
+
+    trades = np.where(invalid[:, None], np.nan, solved)
+    status = [INVALID if bad else cp.OPTIMAL for bad in invalid]
+    return trades, status, errors
+
+
+def _solve_native(R, W, gammas, phi_trade, phi_hold):
+    """
+    Solve all valid rows at once with the native solver.
+
+    Rows whose expected returns are all zero are solved with CVXPY, like
+    single_period_optimization does.
+    """
+    invalid, errors = _invalid_rows(R, W, gammas)
+    trades = np.full(R.shape, np.nan)
+    status = [INVALID] * len(R)
+
+    fallback = ~invalid & zero_return_rows(R)
+    native = np.flatnonzero(~invalid & ~fallback)
+    if len(native):
+        trades[native] = solve_default_batch(R[native], W[native], gammas[native])
+        for i in native:
+            status[i] = cp.OPTIMAL
+
+    fallback = np.flatnonzero(fallback)
+    if len(fallback):
+        fallback_trades, fallback_status, fallback_errors = _solve_rows(
+            R[fallback], W[fallback], gammas[fallback], phi_trade, phi_hold
+        )
+        trades[fallback] = fallback_trades
+        for k, i in enumerate(fallback):
+            status[i] = fallback_status[k]
+            errors[i] = fallback_errors[k]
+
+    return trades, status, errors
+
+
+def single_period_optimization_batch(
+    R,
+    W,
+    gammas,
+    phi_trade=default_phi_trade,
+    phi_hold=default_phi_hold,
+    backend="auto",
+    max_workers=None,
+    executor=None,
+):
+    """
+    Solve many independent single-period portfolio optimization problems.
+
+    Each row of R and W defines one problem, solved exactly as
+    single_period_optimization would. A row that is invalid or fails to solve
+    gets a NaN trade vector and its own status instead of raising an exception
+    for the whole batch.
+
+    Args:
+        R: Expected returns, array of shape (m, n)
+        W: Current portfolio weights, array of shape (m, n)
+        gammas: Risk aversion parameter, a scalar or one per row
+        phi_trade: Trading cost function
+        phi_hold: Holding cost function
+        backend: "serial" solves rows one after the other with a cached problem,
+            "process" splits rows across worker processes that each reuse their
+            compiled problems, "stacked" solves all rows as one block-stacked
+            problem, which is fastest for small n, and "native" solves all rows
+            at once with the native NumPy solver, which requires the default
+            cost functions. "auto" uses "native" for the default cost functions
+            and "serial" otherwise
+        max_workers: Number of worker processes for the "process" backend, and
+            the number of chunks the rows are split into; defaults to
+            os.cpu_count()
+        executor: Optional ProcessPoolExecutor reused across calls by the
+            "process" backend, which keeps compiled problems warm in its workers;
+            pass its number of workers as max_workers to use them all
+
+    Returns:
+        BatchResult: Trade vectors, per-row status and per-row error messages
+
+    Raises:
+        ValidationError: If the batch inputs have invalid shapes or backend
+        OptimizationError: If the "process" backend cannot run its workers
+    """
+    if backend not in BACKENDS:
+        raise ValidationError(
+            "Invalid batch backend",
+            details=f"Expected one of {BACKENDS}, got {backend}",
+        )
+
+    if backend == "native":
+        validate_engine("native", phi_trade, phi_hold)
+    elif backend == "auto":
+        auto_engine = validate_engine("auto", phi_trade, phi_hold)
+        backend = "native" if auto_engine == "native" else "serial"
+
+    gammas = validate_batch_inputs(R, W, gammas)
+    R = np.asarray(R, dtype=float)
+    W = np.asarray(W, dtype=float)
+
+    if len(R) == 0:
+        return BatchResult(np.empty(R.shape), [], [])
+
+    if backend == "native":
+        result = _solve_native(R, W, gammas, phi_trade, phi_hold)
+    elif backend == "process":
+        result = _solve_process(
+            R, W, gammas, phi_trade, phi_hold, max_workers, executor
+        )
+    elif backend == "stacked":
+        result = _solve_stacked(R, W, gammas, phi_trade, phi_hold)
+    else:
+        result = _solve_rows(R, W, gammas, phi_trade, phi_hold)
+
+    return BatchResult(*result)
+
+
+def efficient_frontier(
+    r_t,
+    w_t,
+    gammas,
+    phi_trade=default_phi_trade,
+    phi_hold=default_phi_hold,
+    max_workers=None,
+    executor=None,
+    engine="auto",
+):
+    """
+    Trace the single-period risk/return frontier over a grid of gamma values.
+
+    With the default cost functions and engine="auto" the whole grid is solved
+    at once by the native solver, which runs in this process. Otherwise, or with
+    engine="cvxpy", the grid is walked in the given order on one compiled
+    problem, so each solve is warm-started from the solution for the previous
+    gamma. With max_workers or executor set, the grid is then split into
+    contiguous chunks that worker processes walk in order, each with its own
+    warm-started problem; worker processes require the CVXPY engine.
+
+    Args:
+        r_t: Expected returns vector
+        w_t: Current portfolio weights
+        gammas: Grid of risk aversion parameters
+        phi_trade: Trading cost function
+        phi_hold: Holding cost function
+        max_workers: Number of worker processes; None solves in this process
+        executor: Optional ProcessPoolExecutor reused across calls; the grid is
+            split into max_workers chunks, or os.cpu_count() if it is None
+        engine: "auto", "cvxpy" or "native"
+
+    Returns:
+        EfficientFrontier: Trades, expected returns, risks and status per gamma
+
+    Raises:
+        ValidationError: If input parameters are invalid, or worker processes
+            are requested for the native engine
+        OptimizationError: If the returns contain infinite or NaN values
+    """
+    gammas = np.asarray(gammas, dtype=float)
+    if gammas.ndim != 1 or len(gammas) == 0:
+        raise ValidationError(
+            "Invalid gamma grid",
+            details=f"Expected a non-empty 1-D array, got shape {gammas.shape}",
+        )
+    validate_inputs(r_t, w_t, np.min(gammas))
+
+    r_t = np.asarray(r_t, dtype=float)
+    w_t = np.asarray(w_t, dtype=float)
+    if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
+        raise OptimizationError(
+            "Invalid returns", details="Contains infinite or NaN values"
+        )
+
+    R = np.broadcast_to(r_t, (len(gammas), len(r_t)))
+    W = np.broadcast_to(w_t, (len(gammas), len(w_t)))
+
+    engine = validate_engine(engine, phi_trade, phi_hold)
+    if engine == "native" and (max_workers is not None or executor is not None):
+        raise ValidationError(
+            "Invalid engine",
+            details='Worker processes require engine="cvxpy"; the native engine '
+            "solves the whole grid in this process",
+        )
+
+    if engine == "native":
+        trades, status, _ = _solve_native(R, W, gammas, phi_trade, phi_hold)
+    elif max_workers is None and executor is None:
+        trades, status, _ = _solve_rows(R, W, gammas, phi_trade, phi_hold)
+    else:
+        trades, status, _ = _solve_process(
+            R, W, gammas, phi_trade, phi_hold, max_workers, executor
+        )
+
+    w_next = w_t + trades
+    expected_returns = w_next @ r_t
+    risks = np.sum(w_next**2, axis=1) / len(w_t)
+
+    return EfficientFrontier(gammas, trades, expected_returns, risks, status)
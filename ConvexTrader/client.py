@@ -0,0 +1,252 @@
+import http.client
+import json
+from threading import local
+from urllib.parse import urlsplit
+import numpy as np
+from .portfolio_exceptions import ValidationError, OptimizationError
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+# Seconds to wait for a response, including the time spent queued on the server
+DEFAULT_TIMEOUT = 60.0
+
+# Errors raised again on the client for each error type returned by the server
+ERRORS = {"ValidationError": ValidationError, "OptimizationError": OptimizationError}
+
+
+def _weights(portfolio):
+    """Weights of a Portfolio, PortfolioSnapshot or weight vector"""
+    return np.asarray(getattr(portfolio, "weights_vector", portfolio), dtype=float)
+
+
+def _to_list(values):
+    """
+    JSON form of an array, a scipy.sparse matrix or None.
+
+    Sparse matrices are sent as their COO triplets rather than densified, so
+    a sparse (n, n) covariance costs O(nnz) on the wire.
+    """
+    if values is None:
+        return None
+    if hasattr(values, "tocoo"):
+        coo = values.tocoo()
+        return {
+            "format": "coo",
+            "shape": list(coo.shape),
+            "row": coo.row.tolist(),
+            "col": coo.col.tolist(),
+            "data": np.asarray(coo.data, dtype=float).tolist(),
+        }
+    return np.asarray(values, dtype=float).tolist()
+
+
+def encode_sigma(sigma):
+    """JSON form of a covariance matrix or FactorRiskModel"""
+    if hasattr(sigma, "loadings"):
+        return {
+            "loadings": _to_list(sigma.loadings),
+            "factor_covariance": _to_list(sigma.factor_covariance),
+            "idiosyncratic": _to_list(sigma.idiosyncratic),
+        }
+    if hasattr(sigma, "covariance"):
+        sigma = sigma.covariance()
+    return _to_list(sigma)
+
+
+def encode_solver(solver):
+    """JSON form of a solver name or SolverConfig"""
+    if solver is None or isinstance(solver, str):
+        return solver
+    settings = {
+        "solver": solver.solvers[0],
+        "fallbacks": list(solver.solvers[1:]),
+        "tolerance": solver.tolerance,
+        "max_iters": solver.max_iters,
+        "time_limit": solver.time_limit,
+        "warm_start": solver.warm_start,
+        "options": solver.options or None,
+    }
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+class OptimizationClient:
+    """
+    Client of an optimization server, see ConvexTrader.server.
+
+    The optimize methods mirror those of Portfolio, taking the portfolio, a
+    PortfolioSnapshot or a weight vector as first argument, and only need numpy,
+    so client processes never import cvxpy or compile problems. Each thread
+    keeps its own keep-alive connection.
+
+    The server solves concurrent single-period requests with the default cost
+    functions and risk, i.e. without sigma and with engine "auto" or "native",
+    together in one native batch. CVXPY and multi-period requests are solved
+    one after the other on the server's compiled problems.
+
+    Example:
+        >>> client = OptimizationClient("http://127.0.0.1:8765")
+        >>> z = client.single_period_optimize(portfolio, expected_returns, gamma=1.0)
+        >>> client.last_solver
+        'NATIVE'
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Args:
+            url: Base URL of the server
+            timeout: Seconds to wait for each response
+        """
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValidationError(
+                "Invalid server URL", details=f"Expected http://host:port, got {url}"
+            )
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        # Name of the solver of the last optimization
+        self.last_solver = None
+        self._local = local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+            self._local.connection = connection
+        return connection
+
+    def _request(self, method, path, body=None) -> dict:
+        """Send a request, reconnecting once if the server closed the connection"""
+        data = None if body is None else json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, data, headers)
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            error = ERRORS.get(payload.get("error"), OptimizationError)
+            raise error(payload.get("message"), details=payload.get("details"))
+        return payload
+
+    def health(self) -> dict:
+        """Status and request and batch counters of the server"""
+        return self._request("GET", "/health")
+
+    def single_period_optimize(
+        self,
+        portfolio,
+        expected_returns: np.ndarray,
+        gamma: float,
+        engine: str = "auto",
+        sigma=None,
+        solver=None,
+    ) -> np.ndarray:
+        """
+        Solve a single-period problem on the server, like Portfolio.single_period_optimize.
+
+        Args:
+            portfolio: Portfolio, PortfolioSnapshot or current weight vector.
+            expected_returns: Numpy array of expected returns for each stock in the portfolio.
+            gamma: Risk-aversion parameter.
+            engine: "auto", "native" or "cvxpy".
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel
+                or FactorRiskModel.
+            solver: Solver name or SolverConfig for the CVXPY engine; the solver used is
+                stored in last_solver.
+
+        Returns:
+            Numpy array: Optimal trade vector (z).
+
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization fails
+        """
+        payload = self._request(
+            "POST",
+            "/single_period",
+            {
+                "r_t": _to_list(expected_returns),
+                "w_t": _weights(portfolio).tolist(),
+                "gamma": gamma,
+                "engine": engine,
+                "sigma": None if sigma is None else encode_sigma(sigma),
+                "solver": encode_solver(solver),
+            },
+        )
+        self.last_solver = payload["solver"]
+        return np.asarray(payload["trades"], dtype=float)
+
+    def multi_period_optimize(
+        self,
+        portfolio,
+        H: int,
+        r_t: np.ndarray,
+        gamma_t: np.ndarray,
+        psi_t: np.ndarray,
+        phi_trade,
+        phi_hold,
+        sigma=None,
+        solver=None,
+    ) -> np.ndarray:
+        """
+        Solve a multi-period problem on the server, like Portfolio.multi_period_optimize.
+
+        Args:
+            portfolio: Portfolio, PortfolioSnapshot or current weight vector.
+            H: Number of future periods to optimize.
+            r_t: Matrix of expected returns, where each row corresponds to a future period.
+            gamma_t: Vector of risk-aversion parameters for each period.
+            psi_t: Vector of risk factors for each period.
+            phi_trade: Transaction cost of each period.
+            phi_hold: Holding cost of each period.
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel
+                or FactorRiskModel.
+            solver: Solver name or SolverConfig; the solver used is stored in
+                last_solver.
+
+        Returns:
+            Numpy array: Optimal trade vectors over all periods (z matrix).
+
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization fails
+        """
+        payload = self._request(
+            "POST",
+            "/multi_period",
+            {
+                "H": H,
+                "r_t": _to_list(r_t),
+                "w_0": _weights(portfolio).tolist(),
+                "gamma_t": _to_list(gamma_t),
+                "psi_t": _to_list(psi_t),
+                "phi_trade": _to_list(phi_trade),
+                "phi_hold": _to_list(phi_hold),
+                "sigma": None if sigma is None else encode_sigma(sigma),
+                "solver": encode_solver(solver),
+            },
+        )
+        self.last_solver = payload["solver"]
+        return np.asarray(payload["trades"], dtype=float)
+
+    def close(self):
+        """Close the connection of this thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,143 @@
+import warnings
+from threading import Lock
+from typing import Callable, NamedTuple, Optional
+
+# Phases timed by the optimizers, in the order they run
+PHASES = ("validation", "build", "compile", "solve")
+
+_hooks = ()
+_hooks_lock = Lock()
+
+
+class OptimizationStats(NamedTuple):
+    """
+    Timings and solver statistics of one optimization.
+
+    Attributes:
+        optimizer: "single_period" or "multi_period"
+        solver: Name of the solver that produced the result, NATIVE for the
+            native single-period solver
+        status: Problem status, e.g. "optimal"
+        value: Optimal objective value, or None
+        timings: Wall time in seconds of each phase: "validation" of the inputs,
+            "build" of the CVXPY expressions when the problem is (re)built,
+            "compile", CVXPY's compilation_time, and "solve", the rest of the
+            solver call including the solver interface, and their sum "total"
+        iterations: Solver iteration count, or None if the solver reports none
+        solver_stats: cvxpy SolverStats of the solve, or None for the native
+            solver
+        n_assets: Number of assets
+        periods: Number of planned trades per asset, 1 for single-period problems
+        num_variables: Number of scalar variables of the CVXPY problem
+        num_constraints: Number of scalar equality and inequality constraints
+    """
+
+    optimizer: str
+    solver: Optional[str]
+    status: Optional[str]
+    value: Optional[float]
+    timings: dict
+    iterations: Optional[int]
+    solver_stats: object
+    n_assets: int
+    periods: int
+    num_variables: Optional[int]
+    num_constraints: Optional[int]
+
+
+def make_timings(validation=0.0, build=0.0, compile=0.0, solve=0.0) -> dict:
+    """Timings dict of the phases and their total"""
+    timings = {
+        "validation": validation,
+        "build": build,
+        "compile": compile,
+        "solve": solve,
+    }
+    timings["total"] = validation + build + compile + solve
+    return timings
+
+
+def problem_stats(optimizer, problem, solver, timings, n_assets, periods):
+    """
+    OptimizationStats of the last solve of a CVXPY problem.
+
+    Args:
+        optimizer: Name of the optimizer
+        problem: Solved cvxpy.Problem
+        solver: Name of the solver used
+        timings: (validation, build, solve call) wall times in seconds; the
+            compilation time is taken out of the solve call
+        n_assets: Number of assets
+        periods: Number of planned trades per asset
+
+    Returns:
+        OptimizationStats
+    """
+    validation, build, call = timings
+    compile_time = problem.compilation_time or 0.0
+    solver_stats = problem.solver_stats
+    size = problem.size_metrics
+    return OptimizationStats(
+        optimizer,
+        solver,
+        problem.status,
+        problem.value,
+        make_timings(validation, build, compile_time, max(call - compile_time, 0.0)),
+        None if solver_stats is None else solver_stats.num_iters,
+        solver_stats,
+        n_assets,
+        periods,
+        size.num_scalar_variables,
+        size.num_scalar_eq_constr + size.num_scalar_leq_constr,
+    )
+
+
+def register_hook(hook: Callable) -> Callable:
+    """
+    Register a callable receiving the OptimizationStats of every optimization.
+
+    Hooks run synchronously in the thread that solved the problem, after the
+    solver returns, also when the solver stopped at a non-optimal status.
+    Exceptions raised by a hook are turned into warnings. Returns the hook, so
+    it can be used as a decorator.
+
+    Example:
+        >>> @register_hook
+        ... def record(stats):
+        ...     metrics.histogram("solve_seconds", stats.timings["total"])
+    """
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+    return hook
+
+
+def unregister_hook(hook: Callable):
+    """Remove a registered hook; unknown hooks are ignored"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def clear_hooks():
+    """Remove all registered hooks"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = ()
+
+
+def has_hooks() -> bool:
+    """Whether any hook is registered; stats are only assembled if so"""
+    return bool(_hooks)
+
+
+def emit(stats: OptimizationStats):
+    """Pass stats to every registered hook"""
+    for hook in _hooks:
+        try:
+            hook(stats)
+        except Exception as e:
+            warnings.warn(
+                f"Optimization hook {hook!r} failed: {e}", RuntimeWarning, stacklevel=2
+            )
@@ -1,7 +1,34 @@
+import time
 import numpy as np
 import cvxpy as cp
+import scipy.sparse as sp
+from collections import OrderedDict
+from threading import Lock, RLock, local
+from types import SimpleNamespace
+from .risk_models import risk_terms, residuals_equal
+from .sparse_utils import to_dense, to_dense_vector, sparse_trades
+from .solver_config import SolverConfig
+from .instrumentation import problem_stats, has_hooks, emit
+from .problem_cache import load_problem, save_problem
+from .result_cache import input_digest
 from .portfolio_exceptions import ValidationError, OptimizationError
 
+# Maximum number of compiled problems kept by get_multi_period_optimizer
+OPTIMIZER_CACHE_SIZE = 16
+
+_optimizer_cache = OrderedDict()
+
+# Compiled problems kept by each MultiPeriodOptimizer for the risk coefficients
+# it saw last, so sweeps that return to earlier coefficients skip compilation
+BUILD_CACHE_SIZE = 4
+_optimizer_cache_lock = Lock()
+
+# Optimizer attributes that are not part of a compiled problem
+_BUILD_STATE_EXCLUDED = frozenset(("_lock", "solver_used", "_timings", "_builds"))
+
+# Private optimizer caches of threads that called use_thread_optimizer_cache
+_thread_caches = local()
+
 
 def validate_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold):
     """Validate input parameters for multi-period optimization"""
@@ -52,7 +79,617 @@ def validate_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold):
         )
 
 
-def multi_period_optimization(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold):
+def check_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold):
+    """Validate input parameters and check the returns and risk factors for numerical issues"""
+    validate_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold)
+
+    if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
+        raise OptimizationError(
+            "Invalid returns matrix", details="Contains infinite or NaN values"
+        )
+
+    if np.any(np.isinf(psi_t)) or np.any(np.isnan(psi_t)):
+        raise OptimizationError(
+            "Invalid risk factors", details="Contains infinite or NaN values"
+        )
+
+
+def stack_period_inputs(values, H, n_assets, name):
+    """
+    Stack per-period inputs into a (H, n_assets) matrix.
+
+    Each period may be given as a scalar, applied to every asset, or as a vector
+    of length n_assets. A scipy.sparse (H, n_assets) matrix or a list of sparse
+    vectors, e.g. trading costs that are zero for most assets, is expanded into
+    the dense O(H * n_assets) parameter values.
+
+    Raises:
+        ValidationError: If the per-period values cannot be broadcast
+    """
+    try:
+        stacked = np.asarray(to_dense(values), dtype=float)
+        if stacked.ndim == 1:
+            stacked = stacked[:, None]
+        return np.broadcast_to(stacked, (H, n_assets))
+    except (ValueError, TypeError) as e:
+        raise ValidationError(f"Invalid {name}", details=str(e))
+
+
+class MultiPeriodOptimizer:
+    """
+    Compile-once, matrix-form multi-period portfolio optimization problem.
+
+    Holdings over the horizon are the initial weights plus the cumulative sum of
+    the trade matrix z, expressed as a first-difference constraint on the holdings
+    matrix. Per-period returns, holding costs and trade costs are stacked
+    (n_assets, H - 1) parameters that only enter through inner products, so the
+    expression graph has a fixed size regardless of the horizon and each call to
+    `solve` only updates parameter values.
+
+    The risk of period t is gamma_t * w_t @ (M @ M.T + diag(psi_t + d)) @ w_t
+    for an optional covariance sigma = M @ M.T + diag(d), e.g. a FactorRiskModel,
+    so the per-asset risk factors psi_t are the diagonal part of the same factor
+    structure. The diagonal coefficients gamma_t * (psi_t + d) are compiled into
+    the problem as constants: CVXPY's parameterized quadratic coefficients grow
+    quadratically with the number of parameters. The problem is rebuilt only
+    when those coefficients change between calls, and the last BUILD_CACHE_SIZE
+    compiled problems are kept so a sweep over gamma compiles each value once. A sparse residual R in place
+    of diag(d), or a scipy.sparse sigma, is compiled the same way as the sparse
+    block-diagonal quadratic form with blocks gamma_t * R.
+
+    The (n_assets, k) factor M is a parameter that only enters the linear
+    constraint defining the factor exposures M.T @ w, so the problem has
+    O(n_assets * k) nonzeros per period and a changing factor does not trigger a
+    rebuild.
+
+    Example:
+        >>> optimizer = MultiPeriodOptimizer(2, 3)
+        >>> z = optimizer.solve(w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold)
+    """
+
+    def __init__(self, n_assets, H):
+        """
+        Build the parameters of the problem for a given shape.
+
+        Args:
+            n_assets: Number of assets
+            H: Number of periods
+
+        Raises:
+            ValidationError: If the shape parameters are invalid
+        """
+        if not isinstance(H, (int, np.integer)) or H <= 1:
+            raise ValidationError(
+                "Invalid horizon parameter", details=f"H must be integer > 1, got {H}"
+            )
+        if not isinstance(n_assets, (int, np.integer)) or n_assets <= 0:
+            raise ValidationError(
+                "Invalid number of assets",
+                details=f"n_assets must be positive, got {n_assets}",
+            )
+
+        self.n_assets = int(n_assets)
+        self.H = int(H)
+        periods = self.H - 1
+
+        self.w_0 = cp.Parameter(self.n_assets, name="w_0")
+        self.returns = cp.Parameter((self.n_assets, periods), name="returns")
+        self.hold_cost = cp.Parameter((self.n_assets, periods), name="hold_cost")
+        self.trade_cost = cp.Parameter(
+            (self.n_assets, periods), nonneg=True, name="trade_cost"
+        )
+
+        self.z = cp.Variable((self.n_assets, periods), name="z")
+        # Holdings at the end of each period
+        self.w = cp.Variable((self.n_assets, periods), name="w")
+
+        self.loadings = None
+        self.problem = None
+        self._risk = None
+        self._factor_risk = None
+        self._quadratic = None
+        self._builds = OrderedDict()
+        self.solver_used = None
+        self._timings = None
+        self._lock = RLock()
+
+    def _build(self, risk, factor_risk=None, quadratic=None):
+        """
+        Compile the problem for the given (n_assets, H - 1) risk coefficients.
+
+        factor_risk holds the risk aversion of each period for the covariance term,
+        with shape (k, H - 1) for a covariance factor with k columns, or is None
+        without a covariance. quadratic is an optional sparse matrix of the risk
+        of the holdings stacked period by period.
+
+        One of the last BUILD_CACHE_SIZE problems compiled by this optimizer for
+        the same coefficients is reused as is. Otherwise, with a problem cache in
+        use, see set_problem_cache, a problem compiled earlier for the same shape
+        and coefficients is loaded instead, and a new problem is compiled and
+        stored.
+        """
+        digest = input_digest([risk, factor_risk, quadratic])
+        build = self._builds.get(digest)
+        if build is not None:
+            self._builds.move_to_end(digest)
+            self.__dict__.update(build)
+            return
+
+        key = ("multi_period", self.n_assets, self.H, digest)
+        if not load_problem(self, key):
+            self._compile(risk, factor_risk, quadratic)
+            save_problem(self, key)
+
+        self._builds[digest] = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in _BUILD_STATE_EXCLUDED
+        }
+        while len(self._builds) > BUILD_CACHE_SIZE:
+            self._builds.popitem(last=False)
+
+    def _compile(self, risk, factor_risk, quadratic):
+        """Compile the problem for the given coefficients, see _build"""
+
+        # Epigraph variable for the parameterized linear terms, which keeps the
+        # quadratic part of the objective parameter-free
+        value = cp.Variable(name="value")
+        linear = cp.vec(self.returns - self.hold_cost, order="F") @ cp.vec(
+            self.w, order="F"
+        ) - cp.vec(self.trade_cost, order="F") @ cp.vec(cp.abs(self.z), order="F")
+
+        total_risk = cp.sum_squares(cp.multiply(np.sqrt(risk), self.w))
+        budget = cp.sum(self.w, axis=0) == 1
+        constraints = [
+            value <= linear,
+            self.w[:, 0] == self.w_0 + self.z[:, 0],
+            self.w[:, 1:] - self.w[:, :-1] == self.z[:, 1:],
+            budget,
+        ]
+
+        self.loadings = None
+        if factor_risk is not None:
+            k = factor_risk.shape[0]
+            self.loadings = cp.Parameter((self.n_assets, k), name="loadings")
+            exposures = cp.Variable((k, self.H - 1), name="exposures")
+            constraints.append(exposures == self.loadings.T @ self.w)
+            total_risk = total_risk + cp.sum_squares(
+                cp.multiply(np.sqrt(factor_risk), exposures)
+            )
+
+        if quadratic is not None:
+            total_risk = total_risk + cp.quad_form(
+                cp.vec(self.w, order="F"), cp.psd_wrap(quadratic)
+            )
+
+        objective = cp.Maximize(value - total_risk)
+
+        problem = cp.Problem(objective, constraints)
+
+        if not problem.is_dcp():
+            raise OptimizationError("Problem does not satisfy DCP rules")
+
+        self.problem = problem
+        self._risk = risk
+        self._factor_risk = factor_risk
+        self._quadratic = quadratic
+        self._budget_id = budget.id
+
+    def solve(
+        self, w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma=None, solver=None
+    ):
+        """
+        Solve the problem for new parameter values.
+
+        As in multi_period_optimization, the first period of every input is the
+        current period and only periods 1..H-1 enter the objective.
+
+        Args:
+            w_0: Current portfolio weights
+            r_t: Returns matrix of shape (H, n_assets)
+            gamma_t: Risk aversion parameters
+            psi_t: Risk factors, a scalar or vector per period
+            phi_trade: Trading costs, a scalar or vector per period
+            phi_hold: Holding costs, a scalar or vector per period
+            sigma: Optional (n_assets, n_assets) covariance matrix, scipy.sparse
+                covariance, RiskModel or FactorRiskModel, whose risk
+                gamma_t * w @ sigma @ w is added in every period
+            solver: Solver name or SolverConfig, defaults to CVXPY's choice; the
+                name of the solver used is kept in `solver_used` and the timings
+                and solver statistics of the solve in `last_stats`
+
+        Returns:
+            numpy.ndarray: Optimal trade vectors of shape (n_assets, H - 1)
+
+        Raises:
+            ValidationError: If input shapes are invalid
+            OptimizationError: If optimization fails
+        """
+        return self._solve(w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma, solver)
+
+    def _solve(
+        self,
+        w_0,
+        r_t,
+        gamma_t,
+        psi_t,
+        phi_trade,
+        phi_hold,
+        sigma=None,
+        solver=None,
+        validation=0.0,
+    ):
+        """solve, adding validation, the time the caller spent validating, to last_stats"""
+        start = time.perf_counter()
+        H, n = self.H, self.n_assets
+        config = SolverConfig.coerce(solver)
+        w_0 = np.asarray(to_dense_vector(w_0), dtype=float)
+        if w_0.shape != (n,):
+            raise ValidationError(
+                "Invalid portfolio weights",
+                details=f"Expected shape ({n},), got {w_0.shape}",
+            )
+
+        returns = stack_period_inputs(r_t, H, n, "returns matrix")
+        gammas = np.asarray(gamma_t, dtype=float).reshape(H, 1)
+        risk = gammas * stack_period_inputs(psi_t, H, n, "risk factors")
+        trade_cost = stack_period_inputs(phi_trade, H, n, "trading costs")
+        hold_cost = stack_period_inputs(phi_hold, H, n, "holding costs")
+
+        if np.any(risk < 0) or np.any(trade_cost < 0):
+            raise OptimizationError(
+                "Problem does not satisfy DCP rules",
+                details="Risk and trading cost terms must be non-negative",
+            )
+
+        factor = factor_risk = quadratic = None
+        if sigma is not None:
+            factor, residual = risk_terms(sigma)
+            size = factor.shape[0] if factor is not None else residual.shape[0]
+            if size != n:
+                raise ValidationError(
+                    "Dimension mismatch between covariance and optimizer",
+                    details=f"Covariance: {size}, Optimizer: {n}",
+                )
+            if sp.issparse(residual):
+                quadratic = sp.kron(sp.diags(gammas[1:, 0]), residual, format="csc")
+            elif residual is not None:
+                risk = risk + gammas * residual
+            if factor is not None:
+                factor_risk = np.broadcast_to(gammas[1:].T, (factor.shape[1], H - 1))
+
+        risk = np.ascontiguousarray(risk[1:].T)
+        validation += time.perf_counter() - start
+
+        with self._lock:
+            start = time.perf_counter()
+            if (
+                self._risk is None
+                or not np.array_equal(risk, self._risk)
+                or (factor_risk is None) != (self._factor_risk is None)
+                or (
+                    factor_risk is not None
+                    and not np.array_equal(factor_risk, self._factor_risk)
+                )
+                or not residuals_equal(quadratic, self._quadratic)
+            ):
+                self._build(risk, factor_risk, quadratic)
+            build = time.perf_counter() - start
+
+            if factor is not None:
+                self.loadings.value = factor
+            self.w_0.value = w_0
+            self.returns.value = returns[1:].T
+            self.trade_cost.value = trade_cost[1:].T
+            self.hold_cost.value = hold_cost[1:].T
+
+            start = time.perf_counter()
+            try:
+                self.solver_used = config.solve(
+                    self.problem, (cp.OPTIMAL, cp.OPTIMAL_INACCURATE)
+                )
+            except cp.error.SolverError as e:
+                self.solver_used = self._timings = None
+                raise OptimizationError("Solver error", details=str(e))
+            self._timings = (validation, build, time.perf_counter() - start)
+
+            if has_hooks():
+                emit(self.last_stats)
+
+            if self.problem.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
+                raise OptimizationError(
+                    "Optimization failed",
+                    details=f"Solver status: {self.problem.status}",
+                )
+            return self.z.value.copy()
+
+    @property
+    def last_stats(self):
+        """OptimizationStats of the last solve, or None before the first one"""
+        with self._lock:
+            if self._timings is None:
+                return None
+            return problem_stats(
+                "multi_period",
+                self.problem,
+                self.solver_used,
+                self._timings,
+                self.n_assets,
+                self.H - 1,
+            )
+
+
+def shift_blocks(vector, blocks, periods):
+    """
+    Shift stacked per-period blocks of a vector one period forward.
+
+    Each block is given as (offset, shape, per_period). Blocks of shape
+    (k, periods), stored column-major, and 1-D blocks flagged as per_period
+    move every period one step earlier, and their last period keeps its value.
+    Other blocks are left unchanged.
+    """
+    shifted = vector.copy()
+    for offset, shape, per_period in blocks:
+        if len(shape) == 2 and shape[1] == periods:
+            k = shape[0]
+        elif len(shape) == 1 and per_period and shape[0] == periods:
+            k = 1
+        else:
+            continue
+        size = k * periods
+        shifted[offset : offset + size - k] = vector[offset + k : offset + size]
+    return shifted
+
+
+class RecedingHorizonOptimizer:
+    """
+    Model-predictive control driver for the multi-period problem.
+
+    Every call to `step` re-solves the horizon problem from the current weights
+    and returns only the first trade. The optimizer owns one compiled
+    MultiPeriodOptimizer, so the problem is compiled once, and after each solve
+    the previous solution is shifted forward by one period and used as the warm
+    start of the next step: the plan for periods 2..H-1 becomes the initial guess
+    for periods 1..H-2 and the last period is repeated.
+
+    The shifted plan is written to the public Variable.value of the trades and
+    holdings and every solve runs with warm_start=True, which solvers that start
+    from the variable values use as is. OSQP, the default solver for this
+    problem, warm starts from its previous primal and dual iterates instead, so
+    the shift is also applied to those iterates using the variable and
+    constraint layout of the compiled problem. That layout and the iterates are
+    private CVXPY attributes; when a CVXPY release does not have them, see
+    _osqp_warm_start, OSQP falls back to a plain warm start from its previous
+    iterates.
+
+    Example:
+        >>> mpc = RecedingHorizonOptimizer(n_assets, H)
+        >>> for r_t in forecasts:
+        ...     z = mpc.step(w, r_t, gamma_t, psi_t, phi_trade, phi_hold)
+        ...     w = w + z
+    """
+
+    def __init__(self, n_assets, H):
+        """
+        Build the horizon problem.
+
+        Args:
+            n_assets: Number of assets
+            H: Number of periods
+
+        Raises:
+            ValidationError: If the shape parameters are invalid
+        """
+        self.optimizer = MultiPeriodOptimizer(n_assets, H)
+        self.n_assets = self.optimizer.n_assets
+        self.H = self.optimizer.H
+        self.plan = None
+        self.solver_used = None
+
+    def step(
+        self, w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma=None, solver=None
+    ):
+        """
+        Solve the horizon problem and return the trade for the next period.
+
+        Args:
+            w_0: Current portfolio weights
+            r_t: Returns matrix of shape (H, n_assets)
+            gamma_t: Risk aversion parameters
+            psi_t: Risk factors, a scalar or vector per period
+            phi_trade: Trading costs, a scalar or vector per period
+            phi_hold: Holding costs, a scalar or vector per period
+            sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel
+                or FactorRiskModel
+            solver: Solver name or SolverConfig, defaults to CVXPY's choice
+
+        Returns:
+            numpy.ndarray: Trade vector for the next period; the full planned
+            trajectory is kept in `plan` and the solver used in `solver_used`
+
+        Raises:
+            ValidationError: If input shapes are invalid
+            OptimizationError: If optimization fails
+        """
+        self.plan = self.optimizer.solve(
+            w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma, solver
+        )
+        self.solver_used = self.optimizer.solver_used
+        self._shift_warm_start()
+        return self.plan[:, 0].copy()
+
+    @property
+    def last_stats(self):
+        """OptimizationStats of the last step, or None before the first one"""
+        return self.optimizer.last_stats
+
+    def reset(self):
+        """Forget the previous solution so the next step starts cold"""
+        problem = self.optimizer.problem
+        if problem is not None:
+            solver_cache = getattr(problem, "_solver_cache", None)
+            if isinstance(solver_cache, dict):
+                solver_cache.clear()
+            for variable in problem.variables():
+                variable.value = None
+        self.plan = None
+
+    def _shift_warm_start(self):
+        """Shift the solution of the last solve forward one period as the next warm start"""
+        periods = self.H - 1
+
+        for variable in (self.optimizer.z, self.optimizer.w):
+            variable.value = shift_blocks(
+                variable.value.ravel(order="F"), [(0, variable.shape, False)], periods
+            ).reshape(variable.shape, order="F")
+
+        warm_start = _osqp_warm_start(self.optimizer.problem)
+        if warm_start is None:
+            return
+        solver_cache, program, var_shapes = warm_start
+        solver, data, results = solver_cache[cp.OSQP]
+
+        var_blocks = [
+            (program.var_id_to_col[var_id], shape, False)
+            for var_id, shape in var_shapes.items()
+        ]
+
+        constraint_blocks = []
+        offset = 0
+        for constraint in program.constraints:
+            constraint_blocks.append(
+                (offset, constraint.shape, constraint.id == self.optimizer._budget_id)
+            )
+            offset += constraint.size
+
+        x = np.asarray(results.x)
+        y = np.asarray(results.y)
+        if len(x) != program.x.size or len(y) != offset:
+            return
+
+        solver_cache[cp.OSQP] = (
+            solver,
+            data,
+            SimpleNamespace(
+                x=shift_blocks(x, var_blocks, periods),
+                y=shift_blocks(y, constraint_blocks, periods),
+                info=results.info,
+            ),
+        )
+
+
+def _osqp_warm_start(problem):
+    """
+    Private CVXPY state needed to shift the OSQP iterates of problem.
+
+    Returns:
+        tuple: The solver cache, the parameterized program and the variable
+        shapes of the compiled problem, or None if the last solve did not use
+        OSQP or this CVXPY release keeps them elsewhere
+    """
+    solver_cache = getattr(problem, "_solver_cache", None)
+    if not isinstance(solver_cache, dict):
+        return None
+    entry = solver_cache.get(cp.OSQP)
+    if not isinstance(entry, tuple) or len(entry) != 3:
+        return None
+    results = entry[2]
+    if not (hasattr(results, "x") and hasattr(results, "y")):
+        return None
+
+    compilation = getattr(problem, "_cache", None)
+    program = getattr(compilation, "param_prog", None)
+    inverse_data = getattr(compilation, "inverse_data", None)
+    if (
+        not all(
+            hasattr(program, name) for name in ("var_id_to_col", "constraints", "x")
+        )
+        or not inverse_data
+    ):
+        return None
+    var_shapes = getattr(inverse_data[-1], "var_shapes", None)
+    if not isinstance(var_shapes, dict):
+        return None
+    return solver_cache, program, var_shapes
+
+
+def get_multi_period_optimizer(n_assets, H):
+    """
+    Return a cached MultiPeriodOptimizer for the given shape.
+
+    Compiled problems are kept in a least-recently-used cache keyed by
+    (n_assets, H), holding at most OPTIMIZER_CACHE_SIZE entries. Threads that called
+    use_thread_optimizer_cache look up their own cache instead.
+
+    Args:
+        n_assets: Number of assets
+        H: Number of periods
+
+    Returns:
+        MultiPeriodOptimizer: Compiled optimizer for the requested shape
+    """
+    key = (n_assets, H)
+    thread_cache = getattr(_thread_caches, "cache", None)
+    if thread_cache is not None:
+        optimizer = thread_cache.get(key)
+        if optimizer is None:
+            optimizer = thread_cache[key] = MultiPeriodOptimizer(n_assets, H)
+        thread_cache.move_to_end(key)
+        while len(thread_cache) > OPTIMIZER_CACHE_SIZE:
+            thread_cache.popitem(last=False)
+        return optimizer
+
+    with _optimizer_cache_lock:
+        optimizer = _optimizer_cache.get(key)
+        if optimizer is not None:
+            _optimizer_cache.move_to_end(key)
+            return optimizer
+
+    optimizer = MultiPeriodOptimizer(n_assets, H)
+
+    with _optimizer_cache_lock:
+        optimizer = _optimizer_cache.setdefault(key, optimizer)
+        _optimizer_cache.move_to_end(key)
+        while len(_optimizer_cache) > OPTIMIZER_CACHE_SIZE:
+            _optimizer_cache.popitem(last=False)
+    return optimizer
+
+
+def clear_optimizer_cache():
+    """Drop all cached multi-period optimizers, and the private cache of this thread"""
+    with _optimizer_cache_lock:
+        _optimizer_cache.clear()
+    if getattr(_thread_caches, "cache", None) is not None:
+        _thread_caches.cache.clear()
+
+
+def use_thread_optimizer_cache():
+    """
+    Give the calling thread its own cache of multi-period optimizers.
+
+    An optimizer solves one problem at a time, so threads sharing the cached
+    optimizer of a shape wait for each other. Worker threads of an
+    OptimizationExecutor call this so that their solves overlap, at the cost of
+    compiling each shape once per thread.
+    """
+    _thread_caches.cache = OrderedDict()
+
+
+def multi_period_optimization(
+    H,
+    r_t,
+    portfolio,
+    gamma_t,
+    psi_t,
+    phi_trade,
+    phi_hold,
+    sigma=None,
+    sparse=False,
+    solver=None,
+    return_solver=False,
+    return_stats=False,
+    cache=None,
+):
     """
     Multi-period portfolio optimization.
 
@@ -64,71 +701,91 @@ def multi_period_optimization(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_
         psi_t: Risk factors
         phi_trade: Trading costs
         phi_hold: Holding costs
+        sigma: Optional covariance matrix, scipy.sparse covariance, RiskModel or
+            FactorRiskModel, whose risk gamma_t * w @ sigma @ w is added in
+            every period
+        sparse: Whether to return the trades as a scipy.sparse.csc_array, see
+            sparse_utils.sparse_trades
+        solver: Solver name or SolverConfig with tolerances, limits and
+            fallback solvers, defaults to CVXPY's choice
+        return_solver: Whether to also return the name of the solver used
+        return_stats: Whether to also return the OptimizationStats of the solve,
+            which are also passed to the hooks registered with
+            instrumentation.register_hook
+        cache: Optional ResultCache; inputs matching a cached result within its
+            tolerance, compared after stacking the per-period inputs, return
+            that result without solving
+
+    The per-period inputs r_t, psi_t, phi_trade and phi_hold may be given as
+    scipy.sparse matrices.
 
     Returns:
-        numpy.ndarray: Optimal trade vectors
+        numpy.ndarray: Optimal trade vectors, or a sparse array if sparse is set;
+        with return_solver or return_stats, a tuple of the trades followed by
+        the solver name and the stats that were requested
 
     Raises:
         ValidationError: If input parameters are invalid
         OptimizationError: If optimization fails
     """
     try:
-        validate_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold)
-
-        # Check for numerical issues
-        if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
-            raise OptimizationError(
-                "Invalid returns matrix", details="Contains infinite or NaN values"
-            )
-
-        if np.any(np.isinf(psi_t)) or np.any(np.isnan(psi_t)):
-            raise OptimizationError(
-                "Invalid risk factors", details="Contains infinite or NaN values"
-            )
+        start = time.perf_counter()
+        r_t, psi_t, phi_trade, phi_hold = (
+            to_dense(values) for values in (r_t, psi_t, phi_trade, phi_hold)
+        )
+        check_inputs(H, r_t, portfolio, gamma_t, psi_t, phi_trade, phi_hold)
+        validation = time.perf_counter() - start
 
         n_assets = len(portfolio.weights_vector)
-        z = cp.Variable((n_assets, H - 1))
-
-        constraints = []
-        objective_terms = []
-        prev_w = portfolio.weights_vector
-
-        for i in range(1, H):
-            try:
-                cur_w = prev_w + z[:, i - 1]
-
-                expected_return = cp.matmul(r_t[i], cur_w)
-                risk = gamma_t[i] * cp.sum(cp.multiply(psi_t[i], cp.square(cur_w)))
-                holding_cost = cp.sum(cp.multiply(phi_hold[i], cur_w))
-                transaction_cost = cp.sum(
-                    cp.multiply(phi_trade[i], cp.abs(z[:, i - 1]))
+        key = cached = None
+        if cache is not None:
+            stacked = [
+                stack_period_inputs(values, H, n_assets, name)
+                for values, name in (
+                    (r_t, "returns matrix"),
+                    (psi_t, "risk factors"),
+                    (phi_trade, "trading costs"),
+                    (phi_hold, "holding costs"),
                 )
+            ]
+            key = cache.key(
+                (H, portfolio.weights_vector, gamma_t, *stacked, sigma), solver
+            )
+            cached = cache.get(key)
 
-                objective_terms.append(
-                    expected_return - risk - holding_cost - transaction_cost
+        if cached is not None:
+            z, solver_used, stats = cached
+            z = z.copy()
+        else:
+            optimizer = get_multi_period_optimizer(n_assets, H)
+            with optimizer._lock:
+                z = optimizer._solve(
+                    portfolio.weights_vector,
+                    r_t,
+                    gamma_t,
+                    psi_t,
+                    phi_trade,
+                    phi_hold,
+                    sigma,
+                    solver,
+                    validation,
                 )
-                constraints.append(cp.sum(cur_w) == 1)
-                prev_w = cur_w
-
-            except Exception as e:
-                raise OptimizationError(f"Error in period {i}", details=str(e))
-
-        objective = cp.Maximize(cp.sum(objective_terms))
-        problem = cp.Problem(objective, constraints)
-
-        if not problem.is_dcp():
-            raise OptimizationError("Problem does not satisfy DCP rules")
-
-        try:
-            problem.solve()
-            if problem.status not in [cp.OPTIMAL, cp.OPTIMAL_INACCURATE]:
-                raise OptimizationError(
-                    "Optimization failed", details=f"Solver status: {problem.status}"
+                solver_used = optimizer.solver_used
+                stats = (
+                    optimizer.last_stats if return_stats or cache is not None else None
                 )
-            return z.value
+            if cache is not None:
+                cache.put(key, (z.copy(), solver_used, stats))
 
-        except cp.error.SolverError as e:
-            raise OptimizationError("Solver error", details=str(e))
+        if sparse:
+            z = sparse_trades(z)
+        if not (return_solver or return_stats):
+            return z
+        return (
+            (z,)
+            + ((solver_used,) if return_solver else ())
+            + ((stats,) if return_stats else ())
+        )
 
     except (ValidationError, OptimizationError):
         raise
@@ -0,0 +1,135 @@
+import numpy as np
+
+# Coefficients of the default trading and holding costs in the single-period
+# objective, 0.01 * sum(|z|) and 0.01 * sum(w_next ** 2)
+TRADE_COST = 0.01
+HOLD_COST = 0.01
+
+
+def zero_return_rows(R):
+    """
+    Return a boolean mask of rows whose expected returns are all close to zero.
+
+    For these rows the single-period problem restricts trading to a small L1 ball
+    (see trade_cap), which the native solver does not model.
+    """
+    return np.all(np.isclose(R, 0), axis=1)
+
+
+def _breakpoints(R, W, two_a):
+    """
+    Breakpoints in the budget multiplier lam of each post-trade weight.
+
+    In terms of lam, each weight decreases with slope 1 / (2a) while lam is below
+    t1, stays at w between t1 and t2 = t1 + 2c, decreases again down to zero
+    between t2 and t3 = r + c and is zero afterwards. For weights that start at or
+    below zero t2 == t3, so the middle segments are empty. The breakpoints are
+    concatenated along the last axis in the order t1, t2, t3.
+    """
+    c = TRADE_COST
+    t1 = R - np.maximum(two_a * W + c, c)
+    return np.concatenate([t1, t1 + 2 * c, R + c], axis=-1)
+
+
+def _slope_deltas(n):
+    """Change in the number of decreasing weights when lam crosses t1, t2 and t3 downwards"""
+    return np.repeat(np.array([1, -1, 1]), n)
+
+
+def _trades(R, W, lam, two_a):
+    """Trade vectors for given budget multipliers, a soft-threshold around W clipped at zero"""
+    y = (R - lam) / two_a
+    threshold = TRADE_COST / two_a
+    return np.maximum(y - np.clip(y - W, -threshold, threshold), 0.0) - W
+
+
+def solve_default_batch(R, W, gammas):
+    """
+    Solve the default single-period problem exactly for many portfolios at once.
+
+    With the default cost functions the problem in the post-trade weights u = w + z is
+
+        minimize    a * sum(u ** 2) - r @ u + c * sum(|u - w|)
+        subject to  sum(u) == 1, u >= 0
+
+    with a = gamma / n + HOLD_COST and c = TRADE_COST. For a multiplier lam of the
+    budget constraint each coordinate is a soft-threshold of (r - lam) / (2a)
+    around w, clipped at zero, so the sum of the weights is a decreasing piecewise
+    linear function of lam with at most three breakpoints per asset. The
+    breakpoints of every row are sorted once and the budget equation is solved
+    exactly on the segment where the sum crosses one, which costs O(n log n) per
+    row without any iterations.
+
+    Inputs must be finite and gammas non-negative; rows flagged by
+    zero_return_rows are not handled.
+
+    Args:
+        R: Expected returns of shape (m, n)
+        W: Current weights of shape (m, n)
+        gammas: Risk aversion parameter of each row, shape (m,)
+
+    Returns:
+        numpy.ndarray: Optimal trade vectors of shape (m, n)
+    """
+    R = np.asarray(R, dtype=float)
+    W = np.asarray(W, dtype=float)
+    m, n = R.shape
+    two_a = 2.0 * (np.asarray(gammas, dtype=float) / n + HOLD_COST)[:, None]
+
+    # Breakpoints of every row in decreasing order, indexed through the
+    # flattened array to avoid fancy indexing along an axis
+    breakpoints = _breakpoints(R, W, two_a)
+    order = np.argsort(-breakpoints, axis=1)
+    row_offsets = np.arange(0, m * 3 * n, 3 * n)
+    points = breakpoints.ravel()[order + row_offsets[:, None]]
+    slopes = np.cumsum(_slope_deltas(n)[order], axis=1)
+
+    # sums[:, j] is the sum of the weights at points[:, j + 1], with the sum
+    # being zero right of the largest breakpoint
+    gaps = points - np.append(points[:, 1:], points[:, -1:], axis=1)
+    sums = np.cumsum(slopes * gaps, axis=1) / two_a
+
+    # The budget is met on the segment (points[j + 1], points[j]) of the first j
+    # where the sum reaches one, or left of the smallest breakpoint where all n
+    # weights decrease
+    j = np.sum(sums < 1.0, axis=1)
+    flat = np.minimum(j, 3 * n - 1) + row_offsets
+    previous = np.where(j > 0, sums.ravel()[flat - 1], 0.0)
+    lam = points.ravel()[flat] - (1.0 - previous) * two_a[:, 0] / slopes.ravel()[flat]
+
+    return _trades(R, W, lam[:, None], two_a)
+
+
+def solve_default(r_t, w_t, gamma):
+    """
+    Solve the default single-period problem for one portfolio.
+
+    Same algorithm as solve_default_batch, on 1-D arrays to keep the per-call
+    overhead low.
+
+    Args:
+        r_t: Expected returns vector
+        w_t: Current portfolio weights
+        gamma: Risk aversion parameter
+
+    Returns:
+        numpy.ndarray: Optimal trade vector
+    """
+    r_t = np.asarray(r_t, dtype=float)
+    w_t = np.asarray(w_t, dtype=float)
+    n = len(r_t)
+    two_a = 2.0 * (gamma / n + HOLD_COST)
+
+    breakpoints = _breakpoints(r_t, w_t, two_a)
+    order = np.argsort(-breakpoints)
+    points = breakpoints[order]
+    slopes = np.cumsum(_slope_deltas(n)[order])
+
+    # Extend past the smallest breakpoint, where all n weights decrease, far
+    # enough for the sum to exceed one
+    points = np.append(points, points[-1] - two_a)
+    sums = np.zeros(len(points))
+    np.cumsum(slopes * (points[:-1] - points[1:]) / two_a, out=sums[1:])
+
+    lam = np.interp(1.0, sums, points)
+    return _trades(r_t, w_t, lam, two_a)
@@ -0,0 +1,400 @@
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import warnings
+from pathlib import Path
+from threading import Lock
+import numpy as np
+import scipy
+import cvxpy as cp
+
+try:
+    from cvxpy.lin_ops import lin_utils
+except ImportError:
+    lin_utils = None
+from . import __version__
+from .portfolio_exceptions import ValidationError
+
+# Environment variable naming the directory of the problem cache used when
+# set_problem_cache was not called
+CACHE_DIR_ENV = "CONVEXTRADER_PROBLEM_CACHE"
+
+# Version of the file layout; part of every key
+FORMAT_VERSION = 1
+
+# Default maximum number of cached problems kept on disk
+DEFAULT_MAX_FILES = 256
+
+# Array buffers are aligned to this many bytes in the file
+ALIGNMENT = 64
+
+SUFFIX = ".cvxprob"
+_MAGIC = b"CTPROB01"
+# Magic, ID counter of the saving process, pickle length, number of buffers
+_HEADER = struct.Struct("<8sQQQ")
+# Offset and length of one buffer
+_BUFFER = struct.Struct("<QQ")
+
+# Optimizer attributes that belong to a solve or to the caller, not to the
+# compiled problem, and are never written to disk
+_TRANSIENT = frozenset(
+    ("_lock", "solver_used", "_timings", "phi_trade", "phi_hold", "_builds")
+)
+
+_UNSET = object()
+_active = _UNSET
+_active_lock = Lock()
+_unsupported_warned = False
+
+
+def _update_code(digest, code):
+    """Hash the bytecode, constants and names of a code object and its nested code"""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"):
+            _update_code(digest, constant)
+        else:
+            digest.update(repr(constant).encode())
+
+
+def function_key(function):
+    """
+    Stable key of a module-level function, or None for lambdas and closures.
+
+    The key is the qualified name and a digest of the bytecode, constants,
+    names and defaults, so editing or redefining a function, e.g. in a notebook
+    or __main__, never loads a problem compiled from the old definition.
+    Module globals the function reads are not part of the key.
+    """
+    module = getattr(function, "__module__", None)
+    name = getattr(function, "__qualname__", None)
+    if module is None or name is None or "<" in name:
+        return None
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return f"{module}.{name}"
+    digest = hashlib.blake2b(digest_size=8)
+    _update_code(digest, code)
+    digest.update(repr(function.__defaults__).encode())
+    digest.update(repr(function.__kwdefaults__).encode())
+    return f"{module}.{name}:{digest.hexdigest()}"
+
+
+def _id_counter():
+    """
+    CVXPY's process-wide id counter, or None if this CVXPY release does not
+    keep it as lin_utils.ID_COUNTER.count, in which case the cache is disabled
+    """
+    counter = getattr(lin_utils, "ID_COUNTER", None)
+    if not isinstance(getattr(counter, "count", None), int):
+        return None
+    return counter
+
+
+def reserve_ids(count: int):
+    """
+    Make the objects CVXPY creates from now on get ids above count.
+
+    CVXPY numbers variables, parameters and constraints from one process-wide
+    counter, and a loaded problem keeps the ids it had in the process that
+    saved it, which newer objects must not reuse. This and save are the only
+    places the problem cache touches that private counter; it only ever
+    moves it forward.
+    """
+    counter = _id_counter()
+    counter.count = max(counter.count, count)
+
+
+def _check_owner(status):
+    """Refuse files other users own or can write, since loading runs their pickle"""
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        raise ValueError("file is owned by another user")
+    if status.st_mode & 0o022:
+        raise ValueError("file is writable by other users")
+
+
+class ProblemCache:
+    """
+    Directory of compiled optimization problems shared across processes.
+
+    A problem is stored after CVXPY has canonicalized it for the default solver,
+    so the file holds the parameter-to-problem-data mapping and its matrices.
+    Files are keyed by the problem structure and shape, the constants compiled
+    into it, and the versions of ConvexTrader, CVXPY, NumPy and SciPy, so a
+    stale file is never loaded. Array data is memory-mapped copy-on-write
+    rather than read, so loading takes milliseconds and pages in lazily.
+
+    Newly spawned workers sharing the directory skip building and compiling
+    the problems earlier workers have seen; solver setup, e.g. the OSQP
+    factorization, still happens on the first solve. Problems compiled for a
+    solver other than CVXPY's default are recompiled on their first solve.
+    Writes are atomic, so concurrent workers may share a directory. The least
+    recently used files beyond max_files are deleted.
+
+    Loading a file unpickles it, so anyone who can write to the directory can
+    run code in every process using the cache. The directory is created
+    accessible to its owner only, and files not owned by the current user, or
+    writable by other users, are refused. Never point the cache, or
+    CONVEXTRADER_PROBLEM_CACHE, at a directory other users can write to.
+
+    Example:
+        >>> set_problem_cache("/var/cache/convextrader")
+        >>> z = single_period_optimization(r_t, w_t, 1.0, phi_trade, phi_hold,
+        ...                                engine="cvxpy")
+    """
+
+    def __init__(self, directory, max_files: int = DEFAULT_MAX_FILES):
+        """
+        Open or create the cache directory.
+
+        Args:
+            directory: Path of the directory holding the cached problems
+            max_files: Maximum number of cached problems
+
+        Raises:
+            ValidationError: If max_files is invalid
+        """
+        if not isinstance(max_files, (int, np.integer)) or max_files <= 0:
+            raise ValidationError(
+                "Invalid cache size",
+                details=f"max_files must be a positive integer, got {max_files}",
+            )
+        self.directory = Path(directory)
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.max_files = int(max_files)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def path(self, key: tuple) -> Path:
+        """File of a key; the versions of the packages are part of the hash"""
+        versions = (FORMAT_VERSION, __version__, cp.__version__)
+        versions += (np.__version__, scipy.__version__)
+        digest = hashlib.blake2b(repr(key + versions).encode(), digest_size=16)
+        return self.directory / f"{key[0]}-{digest.hexdigest()}{SUFFIX}"
+
+    def load(self, key: tuple):
+        """
+        Attributes of the optimizer stored under key, or None.
+
+        Unreadable or untrusted files count as errors, warn and are treated as
+        missing.
+        """
+        if _id_counter() is None:
+            self.misses += 1
+            return None
+
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                _check_owner(os.fstat(file.fileno()))
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            return self._failed(path, e)
+
+        try:
+            magic, id_counter, length, count = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC:
+                raise ValueError("not a problem cache file")
+            view = memoryview(mapped)
+            buffers = []
+            for i in range(count):
+                offset, size = _BUFFER.unpack_from(
+                    mapped, _HEADER.size + i * _BUFFER.size
+                )
+                buffers.append(view[offset : offset + size])
+            start = _HEADER.size + count * _BUFFER.size
+            state = pickle.loads(view[start : start + length], buffers=buffers)
+        except Exception as e:
+            return self._failed(path, e)
+
+        reserve_ids(id_counter)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return state
+
+    def _failed(self, path, error):
+        self.errors += 1
+        warnings.warn(
+            f"Ignoring unreadable problem cache file {path}: {error}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return None
+
+    def save(self, key: tuple, state: dict):
+        """
+        Write the attributes of an optimizer under key.
+
+        Failures, e.g. a full disk, warn instead of raising, since the cache
+        only saves time.
+        """
+        counter = _id_counter()
+        if counter is None:
+            return
+
+        buffers = []
+        try:
+            data = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+        except Exception as e:
+            warnings.warn(f"Cannot cache problem: {e}", RuntimeWarning, stacklevel=3)
+            return
+
+        raw = [buffer.raw() for buffer in buffers]
+        offset = _HEADER.size + len(raw) * _BUFFER.size + len(data)
+        table = []
+        for buffer in raw:
+            offset += -offset % ALIGNMENT
+            table.append((offset, buffer.nbytes))
+            offset += buffer.nbytes
+
+        path = self.path(key)
+        temporary = None
+        try:
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(_HEADER.pack(_MAGIC, counter.count, len(data), len(raw)))
+                for entry in table:
+                    file.write(_BUFFER.pack(*entry))
+                file.write(data)
+                for (position, _), buffer in zip(table, raw):
+                    file.write(b"\0" * (position - file.tell()))
+                    file.write(buffer)
+            os.replace(temporary, path)
+        except OSError as e:
+            warnings.warn(
+                f"Cannot write problem cache file {path}: {e}",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+            if temporary is not None:
+                Path(temporary).unlink(missing_ok=True)
+            return
+        self._evict(path)
+
+    def _evict(self, keep):
+        """Delete the least recently used files beyond max_files, except keep"""
+        files = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                if path != keep:
+                    files.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                pass
+        files.sort()
+        for _, path in files[: max(len(files) + 1 - self.max_files, 0)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete all cached problems and reset the counters"""
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            path.unlink(missing_ok=True)
+        self.hits = self.misses = self.errors = 0
+
+    def __len__(self):
+        return sum(1 for _ in self.directory.glob(f"*{SUFFIX}"))
+
+    def __repr__(self):
+        return f"ProblemCache({str(self.directory)!r}, max_files={self.max_files})"
+
+
+def set_problem_cache(cache):
+    """
+    Set the problem cache used by the optimizers of this process.
+
+    Args:
+        cache: ProblemCache, directory path, or None to disable the cache
+
+    Returns:
+        ProblemCache or None: The cache now in use
+    """
+    global _active
+    if cache is not None and not isinstance(cache, ProblemCache):
+        cache = ProblemCache(cache)
+    with _active_lock:
+        _active = cache
+    return cache
+
+
+def get_problem_cache():
+    """
+    Problem cache in use: the one set with set_problem_cache, else one in the
+    directory named by the CONVEXTRADER_PROBLEM_CACHE environment variable,
+    else None. The directory must only be writable by the current user, see
+    ProblemCache.
+
+    Loaded problems must not share ids with new CVXPY objects, which the cache
+    ensures through CVXPY's private id counter. With a CVXPY release that does
+    not have it, the cache is disabled with a warning and None is returned.
+    """
+    global _active, _unsupported_warned
+    with _active_lock:
+        if _active is _UNSET:
+            directory = os.environ.get(CACHE_DIR_ENV)
+            _active = ProblemCache(directory) if directory else None
+        if _active is not None and _id_counter() is None:
+            if not _unsupported_warned:
+                _unsupported_warned = True
+                warnings.warn(
+                    f"Problem cache disabled: CVXPY {cp.__version__} has no "
+                    "lin_utils.ID_COUNTER to keep loaded problem ids unique",
+                    RuntimeWarning,
+                    stacklevel=3,
+                )
+            return None
+        return _active
+
+
+def load_problem(optimizer, key) -> bool:
+    """
+    Restore the compiled problem of optimizer from the cache in use.
+
+    Args:
+        optimizer: SinglePeriodOptimizer or MultiPeriodOptimizer
+        key: Structure of the problem, or None if it cannot be cached
+
+    Returns:
+        bool: Whether the problem was loaded
+    """
+    cache = get_problem_cache()
+    if cache is None or key is None:
+        return False
+    state = cache.load(key)
+    if state is None:
+        return False
+    optimizer.__dict__.update(state)
+    return True
+
+
+def save_problem(optimizer, key):
+    """
+    Compile the problem of optimizer for the default solver and store it in
+    the cache in use; does nothing without a cache or key.
+    """
+    cache = get_problem_cache()
+    if cache is None or key is None:
+        return
+    try:
+        optimizer.problem.get_problem_data(None)
+    except cp.error.SolverError as e:
+        warnings.warn(f"Cannot cache problem: {e}", RuntimeWarning, stacklevel=2)
+        return
+    state = {
+        name: value
+        for name, value in optimizer.__dict__.items()
+        if name not in _TRANSIENT
+    }
+    cache.save(key, state)
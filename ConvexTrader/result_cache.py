@@ -0,0 +1,207 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+import numpy as np
+import scipy.sparse as sp
+from .risk_models import RiskModel, FactorRiskModel
+from .portfolio_exceptions import ValidationError
+
+# Inputs are rounded to multiples of this before hashing, far below the accuracy
+# of the solvers
+DEFAULT_TOLERANCE = 1e-9
+
+# Default maximum number of cached results
+DEFAULT_CACHE_SIZE = 1024
+
+
+class CacheInfo(NamedTuple):
+    """Counters of a ResultCache, as returned by ResultCache.info"""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+def _quantize(values, tolerance) -> np.ndarray:
+    """Round values to multiples of tolerance; -0.0 becomes 0.0"""
+    values = np.ascontiguousarray(values, dtype=float)
+    if tolerance > 0:
+        values = np.round(values / tolerance)
+    return values + 0.0
+
+
+def _update(digest, value, tolerance):
+    """Feed one input into the hash"""
+    if value is None:
+        digest.update(b"none")
+    elif sp.issparse(value):
+        value = sp.csr_array(value)
+        value.sum_duplicates()
+        value.sort_indices()
+        digest.update(b"sparse" + repr(value.shape).encode())
+        digest.update(value.indptr.astype(np.int64).tobytes())
+        digest.update(value.indices.astype(np.int64).tobytes())
+        digest.update(_quantize(value.data, tolerance).tobytes())
+    elif isinstance(value, FactorRiskModel):
+        digest.update(b"factor")
+        for part in (value.loadings, value.factor_covariance, value.idiosyncratic):
+            _update(digest, part, tolerance)
+    elif isinstance(value, RiskModel):
+        digest.update(b"risk")
+        _update(digest, value.covariance(), tolerance)
+    else:
+        value = np.asarray(value, dtype=float)
+        digest.update(b"array" + repr(value.shape).encode())
+        digest.update(_quantize(value, tolerance).tobytes())
+
+
+def input_digest(arrays, tolerance: float = 0.0) -> bytes:
+    """
+    16-byte blake2b digest of numeric inputs rounded to multiples of tolerance.
+
+    Args:
+        arrays: numpy arrays, scalars, None, scipy.sparse matrices, RiskModel
+            or FactorRiskModel
+        tolerance: Quantization step, or 0 to hash the exact values
+
+    Returns:
+        bytes: Digest, equal for inputs of the same shapes and rounded values
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in arrays:
+        _update(digest, value, tolerance)
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Opt-in memo of optimization results for repeated inputs.
+
+    Results are keyed by a blake2b hash of the input arrays after rounding them
+    to multiples of tolerance, together with the identity of the cost
+    functions and the engine and solver settings, so identical or nearly
+    identical inputs, e.g. consecutive cycles of a slow signal or accounts
+    sharing a model, return the stored result without solving. Inputs that
+    differ by less than tolerance can still round to different multiples and
+    miss; a larger tolerance trades accuracy for hits.
+
+    The cache holds at most max_size results, evicting the least recently used,
+    and with max_age set drops results older than max_age seconds. It is safe to
+    share between threads. Pass it as the cache argument of
+    single_period_optimization or multi_period_optimization.
+
+    Example:
+        >>> cache = ResultCache(max_size=256, max_age=60.0, tolerance=1e-6)
+        >>> z = single_period_optimization(r_t, w_t, 1.0, phi_trade, phi_hold, cache=cache)
+        >>> cache.info().hits
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        max_age: float = None,
+        tolerance: float = DEFAULT_TOLERANCE,
+    ):
+        """
+        Create an empty cache.
+
+        Args:
+            max_size: Maximum number of results kept
+            max_age: Maximum age of a result in seconds, or None to keep results
+                until they are evicted
+            tolerance: Quantization step of the inputs, or 0 to match inputs
+                exactly
+
+        Raises:
+            ValidationError: If a setting is invalid
+        """
+        if not isinstance(max_size, (int, np.integer)) or max_size <= 0:
+            raise ValidationError(
+                "Invalid cache size",
+                details=f"max_size must be a positive integer, got {max_size}",
+            )
+        if max_age is not None and not max_age > 0:
+            raise ValidationError(
+                "Invalid cache age", details=f"max_age must be positive, got {max_age}"
+            )
+        if not tolerance >= 0:
+            raise ValidationError(
+                "Invalid cache tolerance",
+                details=f"tolerance must be non-negative, got {tolerance}",
+            )
+
+        self.max_size = int(max_size)
+        self.max_age = max_age
+        self.tolerance = float(tolerance)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def key(self, arrays, *identity) -> tuple:
+        """
+        Cache key of a set of inputs.
+
+        Args:
+            arrays: Numeric inputs, hashed after quantization; numpy arrays,
+                scalars, scipy.sparse matrices, RiskModel or FactorRiskModel
+            *identity: Other inputs compared by equality, e.g. the cost
+                functions, engine and solver
+
+        Returns:
+            tuple: Hashable key holding the digest and the identity inputs
+        """
+        return (input_digest(arrays, self.tolerance),) + identity
+
+    def get(self, key):
+        """
+        Return the result stored under key, or None.
+
+        Counts a hit or a miss; an expired result is dropped and counts as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored = entry
+                if self.max_age is None or time.monotonic() - stored <= self.max_age:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used beyond max_size"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all results and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Hit, miss and eviction counters and the current size"""
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._entries),
+                self.max_size,
+            )
+
+    def __len__(self):
+        return len(self._entries)
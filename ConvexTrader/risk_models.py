@@ -0,0 +1,663 @@
+import os
+import numpy as np
+import scipy.sparse as sp
+from .portfolio_exceptions import ValidationError
+
+
+def psd_factor(sigma: np.ndarray) -> np.ndarray:
+    """
+    Return a matrix M with sigma = M @ M.T for a symmetric positive semidefinite sigma.
+
+    Uses a Cholesky factorization when sigma is positive definite and an
+    eigendecomposition with negative eigenvalues clipped to zero otherwise, e.g.
+    for sample covariances estimated from fewer observations than assets.
+
+    Raises:
+        ValidationError: If sigma is not a finite square matrix
+    """
+    sigma = np.asarray(sigma, dtype=float)
+    if sigma.ndim != 2 or sigma.shape[0] != sigma.shape[1]:
+        raise ValidationError(
+            "Invalid covariance matrix",
+            details=f"Expected a square matrix, got shape {sigma.shape}",
+        )
+    if not np.all(np.isfinite(sigma)):
+        raise ValidationError(
+            "Invalid covariance matrix", details="Contains infinite or NaN values"
+        )
+
+    sigma = (sigma + sigma.T) / 2
+    try:
+        return np.linalg.cholesky(sigma)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(sigma)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+def sparse_covariance(sigma):
+    """
+    Validate a scipy.sparse covariance matrix without densifying it.
+
+    The matrix is assumed positive semidefinite; only its shape, finiteness and
+    symmetry are checked, in O(nnz).
+
+    Returns:
+        The diagonal as a 1-D array when sigma has no off-diagonal entries,
+        otherwise sigma as a CSC matrix
+
+    Raises:
+        ValidationError: If sigma is not a finite, square, symmetric matrix
+    """
+    sigma = sp.csc_matrix(sigma, dtype=float)
+    if sigma.shape[0] != sigma.shape[1]:
+        raise ValidationError(
+            "Invalid covariance matrix",
+            details=f"Expected a square matrix, got shape {sigma.shape}",
+        )
+    if not np.all(np.isfinite(sigma.data)):
+        raise ValidationError(
+            "Invalid covariance matrix", details="Contains infinite or NaN values"
+        )
+    asymmetry = abs(sigma - sigma.T)
+    if asymmetry.nnz and asymmetry.max() > 1e-8 * max(abs(sigma).max(), 1.0):
+        raise ValidationError(
+            "Invalid covariance matrix", details="Sparse covariance is not symmetric"
+        )
+
+    sigma.eliminate_zeros()
+    diagonal = sigma.diagonal()
+    if sigma.nnz == np.count_nonzero(diagonal):
+        if np.any(diagonal < 0):
+            raise ValidationError(
+                "Invalid covariance matrix", details="Negative variances"
+            )
+        return diagonal
+    return sigma
+
+
+def residuals_equal(a, b) -> bool:
+    """Whether two residual covariances from risk_terms are equal"""
+    if a is None or b is None:
+        return a is b
+    if sp.issparse(a) != sp.issparse(b) or a.shape != b.shape:
+        return False
+    if sp.issparse(a):
+        return (a != b).nnz == 0
+    return np.array_equal(a, b)
+
+
+class RiskModel:
+    """
+    Base class of incremental covariance estimators.
+
+    Subclasses keep O(n^2) running state that `update` folds one return vector
+    into, and expose the current estimate through `covariance`. The state is a
+    dict of numpy arrays and scalars, so an estimator can be saved and restored
+    without rescanning the return history.
+    """
+
+    # Name stored in saved state, mapped back to the class by load_risk_model
+    kind = None
+
+    def __init__(self, n: int):
+        """
+        Args:
+            n: Number of assets
+
+        Raises:
+            ValidationError: If n is not a positive integer
+        """
+        if not isinstance(n, (int, np.integer)) or n <= 0:
+            raise ValidationError(
+                "Invalid number of assets", details=f"n must be positive, got {n}"
+            )
+        self.n = int(n)
+        self.count = 0
+        self._factor = None
+
+    def _check_returns(self, x) -> np.ndarray:
+        """Validate one return vector"""
+        x = np.asarray(x, dtype=float)
+        if x.shape != (self.n,):
+            raise ValidationError(
+                "Invalid return vector",
+                details=f"Expected shape ({self.n},), got {x.shape}",
+            )
+        if not np.all(np.isfinite(x)):
+            raise ValidationError(
+                "Invalid return vector", details="Contains infinite or NaN values"
+            )
+        return x
+
+    def update(self, x) -> "RiskModel":
+        """
+        Fold one return vector into the estimate in O(n^2).
+
+        Args:
+            x: Returns of the n assets over one period
+
+        Returns:
+            The estimator itself
+
+        Raises:
+            ValidationError: If x is not a finite length n vector
+        """
+        self._update(self._check_returns(x))
+        self.count += 1
+        self._factor = None
+        return self
+
+    def update_many(self, X) -> "RiskModel":
+        """Fold the rows of a (T, n) matrix of returns into the estimate, in order"""
+        for x in np.asarray(X, dtype=float):
+            self.update(x)
+        return self
+
+    def _update(self, x: np.ndarray):
+        raise NotImplementedError
+
+    def covariance(self) -> np.ndarray:
+        """Current (n, n) covariance estimate"""
+        raise NotImplementedError
+
+    def factor(self) -> np.ndarray:
+        """
+        Matrix M with covariance() == M @ M.T, cached until the next update.
+
+        This is the form the optimizers consume the risk model in.
+        """
+        if self._factor is None:
+            self._factor = psd_factor(self.covariance())
+        return self._factor
+
+    def state_dict(self) -> dict:
+        """Return the estimator state as a dict of numpy arrays and scalars"""
+        return {"kind": self.kind, "n": self.n, "count": self.count}
+
+    def load_state_dict(self, state: dict) -> "RiskModel":
+        """
+        Restore state produced by state_dict.
+
+        Raises:
+            ValidationError: If the state belongs to another kind or size of estimator
+        """
+        if str(state["kind"]) != self.kind or int(state["n"]) != self.n:
+            raise ValidationError(
+                "Incompatible risk model state",
+                details=f"Expected {self.kind} with n={self.n}, got {state['kind']} with n={state['n']}",
+            )
+        self.count = int(state["count"])
+        self._factor = None
+        return self
+
+    def save(self, path):
+        """Write the estimator state to an .npz file"""
+        path = os.fspath(path)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez(f, **self.state_dict())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> "RiskModel":
+        """Create an estimator from state produced by state_dict"""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(n={self.n}, count={self.count})>"
+
+
+class RunningCovariance(RiskModel):
+    """
+    Sample covariance of all observed returns, updated with Welford's algorithm.
+
+    Example:
+        >>> model = RunningCovariance(n)
+        >>> for x in returns:
+        ...     model.update(x)
+        >>> sigma = model.covariance()
+    """
+
+    kind = "running"
+
+    def __init__(self, n: int, ddof: int = 1):
+        """
+        Args:
+            n: Number of assets
+            ddof: Delta degrees of freedom of the covariance estimate
+        """
+        super().__init__(n)
+        self.ddof = ddof
+        self.mean = np.zeros(self.n)
+        self._comoment = np.zeros((self.n, self.n))
+
+    def _update(self, x):
+        delta = x - self.mean
+        self.mean += delta / (self.count + 1)
+        # Rank-one update with the deviations from the old and new means
+        self._comoment += np.outer(delta, x - self.mean)
+
+    def covariance(self) -> np.ndarray:
+        if self.count <= self.ddof:
+            return np.zeros((self.n, self.n))
+        return self._comoment / (self.count - self.ddof)
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state.update(ddof=self.ddof, mean=self.mean, comoment=self._comoment)
+        return state
+
+    def load_state_dict(self, state: dict) -> "RunningCovariance":
+        super().load_state_dict(state)
+        self.ddof = int(state["ddof"])
+        self.mean = np.array(state["mean"], dtype=float)
+        self._comoment = np.array(state["comoment"], dtype=float)
+        return self
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> "RunningCovariance":
+        return cls(int(state["n"]), int(state["ddof"])).load_state_dict(state)
+
+
+class EWMACovariance(RiskModel):
+    """
+    Exponentially weighted moving average covariance.
+
+    Each update discounts the past by `decay`: the mean and covariance follow the
+    recursions mean += (1 - decay) * (x - mean) and
+    sigma = decay * (sigma + (1 - decay) * outer(x - mean_old, x - mean_old)).
+    The first observation only initializes the mean.
+    """
+
+    kind = "ewma"
+
+    def __init__(self, n: int, decay: float = None, halflife: float = None):
+        """
+        Args:
+            n: Number of assets
+            decay: Weight of the previous estimate in each update, in (0, 1)
+            halflife: Number of periods after which an observation's weight halves;
+                alternative to decay
+
+        Raises:
+            ValidationError: If neither or both of decay and halflife are given,
+                or the decay is not in (0, 1)
+        """
+        super().__init__(n)
+        if (decay is None) == (halflife is None):
+            raise ValidationError(
+                "Invalid EWMA parameters",
+                details="Exactly one of decay and halflife must be given",
+            )
+        if halflife is not None:
+            decay = 0.5 ** (1.0 / halflife) if halflife > 0 else -1.0
+        if not 0 < decay < 1:
+            raise ValidationError(
+                "Invalid EWMA parameters",
+                details=f"decay must be in (0, 1), got {decay}",
+            )
+        self.decay = float(decay)
+        self.mean = np.zeros(self.n)
+        self._covariance = np.zeros((self.n, self.n))
+
+    def _update(self, x):
+        if self.count == 0:
+            self.mean[:] = x
+            return
+        delta = x - self.mean
+        self.mean += (1 - self.decay) * delta
+        self._covariance += (1 - self.decay) * np.outer(delta, delta)
+        self._covariance *= self.decay
+
+    def covariance(self) -> np.ndarray:
+        return self._covariance.copy()
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state.update(decay=self.decay, mean=self.mean, covariance=self._covariance)
+        return state
+
+    def load_state_dict(self, state: dict) -> "EWMACovariance":
+        super().load_state_dict(state)
+        self.decay = float(state["decay"])
+        self.mean = np.array(state["mean"], dtype=float)
+        self._covariance = np.array(state["covariance"], dtype=float)
+        return self
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> "EWMACovariance":
+        return cls(int(state["n"]), decay=float(state["decay"])).load_state_dict(state)
+
+
+class LedoitWolfCovariance(RiskModel):
+    """
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity.
+
+    The optimal shrinkage intensity depends on fourth moments of the centered
+    returns. Expanding those around the final mean shows they only need running
+    sums of x, x ** 2, outer(x, x), outer(x ** 2, x) and outer(x ** 2, x ** 2),
+    so every update is O(n^2) and the estimate equals the batch Ledoit-Wolf
+    estimator (with the maximum likelihood sample covariance) on the full
+    history.
+    """
+
+    kind = "ledoit_wolf"
+
+    def __init__(self, n: int):
+        """
+        Args:
+            n: Number of assets
+        """
+        super().__init__(n)
+        self._sum = np.zeros(self.n)
+        self._sum_squares = np.zeros(self.n)
+        self._outer = np.zeros((self.n, self.n))
+        self._outer_cubic = np.zeros((self.n, self.n))
+        self._outer_quartic = np.zeros((self.n, self.n))
+        self.shrinkage = 0.0
+
+    def _update(self, x):
+        squares = x * x
+        self._sum += x
+        self._sum_squares += squares
+        self._outer += np.outer(x, x)
+        self._outer_cubic += np.outer(squares, x)
+        self._outer_quartic += np.outer(squares, squares)
+
+    def covariance(self) -> np.ndarray:
+        T, p = self.count, self.n
+        if T == 0:
+            return np.zeros((p, p))
+
+        m = self._sum / T
+        sample = self._outer / T - np.outer(m, m)
+
+        # Sum over observations of the squared entries of the centered outer
+        # products, sum_t (x_ti - m_i)^2 (x_tj - m_j)^2
+        m2 = m * m
+        centered_quartic = (
+            self._outer_quartic
+            - 2 * self._outer_cubic * m[None, :]
+            - 2 * self._outer_cubic.T * m[:, None]
+            + np.outer(self._sum_squares, m2)
+            + np.outer(m2, self._sum_squares)
+            + 4 * np.outer(m, m) * self._outer
+            - 2 * np.outer(m * self._sum, m2)
+            - 2 * np.outer(m2, m * self._sum)
+            + T * np.outer(m2, m2)
+        )
+
+        mu = np.trace(sample) / p
+        delta = np.sum((sample - mu * np.eye(p)) ** 2) / p
+        beta = (np.sum(centered_quartic) / T - np.sum(sample**2)) / (p * T)
+        beta = min(beta, delta)
+        self.shrinkage = 0.0 if delta == 0 else beta / delta
+
+        shrunk = (1 - self.shrinkage) * sample
+        shrunk[np.diag_indices(p)] += self.shrinkage * mu
+        return shrunk
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state.update(
+            sum=self._sum,
+            sum_squares=self._sum_squares,
+            outer=self._outer,
+            outer_cubic=self._outer_cubic,
+            outer_quartic=self._outer_quartic,
+        )
+        return state
+
+    def load_state_dict(self, state: dict) -> "LedoitWolfCovariance":
+        super().load_state_dict(state)
+        self._sum = np.array(state["sum"], dtype=float)
+        self._sum_squares = np.array(state["sum_squares"], dtype=float)
+        self._outer = np.array(state["outer"], dtype=float)
+        self._outer_cubic = np.array(state["outer_cubic"], dtype=float)
+        self._outer_quartic = np.array(state["outer_quartic"], dtype=float)
+        return self
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> "LedoitWolfCovariance":
+        return cls(int(state["n"])).load_state_dict(state)
+
+
+RISK_MODELS = {
+    model.kind: model
+    for model in (RunningCovariance, EWMACovariance, LedoitWolfCovariance)
+}
+
+
+def load_risk_model(path) -> RiskModel:
+    """
+    Load an estimator saved with RiskModel.save.
+
+    Raises:
+        ValidationError: If the file does not hold a known risk model
+    """
+    with np.load(path) as data:
+        state = {key: data[key] for key in data.files}
+
+    kind = str(state.get("kind"))
+    if kind not in RISK_MODELS:
+        raise ValidationError(
+            "Unknown risk model", details=f"Expected one of {list(RISK_MODELS)}"
+        )
+    return RISK_MODELS[kind].from_state_dict(state)
+
+
+class FactorRiskModel:
+    """
+    Structured covariance F @ omega @ F.T + diag(d).
+
+    F holds the (n, k) loadings of the assets on k factors, omega is the (k, k)
+    factor covariance and d the idiosyncratic variance of each asset. The
+    optimizers never form the (n, n) matrix: they solve for the k factor
+    exposures F.T @ w as auxiliary variables and weight the n idiosyncratic
+    terms separately, so the problem grows as O(n * k) instead of O(n^2).
+
+    A model with k = 0 factors is a purely diagonal covariance, see `diagonal`.
+    For large universes with structured residual risk, e.g. within industries,
+    the idiosyncratic part may also be a sparse (n, n) matrix, which the
+    optimizers pass to the solver as a sparse quadratic form.
+
+    Example:
+        >>> model = FactorRiskModel.from_returns(history, k=10)
+        >>> z = single_period_optimization(r_t, w_t, gamma, phi_trade, phi_hold, sigma=model)
+    """
+
+    def __init__(self, loadings, factor_covariance=None, idiosyncratic=None):
+        """
+        Args:
+            loadings: Factor loadings F of shape (n, k), dense or scipy.sparse
+            factor_covariance: Factor covariance of shape (k, k), defaults to the
+                identity
+            idiosyncratic: Idiosyncratic variances of shape (n,), a scipy.sparse
+                (n, n) residual covariance, or None for no idiosyncratic risk
+
+        Raises:
+            ValidationError: If the shapes are inconsistent or values are not
+                finite, or idiosyncratic variances are negative
+        """
+        if sp.issparse(loadings):
+            # The optimizers take the loadings as an O(n * k) dense parameter
+            loadings = loadings.toarray()
+        loadings = np.asarray(loadings, dtype=float)
+        if loadings.ndim != 2 or loadings.shape[0] == 0:
+            raise ValidationError(
+                "Invalid factor loadings",
+                details=f"Expected an (n, k) matrix, got shape {loadings.shape}",
+            )
+        n, k = loadings.shape
+
+        if factor_covariance is None:
+            factor_covariance = np.eye(k)
+        factor_covariance = np.asarray(factor_covariance, dtype=float)
+        if factor_covariance.shape != (k, k):
+            raise ValidationError(
+                "Invalid factor covariance",
+                details=f"Expected shape ({k}, {k}), got {factor_covariance.shape}",
+            )
+
+        if sp.issparse(idiosyncratic):
+            if idiosyncratic.shape != (n, n):
+                raise ValidationError(
+                    "Invalid idiosyncratic variances",
+                    details=f"Expected shape ({n}, {n}), got {idiosyncratic.shape}",
+                )
+            idiosyncratic = sparse_covariance(idiosyncratic)
+        elif idiosyncratic is not None:
+            idiosyncratic = np.asarray(idiosyncratic, dtype=float)
+            if idiosyncratic.shape != (n,) or np.any(idiosyncratic < 0):
+                raise ValidationError(
+                    "Invalid idiosyncratic variances",
+                    details=f"Expected {n} non-negative values",
+                )
+
+        if k == 0 and idiosyncratic is None:
+            raise ValidationError(
+                "Invalid factor risk model",
+                details="A model without factors needs idiosyncratic variances",
+            )
+        if not (
+            np.all(np.isfinite(loadings))
+            and np.all(np.isfinite(factor_covariance))
+            and (
+                idiosyncratic is None
+                or sp.issparse(idiosyncratic)
+                or np.all(np.isfinite(idiosyncratic))
+            )
+        ):
+            raise ValidationError(
+                "Invalid factor risk model", details="Contains infinite or NaN values"
+            )
+
+        self.loadings = loadings
+        self.factor_covariance = factor_covariance
+        self.idiosyncratic = idiosyncratic
+        self._factor = None
+
+    @classmethod
+    def diagonal(cls, variances) -> "FactorRiskModel":
+        """
+        Model with no factors and the given per-asset variances.
+
+        Args:
+            variances: Variance of each asset, shape (n,)
+        """
+        variances = np.asarray(variances, dtype=float)
+        return cls(np.zeros((variances.size, 0)), idiosyncratic=variances.ravel())
+
+    @classmethod
+    def from_returns(cls, returns, k: int) -> "FactorRiskModel":
+        """
+        Fit a statistical factor model to a return history.
+
+        The factors are the first k principal components of the centered returns,
+        found with a thin SVD in O(T * n * min(T, n)) without forming the sample
+        covariance; the idiosyncratic variances are the variances of the
+        residuals.
+
+        Args:
+            returns: Return history of shape (T, n) with T >= 2
+            k: Number of factors, at most min(T, n)
+
+        Raises:
+            ValidationError: If the inputs are invalid
+        """
+        returns = np.asarray(returns, dtype=float)
+        if returns.ndim != 2 or returns.shape[0] < 2:
+            raise ValidationError(
+                "Invalid returns matrix",
+                details=f"Expected a (T, n) array with T >= 2, got shape {returns.shape}",
+            )
+        T, n = returns.shape
+        if not isinstance(k, (int, np.integer)) or not 0 <= k <= min(T, n):
+            raise ValidationError(
+                "Invalid number of factors",
+                details=f"k must be between 0 and {min(T, n)}, got {k}",
+            )
+
+        centered = returns - returns.mean(axis=0)
+        _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+        loadings = components[:k].T * (singular_values[:k] / np.sqrt(T - 1))
+        residuals = centered - (centered @ components[:k].T) @ components[:k]
+        idiosyncratic = np.einsum("ij,ij->j", residuals, residuals) / (T - 1)
+        return cls(loadings, idiosyncratic=idiosyncratic)
+
+    @property
+    def n(self) -> int:
+        """Number of assets"""
+        return self.loadings.shape[0]
+
+    @property
+    def k(self) -> int:
+        """Number of factors"""
+        return self.loadings.shape[1]
+
+    def factor(self) -> np.ndarray:
+        """
+        Matrix M = F @ L of shape (n, k), with L @ L.T the factor covariance.
+
+        M @ M.T is the factor part of the covariance; the idiosyncratic part is
+        kept separately.
+        """
+        if self._factor is None:
+            self._factor = self.loadings @ psd_factor(self.factor_covariance)
+        return self._factor
+
+    def covariance(self) -> np.ndarray:
+        """Dense (n, n) covariance, for inspection of small models"""
+        factor = self.factor()
+        covariance = factor @ factor.T
+        if sp.issparse(self.idiosyncratic):
+            covariance += self.idiosyncratic.toarray()
+        elif self.idiosyncratic is not None:
+            covariance[np.diag_indices(self.n)] += self.idiosyncratic
+        return covariance
+
+    def __repr__(self):
+        return f"<FactorRiskModel(n={self.n}, k={self.k})>"
+
+
+def risk_terms(sigma):
+    """
+    Split a risk input into the factor and residual parts the optimizers use.
+
+    The covariance is M @ M.T plus a residual R that is either diag(d), given as
+    the 1-D vector d, or a scipy.sparse matrix. Dense covariances and RiskModel
+    estimators have a full (n, n) factor M and no residual; a FactorRiskModel
+    has an (n, k) factor, or none when k = 0, and its idiosyncratic part as R; a
+    scipy.sparse covariance is all residual, so no n x n matrix is ever
+    densified.
+
+    Args:
+        sigma: A FactorRiskModel, a RiskModel, a scipy.sparse matrix or an (n, n)
+            covariance matrix
+
+    Returns:
+        tuple: (M, R), each None when the part is absent
+
+    Raises:
+        ValidationError: If sigma is not a valid covariance input
+    """
+    if isinstance(sigma, FactorRiskModel):
+        return (sigma.factor() if sigma.k else None), sigma.idiosyncratic
+    if sp.issparse(sigma):
+        return None, sparse_covariance(sigma)
+    return risk_factor(sigma), None
+
+
+def risk_factor(sigma) -> np.ndarray:
+    """
+    Return the factor M of a dense risk input, with covariance M @ M.T.
+
+    Args:
+        sigma: A RiskModel or an (n, n) covariance matrix
+
+    Raises:
+        ValidationError: If sigma is not a valid covariance input
+    """
+    if isinstance(sigma, RiskModel):
+        return sigma.factor()
+    return psd_factor(sigma)
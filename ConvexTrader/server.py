@@ -0,0 +1,487 @@
+"""
+Optimization server keeping compiled problems warm for many client processes.
+
+    python -m ConvexTrader.server --port 8765 --batch-window 0.002
+
+Clients POST JSON requests to /single_period and /multi_period, see
+OptimizationClient, and GET /health for request and batch counters. Requests
+arriving within batch_window seconds of each other are coalesced: single-period
+requests with the default cost functions and risk are solved together by the
+native batch solver, and all other requests are solved one after the other on
+compiled problems cached per shape, so no client pays for importing cvxpy or
+compiling a problem the server has already seen.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+import numpy as np
+import scipy.sparse as sp
+import cvxpy as cp
+from .single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from .multi_period_optimization import multi_period_optimization
+from .batch_optimization import single_period_optimization_batch
+from .native_solver import zero_return_rows
+from .risk_models import FactorRiskModel
+from .solver_config import SolverConfig, NATIVE_SOLVER
+from .async_optimization import PortfolioSnapshot
+from .portfolio_exceptions import ValidationError, OptimizationError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Seconds the batcher waits for more requests after the first of a batch
+DEFAULT_BATCH_WINDOW = 0.002
+
+# Maximum number of requests solved in one batch
+DEFAULT_MAX_BATCH_SIZE = 256
+
+# Largest accepted request body in bytes
+MAX_REQUEST_BYTES = 64 << 20
+
+# HTTP status of each error type returned to clients
+ERROR_STATUS = {"ValidationError": 400, "OptimizationError": 422}
+
+
+def _field(payload, name, default=None, required=True):
+    """Read a field of a request, raising ValidationError if it is missing"""
+    if name in payload:
+        return payload[name]
+    if required:
+        raise ValidationError("Missing request field", details=name)
+    return default
+
+
+def _array(payload, name):
+    """Read a numeric field as a float array"""
+    try:
+        return np.asarray(_field(payload, name), dtype=float)
+    except (TypeError, ValueError) as e:
+        raise ValidationError("Invalid request field", details=f"{name}: {e}")
+
+
+def _number(payload, name, kind=float):
+    """Read a scalar field"""
+    try:
+        return kind(_field(payload, name))
+    except (TypeError, ValueError) as e:
+        raise ValidationError("Invalid request field", details=f"{name}: {e}")
+
+
+def decode_sigma(value):
+    """
+    Covariance of a request: None, a nested list, a sparse matrix as COO
+    triplets or a FactorRiskModel dict, see OptimizationClient
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, dict) and "loadings" in value:
+            return FactorRiskModel(
+                _matrix(value["loadings"]),
+                _optional_matrix(value.get("factor_covariance")),
+                _optional_matrix(value.get("idiosyncratic")),
+            )
+        return _matrix(value)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValidationError("Invalid request field", details=f"sigma: {e}")
+
+
+def _matrix(value):
+    """Float array of a nested list, or a sparse matrix of a dict of COO triplets"""
+    if isinstance(value, dict):
+        if value.get("format") != "coo":
+            raise ValueError(f"unknown matrix format {value.get('format')!r}")
+        return sp.csc_array(
+            (
+                np.asarray(value["data"], dtype=float),
+                (
+                    np.asarray(value["row"], dtype=int),
+                    np.asarray(value["col"], dtype=int),
+                ),
+            ),
+            shape=tuple(value["shape"]),
+        )
+    return np.asarray(value, dtype=float)
+
+
+def _optional_matrix(value):
+    return None if value is None else _matrix(value)
+
+
+def decode_solver(value):
+    """Solver of a request: None, a solver name or SolverConfig keyword arguments"""
+    if isinstance(value, dict):
+        try:
+            return SolverConfig(**value)
+        except TypeError as e:
+            raise ValidationError("Invalid request field", details=f"solver: {e}")
+    return value
+
+
+class MicroBatcher:
+    """
+    Single solver thread coalescing requests that arrive close together.
+
+    The first request of a batch waits up to batch_window seconds for others;
+    requests that queued up while the previous batch was solving join the next
+    batch without waiting. Callers receive a Future resolving to the pair
+    (trades, solver name) or raising the optimization error.
+
+    Only single-period requests the native solver handles, with the default
+    cost functions and risk and no sigma, are coalesced into one native batch
+    solve per number of assets. CVXPY single-period requests and multi-period
+    requests in a batch are solved one after the other on their cached
+    compiled problems, so batching saves them queueing but not solver work.
+    """
+
+    def __init__(
+        self,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        """
+        Start the solver thread.
+
+        Args:
+            batch_window: Seconds to wait for more requests, 0 to only batch
+                requests that are already queued
+            max_batch_size: Maximum number of requests per batch
+
+        Raises:
+            ValidationError: If a setting is invalid
+        """
+        if not batch_window >= 0:
+            raise ValidationError(
+                "Invalid batch window",
+                details=f"batch_window must be non-negative, got {batch_window}",
+            )
+        if not isinstance(max_batch_size, (int, np.integer)) or max_batch_size <= 0:
+            raise ValidationError(
+                "Invalid batch size",
+                details=f"max_batch_size must be a positive integer, got {max_batch_size}",
+            )
+
+        self.batch_window = float(batch_window)
+        self.max_batch_size = int(max_batch_size)
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._thread = Thread(
+            target=self._run, name="ConvexTrader-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, kind: str, payload: dict) -> Future:
+        """
+        Queue a decoded request.
+
+        Args:
+            kind: "single_period" or "multi_period"
+            payload: Request fields, see OptimizationClient
+
+        Returns:
+            Future: Resolves to (trades, solver name)
+        """
+        future = Future()
+        self._queue.put((kind, payload, future))
+        return future
+
+    def stats(self) -> dict:
+        """Counters of solved requests and batches"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "batched_requests": self.batched_requests,
+                "largest_batch": self.largest_batch,
+                "queued": self._queue.qsize(),
+            }
+
+    def stop(self):
+        """Stop the solver thread once the queued requests are solved"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        """The batch started by first; a None entry means stop"""
+        jobs = [first]
+        stop = False
+        deadline = time.monotonic() + self.batch_window
+        while len(jobs) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    job = self._queue.get(timeout=timeout)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                stop = True
+                break
+            jobs.append(job)
+        return jobs, stop
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            jobs, stop = self._collect(first)
+            self._solve_batch(jobs)
+            with self._lock:
+                self.requests += len(jobs)
+                self.batches += 1
+                if len(jobs) > 1:
+                    self.batched_requests += len(jobs)
+                self.largest_batch = max(self.largest_batch, len(jobs))
+            if stop:
+                return
+
+    def _solve_batch(self, jobs):
+        """Solve the native single-period requests of a batch together, the rest one by one"""
+        groups = {}
+        single = []
+        for job in jobs:
+            future = job[2]
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                key = self._native_key(job)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if key is None:
+                single.append(job)
+            else:
+                groups.setdefault(key, []).append(job)
+
+        for group in groups.values():
+            if len(group) == 1:
+                single.extend(group)
+                continue
+            payloads = [job[1] for job in group]
+            try:
+                result = single_period_optimization_batch(
+                    np.stack([p["r_t"] for p in payloads]),
+                    np.stack([p["w_t"] for p in payloads]),
+                    np.array([p["gamma"] for p in payloads]),
+                    backend="native",
+                )
+            except Exception:
+                single.extend(group)
+                continue
+            for job, trades, status in zip(group, result.trades, result.status):
+                if status == cp.OPTIMAL:
+                    job[2].set_result((trades, NATIVE_SOLVER))
+                else:
+                    # Re-solved alone for the error of this request
+                    single.append(job)
+
+        for kind, payload, future in single:
+            try:
+                future.set_result(self._solve_one(kind, payload))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _native_key(job):
+        """Shape of a request the native batch solver handles, else None"""
+        kind, payload, _ = job
+        if kind != "single_period":
+            return None
+        payload["r_t"] = r_t = _array(payload, "r_t")
+        payload["w_t"] = w_t = _array(payload, "w_t")
+        payload["gamma"] = gamma = _number(payload, "gamma")
+        if (
+            payload.get("engine", "auto") not in ("auto", "native")
+            or payload.get("sigma") is not None
+            or r_t.ndim != 1
+            or r_t.shape != w_t.shape
+            or not gamma >= 0
+            or zero_return_rows(r_t[None, :])[0]
+        ):
+            return None
+        return len(r_t)
+
+    @staticmethod
+    def _solve_one(kind, payload):
+        """Solve one request on the cached compiled problem of its shape"""
+        if kind == "single_period":
+            result, solver = single_period_optimization(
+                _array(payload, "r_t"),
+                _array(payload, "w_t"),
+                _number(payload, "gamma"),
+                default_phi_trade,
+                default_phi_hold,
+                payload.get("engine", "auto"),
+                decode_sigma(payload.get("sigma")),
+                solver=decode_solver(payload.get("solver")),
+                return_solver=True,
+            )
+            if result is None:
+                raise OptimizationError("Single-period optimization failed")
+            return result, solver
+
+        H = _number(payload, "H", int)
+        result, solver = multi_period_optimization(
+            H,
+            _array(payload, "r_t"),
+            PortfolioSnapshot((), _array(payload, "w_0")),
+            _array(payload, "gamma_t"),
+            _array(payload, "psi_t"),
+            _array(payload, "phi_trade"),
+            _array(payload, "phi_hold"),
+            decode_sigma(payload.get("sigma")),
+            solver=decode_solver(payload.get("solver")),
+            return_solver=True,
+        )
+        if result is None:
+            raise OptimizationError("Multi-period optimization failed")
+        return result, solver
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive connections, so clients do not reconnect per request
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY the body
+    # waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, error, message, details=None):
+        self._send(status, {"error": error, "message": message, "details": details})
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_error(404, "NotFound", f"Unknown path {self.path}")
+            return
+        self._send(200, {"status": "ok", **self.server.batcher.stats()})
+
+    def do_POST(self):
+        kind = self.path.strip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send_error(413, "RequestTooLarge", "Request body too large")
+            return
+        body = self.rfile.read(length)
+        if kind not in ("single_period", "multi_period"):
+            self._send_error(404, "NotFound", f"Unknown path {self.path}")
+            return
+
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be a JSON object")
+        except ValueError as e:
+            self._send_error(400, "ValidationError", "Invalid request body", str(e))
+            return
+
+        try:
+            trades, solver = self.server.batcher.submit(kind, payload).result()
+        except (ValidationError, OptimizationError) as e:
+            name = type(e).__name__
+            self._send_error(ERROR_STATUS[name], name, e.message, e.details)
+            return
+        except Exception as e:
+            self._send_error(500, "ServerError", "Internal server error", repr(e))
+            return
+        self._send(200, {"trades": trades.tolist(), "solver": solver})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class OptimizationServer(ThreadingHTTPServer):
+    """
+    HTTP server answering optimization requests through a MicroBatcher.
+
+    Each connection is served by its own thread, which decodes the request and
+    waits for the batcher; all solves run on the batcher thread.
+
+    Example:
+        >>> server = OptimizationServer(("127.0.0.1", 0))
+        >>> Thread(target=server.serve_forever, daemon=True).start()
+        >>> client = OptimizationClient(server.url)
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=(DEFAULT_HOST, DEFAULT_PORT),
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        verbose: bool = False,
+    ):
+        """
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            batch_window: Seconds the batcher waits for more requests
+            max_batch_size: Maximum number of requests per batch
+            verbose: Whether to log every request to stderr
+        """
+        self.batcher = MicroBatcher(batch_window, max_batch_size)
+        self.verbose = verbose
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ConvexTrader.server",
+        description="Serve portfolio optimizations over HTTP",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    server = OptimizationServer(
+        (args.host, args.port), args.batch_window, args.max_batch_size, args.verbose
+    )
+    # The first line tells scripts starting the server with --port 0 where it is
+    print(f"Serving on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
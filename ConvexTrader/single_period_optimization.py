@@ -1,7 +1,43 @@
+import time
 import numpy as np
 import cvxpy as cp
+import scipy.sparse as sp
+from collections import OrderedDict
+from threading import Lock, RLock, local
+from .native_solver import solve_default
+from .risk_models import risk_terms, residuals_equal
+from .sparse_utils import to_dense_vector, sparse_trades
+from .solver_config import SolverConfig, NATIVE_SOLVER
+from .instrumentation import problem_stats, make_timings, OptimizationStats
+from .instrumentation import has_hooks, emit
+from .problem_cache import function_key, load_problem, save_problem
+from .result_cache import input_digest
 from .portfolio_exceptions import ValidationError, OptimizationError
 
+# Maximum number of compiled problems kept by get_single_period_optimizer
+OPTIMIZER_CACHE_SIZE = 32
+
+_optimizer_cache = OrderedDict()
+_optimizer_cache_lock = Lock()
+
+# Private optimizer caches of threads that called use_thread_optimizer_cache
+_thread_caches = local()
+
+# Solver engines accepted by single_period_optimization
+ENGINES = ("auto", "cvxpy", "native")
+
+
+def default_phi_trade(z):
+    """Default trading cost: L1 norm of the trade vector"""
+    return cp.sum(cp.abs(z))
+
+
+def default_phi_hold(w):
+    """Default holding cost: sum of squared post-trade weights"""
+    # A single sum_squares atom rather than an elementwise square: CVXPY expands
+    # the coefficients of every elementwise quadratic term against all parameters
+    return cp.sum_squares(w)
+
 
 def validate_inputs(r_t, w_t, gamma):
     """Validate input parameters"""
@@ -42,74 +78,632 @@ def validate_cost_functions(trade_cost, hold_cost):
         )
 
 
-def single_period_optimization(r_t, w_t, gamma, phi_trade, phi_hold):
+def validate_engine(engine, phi_trade, phi_hold, sigma=None):
     """
-    Solve single-period portfolio optimization problem.
+    Resolve the engine name to "cvxpy" or "native".
+
+    "auto" picks the native solver when both cost functions are the defaults and
+    no covariance is given.
+
+    Raises:
+        ValidationError: If the engine is unknown, or "native" is requested with
+            custom cost functions or a covariance
+    """
+    if engine not in ENGINES:
+        raise ValidationError(
+            "Invalid engine", details=f"Expected one of {ENGINES}, got {engine}"
+        )
+
+    defaults = (
+        phi_trade is default_phi_trade
+        and phi_hold is default_phi_hold
+        and sigma is None
+    )
+    if engine == "native" and not defaults:
+        raise ValidationError(
+            "Invalid engine",
+            details="The native engine only supports the default cost functions and risk",
+        )
+    if engine == "auto":
+        return "native" if defaults else "cvxpy"
+    return engine
+
+
+def risk_parameters(sigma, n):
+    """
+    Split a covariance input into the values the problem is built and solved with.
 
     Args:
-        r_t: Expected returns vector
-        w_t: Current portfolio weights
-        gamma: Risk aversion parameter
-        phi_trade: Trading cost function
-        phi_hold: Holding cost function
+        sigma: Covariance matrix, RiskModel or FactorRiskModel
+        n: Number of assets
 
     Returns:
-        numpy.ndarray: Optimal trade vector
+        tuple: (M, R) for the covariance M @ M.T + R, each None when the part is
+        absent; R is a vector of variances or a scipy.sparse matrix, see
+        risk_models.risk_terms
 
     Raises:
-        ValidationError: If input parameters are invalid
-        OptimizationError: If optimization problem fails
+        ValidationError: If sigma is invalid or does not cover n assets
     """
-    try:
-        validate_inputs(r_t, w_t, gamma)
+    factor, residual = risk_terms(sigma)
+    size = factor.shape[0] if factor is not None else residual.shape[0]
+    if size != n:
+        raise ValidationError(
+            "Dimension mismatch between returns and covariance",
+            details=f"Returns: {n}, Covariance: {size}",
+        )
+    return factor, residual
 
-        # Check for numerical issues
-        if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
-            raise OptimizationError(
-                "Invalid returns", details="Contains infinite or NaN values"
+
+def trade_cap(r_t, w_t):
+    """
+    Upper bound on the L1 norm of the trade vector.
+
+    When all expected returns are zero the trade is restricted to a 1e-3 L1 ball,
+    otherwise the returned bound is never binding because the post-trade weights
+    lie on the unit simplex.
+    """
+    if np.allclose(r_t, 0):
+        return 1e-3
+    return 2.0 + np.sum(np.abs(w_t))
+
+
+class SinglePeriodOptimizer:
+    """
+    Compile-once single-period portfolio optimization problem.
+
+    The problem is built a single time for a given number of assets and pair of
+    cost functions. Expected returns, current weights and the risk aversion
+    parameter are CVXPY parameters, so the problem is DPP-compliant and each call
+    to `solve` only updates parameter values and re-solves with warm start. The
+    name of the solver of the last solve is kept in `solver_used` and its
+    timings and solver statistics are available as `last_stats`.
+
+    Example:
+        >>> optimizer = SinglePeriodOptimizer(3, default_phi_trade, default_phi_hold)
+        >>> z = optimizer.solve(np.array([0.05, 0.07, 0.02]), w_t, 1.0)
+    """
+
+    def __init__(self, n, phi_trade, phi_hold, risk_factors=None, idiosyncratic=False):
+        """
+        Build the parameterized problem.
+
+        Without a covariance the risk term is gamma * sum(w_next ** 2) / n, i.e. an
+        identity covariance scaled by 1 / n. For a covariance M @ M.T + R the
+        risk term is gamma * (sum(x ** 2) + w_next @ R @ w_next), where the k
+        factor exposures x = L.T @ w_next are auxiliary variables defined
+        through an (n, k) loadings parameter L that `solve` sets to M, and the
+        residual R is diagonal or sparse. The problem therefore has
+        O(n * k + nnz(R)) nonzeros and never forms a dense (n, n) covariance.
+
+        Args:
+            n: Number of assets
+            phi_trade: Trading cost function
+            phi_hold: Holding cost function
+            risk_factors: Number of columns k of the covariance factor, or None
+                for no factor term
+            idiosyncratic: Whether the covariance has a residual term; without it
+                and without risk_factors the identity covariance is used
+
+        Raises:
+            ValidationError: If the number of assets is invalid
+            OptimizationError: If the cost functions do not produce a DPP problem
+        """
+        if not isinstance(n, (int, np.integer)) or n <= 0:
+            raise ValidationError(
+                "Invalid number of assets", details=f"n must be positive, got {n}"
             )
 
-        n = len(r_t)
-        z_t = cp.Variable(n)
+        self.n = int(n)
+        self.phi_trade = phi_trade
+        self.phi_hold = phi_hold
+        self.risk_factors = risk_factors
+
+        self.r_t = cp.Parameter(self.n, name="r_t")
+        self.w_t = cp.Parameter(self.n, name="w_t")
+        self.gamma = cp.Parameter(nonneg=True, name="gamma")
+        self.trade_cap = cp.Parameter(nonneg=True, name="trade_cap")
+
+        self.z = cp.Variable(self.n, name="z")
+        # Post-trade weights; keeps every product of a parameter with an
+        # expression parameter-free, as required by DPP
+        self.w_next = cp.Variable(self.n, name="w_next")
 
-        # Validate objective function components
         try:
-            trade_cost = 0.01 * phi_trade(z_t)
-            hold_cost = 0.01 * phi_hold(w_t + z_t)
-            validate_cost_functions(trade_cost, hold_cost)
+            self._trade_cost = 0.01 * phi_trade(self.z)
+            self._hold_cost = 0.01 * phi_hold(self.w_next)
+            validate_cost_functions(self._trade_cost, self._hold_cost)
         except Exception as e:
             raise OptimizationError("Invalid cost functions", details=str(e))
 
-        trade_cost = 0.01 * phi_trade(z_t)
-        hold_cost = 0.01 * phi_hold(w_t + z_t)
+        self.loadings = None
+        self._exposures = None
+        if risk_factors is not None:
+            self.loadings = cp.Parameter((self.n, risk_factors), name="loadings")
+            self._exposures = cp.Variable(risk_factors, name="exposures")
+
+        self.idiosyncratic = idiosyncratic
+        self._build(np.zeros(self.n) if idiosyncratic else None)
+
+        self.solver_used = None
+        self._timings = None
+        self._lock = RLock()
+
+    def _build(self, residual=None):
+        """
+        Build the problem for the given residual covariance.
 
-        sigma_t = np.eye(n)
-        risk = gamma * (cp.quad_form(w_t + z_t, sigma_t) / n)
+        The residual, a vector of variances or a sparse matrix, is a constant of
+        the problem: scaling the post-trade weights elementwise by a parameter
+        makes CVXPY's compiled problem grow quadratically with the number of
+        assets. The problem is rebuilt when the residual changes between calls.
 
-        objective = cp.Maximize(r_t.T @ z_t - risk - trade_cost - hold_cost)
+        With a problem cache in use, see set_problem_cache, a problem compiled
+        earlier for the same structure is loaded instead, and a new problem is
+        compiled and stored.
 
-        constraints = [cp.sum(w_t + z_t) == 1, z_t >= -w_t]
+        Raises:
+            OptimizationError: If the problem is not DCP or DPP
+        """
+        key = self._problem_key(residual)
+        if load_problem(self, key):
+            return
 
-        if np.allclose(r_t, 0):
-            constraints.append(cp.norm(z_t, 1) <= 1e-3)
+        # Epigraph variable for the expected return, which keeps the quadratic
+        # part of the objective parameter-free and the compiled problem sparse
+        expected_return = cp.Variable(name="expected_return")
+
+        constraints = [
+            expected_return <= self.r_t @ self.z,
+            self.w_next == self.w_t + self.z,
+            cp.sum(self.w_next) == 1,
+            self.w_next >= 0,
+            cp.norm(self.z, 1) <= self.trade_cap,
+        ]
+
+        # A piecewise-linear trading cost moves to a scalar epigraph as well, so
+        # its auxiliary variables stay out of the quadratic objective
+        trade_cost = self._trade_cost
+        if trade_cost.is_pwl():
+            trade_cost = cp.Variable(name="trade_cost")
+            constraints.append(self._trade_cost <= trade_cost)
+
+        if self.loadings is None and residual is None:
+            risk = cp.sum_squares(self.w_next) / self.n
+        else:
+            # The loadings only enter the linear constraint defining the factor
+            # exposures, for the same reason
+            risk = 0
+            if self.loadings is not None:
+                constraints.append(self._exposures == self.loadings.T @ self.w_next)
+                risk = risk + cp.sum_squares(self._exposures)
+            if sp.issparse(residual):
+                # Positive semidefiniteness is assumed, checking it would
+                # need a factorization
+                risk = risk + cp.quad_form(self.w_next, cp.psd_wrap(residual))
+            elif residual is not None:
+                risk = risk + cp.sum_squares(
+                    cp.multiply(np.sqrt(residual), self.w_next)
+                )
+
+        objective = cp.Maximize(
+            expected_return - self.gamma * risk - trade_cost - self._hold_cost
+        )
 
         problem = cp.Problem(objective, constraints)
 
         if not problem.is_dcp():
             raise OptimizationError("Problem does not satisfy DCP rules")
+        if not problem.is_dpp():
+            raise OptimizationError("Problem does not satisfy DPP rules")
 
-        try:
-            problem.solve()
+        self.problem = problem
+        self._residual = residual
+        save_problem(self, key)
+
+    def _problem_key(self, residual):
+        """Problem cache key of the structure, or None for cost functions without a stable name"""
+        trade, hold = function_key(self.phi_trade), function_key(self.phi_hold)
+        if trade is None or hold is None:
+            return None
+        return (
+            "single_period",
+            self.n,
+            trade,
+            hold,
+            self.risk_factors,
+            self.idiosyncratic,
+            input_digest([residual]),
+        )
+
+    def solve(self, r_t, w_t, gamma, sigma=None, solver=None):
+        """
+        Solve the problem for new parameter values.
+
+        Args:
+            r_t: Expected returns vector
+            w_t: Current portfolio weights
+            gamma: Risk aversion parameter
+            sigma: Covariance matrix, scipy.sparse covariance, RiskModel or
+                FactorRiskModel, required when the problem was built with a
+                covariance
+            solver: Solver name or SolverConfig, defaults to CVXPY's choice
+
+        Returns:
+            numpy.ndarray: Optimal trade vector
+
+        Raises:
+            ValidationError: If input parameters are invalid
+            OptimizationError: If optimization problem fails
+        """
+        start = time.perf_counter()
+        r_t, w_t = to_dense_vector(r_t), to_dense_vector(w_t)
+        validate_inputs(r_t, w_t, gamma)
+        r_t = np.asarray(r_t, dtype=float)
+        w_t = np.asarray(w_t, dtype=float)
+
+        if len(r_t) != self.n:
+            raise ValidationError(
+                "Dimension mismatch between returns and optimizer",
+                details=f"Returns: {len(r_t)}, Optimizer: {self.n}",
+            )
+        if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
+            raise OptimizationError(
+                "Invalid returns", details="Contains infinite or NaN values"
+            )
+
+        loadings = residual = None
+        if self.loadings is not None or self.idiosyncratic:
+            if sigma is None:
+                raise ValidationError(
+                    "Missing covariance",
+                    details="The optimizer was built with a covariance",
+                )
+            loadings, residual = risk_parameters(sigma, self.n)
+            if (loadings is None) != (self.loadings is None) or (
+                loadings is not None and loadings.shape != self.loadings.shape
+            ):
+                raise ValidationError(
+                    "Dimension mismatch between covariance and optimizer",
+                    details=f"Factors: {None if loadings is None else loadings.shape[1]}, "
+                    f"Optimizer: {self.risk_factors}",
+                )
+            if (residual is None) == self.idiosyncratic:
+                raise ValidationError(
+                    "Dimension mismatch between covariance and optimizer",
+                    details="Covariance and optimizer differ in the idiosyncratic term",
+                )
 
-            if problem.status == cp.OPTIMAL:
-                return z_t.value
-            else:
+        validation = time.perf_counter() - start
+        return self._solve(r_t, w_t, gamma, loadings, residual, solver, validation)
+
+    def _solve(
+        self,
+        r_t,
+        w_t,
+        gamma,
+        loadings=None,
+        residual=None,
+        solver=None,
+        validation=0.0,
+        build=0.0,
+    ):
+        """
+        Update parameter values and re-solve; inputs are assumed validated.
+
+        loadings and residual are the values from risk_parameters, for
+        optimizers built with a covariance. validation and build are the times
+        the caller spent on those phases, reported in last_stats.
+        """
+        config = SolverConfig.coerce(solver)
+        with self._lock:
+            # Rebuilt first: a problem loaded from the problem cache brings its
+            # own parameters
+            if self.idiosyncratic and not residuals_equal(residual, self._residual):
+                start = time.perf_counter()
+                self._build(residual)
+                build += time.perf_counter() - start
+            self.r_t.value = r_t
+            self.w_t.value = w_t
+            self.gamma.value = gamma
+            self.trade_cap.value = trade_cap(r_t, w_t)
+            if self.loadings is not None:
+                self.loadings.value = loadings
+
+            start = time.perf_counter()
+            try:
+                self.solver_used = config.solve(self.problem)
+            except cp.error.SolverError as e:
+                self.solver_used = self._timings = None
+                raise OptimizationError("Solver failed", details=str(e))
+            self._timings = (validation, build, time.perf_counter() - start)
+
+            if has_hooks():
+                emit(self.last_stats)
+
+            if self.problem.status != cp.OPTIMAL:
                 raise OptimizationError(
-                    "Optimization failed", details=f"Solver status: {problem.status}"
+                    "Optimization failed",
+                    details=f"Solver status: {self.problem.status}",
                 )
 
-        except cp.error.SolverError as e:
-            raise OptimizationError("Solver failed", details=str(e))
+            return self.z.value.copy()
+
+    @property
+    def last_stats(self):
+        """OptimizationStats of the last solve, or None before the first one"""
+        with self._lock:
+            if self._timings is None:
+                return None
+            return problem_stats(
+                "single_period",
+                self.problem,
+                self.solver_used,
+                self._timings,
+                self.n,
+                1,
+            )
+
+
+def native_stats(n, validation, solve):
+    """OptimizationStats of a solve by the native solver"""
+    return OptimizationStats(
+        "single_period",
+        NATIVE_SOLVER,
+        cp.OPTIMAL,
+        None,
+        make_timings(validation=validation, solve=solve),
+        None,
+        None,
+        n,
+        1,
+        None,
+        None,
+    )
+
+
+def get_single_period_optimizer(
+    n, phi_trade, phi_hold, risk_factors=None, idiosyncratic=False
+):
+    """
+    Return a cached SinglePeriodOptimizer for the given shape and cost functions.
+
+    Compiled problems are kept in a least-recently-used cache keyed by the number
+    of assets, the identity of the cost functions and the structure of the
+    covariance, holding at most OPTIMIZER_CACHE_SIZE entries. Threads that called
+    use_thread_optimizer_cache look up their own cache instead.
+
+    Args:
+        n: Number of assets
+        phi_trade: Trading cost function
+        phi_hold: Holding cost function
+        risk_factors: Number of columns of the covariance factor, or None for
+            no factor term
+        idiosyncratic: Whether the covariance has a diagonal term
+
+    Returns:
+        SinglePeriodOptimizer: Compiled optimizer for the requested shape
+    """
+    key = (n, phi_trade, phi_hold, risk_factors, idiosyncratic)
+    thread_cache = getattr(_thread_caches, "cache", None)
+    if thread_cache is not None:
+        optimizer = thread_cache.get(key)
+        if optimizer is None:
+            optimizer = thread_cache[key] = SinglePeriodOptimizer(
+                n, phi_trade, phi_hold, risk_factors, idiosyncratic
+            )
+        thread_cache.move_to_end(key)
+        while len(thread_cache) > OPTIMIZER_CACHE_SIZE:
+            thread_cache.popitem(last=False)
+        return optimizer
+
+    with _optimizer_cache_lock:
+        optimizer = _optimizer_cache.get(key)
+        if optimizer is not None:
+            _optimizer_cache.move_to_end(key)
+            return optimizer
+
+    optimizer = SinglePeriodOptimizer(
+        n, phi_trade, phi_hold, risk_factors, idiosyncratic
+    )
+
+    with _optimizer_cache_lock:
+        optimizer = _optimizer_cache.setdefault(key, optimizer)
+        _optimizer_cache.move_to_end(key)
+        while len(_optimizer_cache) > OPTIMIZER_CACHE_SIZE:
+            _optimizer_cache.popitem(last=False)
+    return optimizer
+
+
+def clear_optimizer_cache():
+    """Drop all cached single-period optimizers, and the private cache of this thread"""
+    with _optimizer_cache_lock:
+        _optimizer_cache.clear()
+    if getattr(_thread_caches, "cache", None) is not None:
+        _thread_caches.cache.clear()
+
+
+def use_thread_optimizer_cache():
+    """
+    Give the calling thread its own cache of single-period optimizers.
+
+    An optimizer solves one problem at a time, so threads sharing the cached
+    optimizer of a shape wait for each other. Worker threads of an
+    OptimizationExecutor call this so that their solves overlap, at the cost of
+    compiling each shape once per thread.
+    """
+    _thread_caches.cache = OrderedDict()
+
+
+def _solve_single(
+    r_t, w_t, gamma, phi_trade, phi_hold, engine, sigma, config, start, with_stats
+):
+    """
+    Solve validated single-period inputs with the native solver or CVXPY.
+
+    start is the perf_counter time the call began, from which validation is
+    timed. Returns the trade, the solver name and, if with_stats is set, the
+    OptimizationStats.
+    """
+    stats = None
+    if engine == "native" and not np.allclose(r_t, 0):
+        validated = time.perf_counter()
+        z = solve_default(r_t, w_t, gamma)
+        if with_stats or has_hooks():
+            stats = native_stats(
+                len(r_t), validated - start, time.perf_counter() - validated
+            )
+            emit(stats)
+        return z, NATIVE_SOLVER, stats
+
+    loadings = residual = None
+    if sigma is not None:
+        loadings, residual = risk_parameters(sigma, len(r_t))
+
+    validated = time.perf_counter()
+    optimizer = get_single_period_optimizer(
+        len(r_t),
+        phi_trade,
+        phi_hold,
+        None if loadings is None else loadings.shape[1],
+        residual is not None,
+    )
+    with optimizer._lock:
+        z = optimizer._solve(
+            r_t,
+            w_t,
+            gamma,
+            loadings,
+            residual,
+            config,
+            validated - start,
+            time.perf_counter() - validated,
+        )
+        if with_stats:
+            stats = optimizer.last_stats
+        return z, optimizer.solver_used, stats
+
+
+def single_period_optimization(
+    r_t,
+    w_t,
+    gamma,
+    phi_trade,
+    phi_hold,
+    engine="auto",
+    sigma=None,
+    sparse=False,
+    solver=None,
+    return_solver=False,
+    return_stats=False,
+    cache=None,
+):
+    """
+    Solve single-period portfolio optimization problem.
+
+    With the default cost functions the problem is solved exactly by the
+    vectorized native solver, see native_solver.solve_default, unless engine is
+    "cvxpy". When all expected returns are zero the CVXPY problem is always used,
+    since it also limits the size of the trade.
+
+    The risk term is gamma * sum(w_next ** 2) / n by default. Passing sigma, a
+    covariance matrix or a RiskModel such as EWMACovariance, replaces it with
+    gamma * w_next @ sigma @ w_next, which is solved with CVXPY. For large
+    universes pass a FactorRiskModel or a scipy.sparse covariance instead, which
+    keep the problem size linear in the number of assets and nonzeros.
+
+    Expected returns and weights may be scipy.sparse vectors, and with
+    sparse=True the trade comes back as a scipy.sparse array, so a large
+    universe never needs a dense (n, n) matrix.
+
+    solver selects the CVXPY solver, its tolerances and limits, and the
+    fallback solvers tried when it fails; see SolverConfig. It does not affect
+    the native solver, whose solver name is reported as NATIVE.
+
+    With return_stats the OptimizationStats of the solve, with per-phase
+    timings, solver statistics and problem size, are returned as well; they
+    are also passed to the hooks registered with instrumentation.register_hook.
+
+    With a ResultCache, inputs matching a cached result within its tolerance
+    return that result without solving; its solver name and stats are those of
+    the solve that produced it, and hooks are not called.
+
+    Args:
+        r_t: Expected returns vector
+        w_t: Current portfolio weights
+        gamma: Risk aversion parameter
+        phi_trade: Trading cost function
+        phi_hold: Holding cost function
+        engine: "auto", "cvxpy" or "native"
+        sigma: Optional (n, n) covariance matrix, scipy.sparse covariance,
+            RiskModel or FactorRiskModel
+        sparse: Whether to return the trade as a scipy.sparse.csr_array, see
+            sparse_utils.sparse_trades
+        solver: Solver name or SolverConfig, defaults to CVXPY's choice
+        return_solver: Whether to also return the name of the solver used
+        return_stats: Whether to also return the OptimizationStats
+        cache: Optional ResultCache of results of earlier calls
+
+    Returns:
+        numpy.ndarray: Optimal trade vector, or a sparse array if sparse is set;
+        with return_solver or return_stats, a tuple of the trade followed by the
+        solver name and the stats that were requested
+
+    Raises:
+        ValidationError: If input parameters are invalid
+        OptimizationError: If optimization problem fails
+    """
+    try:
+        start = time.perf_counter()
+        r_t, w_t = to_dense_vector(r_t), to_dense_vector(w_t)
+        validate_inputs(r_t, w_t, gamma)
+
+        # Check for numerical issues
+        if np.any(np.isinf(r_t)) or np.any(np.isnan(r_t)):
+            raise OptimizationError(
+                "Invalid returns", details="Contains infinite or NaN values"
+            )
+
+        r_t = np.asarray(r_t, dtype=float)
+        w_t = np.asarray(w_t, dtype=float)
+        engine = validate_engine(engine, phi_trade, phi_hold, sigma)
+        config = SolverConfig.coerce(solver)
+
+        key = cached = None
+        if cache is not None:
+            key = cache.key(
+                (r_t, w_t, gamma, sigma), phi_trade, phi_hold, engine, solver
+            )
+            cached = cache.get(key)
+
+        if cached is not None:
+            z, solver_used, stats = cached
+            z = z.copy()
+        else:
+            z, solver_used, stats = _solve_single(
+                r_t,
+                w_t,
+                gamma,
+                phi_trade,
+                phi_hold,
+                engine,
+                sigma,
+                config,
+                start,
+                return_stats or cache is not None,
+            )
+            if cache is not None:
+                cache.put(key, (z.copy(), solver_used, stats))
+
+        if sparse:
+            z = sparse_trades(z)
+        if not (return_solver or return_stats):
+            return z
+        return (
+            (z,)
+            + ((solver_used,) if return_solver else ())
+            + ((stats,) if return_stats else ())
+        )
 
     except (ValidationError, OptimizationError):
         raise
@@ -0,0 +1,221 @@
+import cvxpy as cp
+from .portfolio_exceptions import ValidationError
+
+# Name reported as the solver of single-period problems solved by native_solver
+NATIVE_SOLVER = "NATIVE"
+
+# Solver-specific names of the generic tolerance, iteration and time limits.
+# Limits a solver has no equivalent for are not passed to it.
+SOLVER_OPTION_NAMES = {
+    cp.OSQP: {
+        "tolerance": ("eps_abs", "eps_rel"),
+        "max_iters": ("max_iter",),
+        "time_limit": ("time_limit",),
+    },
+    cp.CLARABEL: {
+        "tolerance": ("tol_gap_abs", "tol_gap_rel", "tol_feas"),
+        "max_iters": ("max_iter",),
+        "time_limit": ("time_limit",),
+    },
+    cp.SCS: {
+        "tolerance": ("eps_abs", "eps_rel"),
+        "max_iters": ("max_iters",),
+        "time_limit": ("time_limit_secs",),
+    },
+    cp.ECOS: {
+        "tolerance": ("abstol", "reltol", "feastol"),
+        "max_iters": ("max_iters",),
+    },
+}
+
+
+class SolverConfig:
+    """
+    Solver selection and settings for the CVXPY optimizers.
+
+    The solvers are tried in order, the primary solver followed by the
+    fallbacks, until one returns an accepted status; a solver that raises, is not
+    installed or stops at an unaccepted status, e.g. at its iteration or time
+    limit, hands over to the next one. The generic tolerance, max_iters and
+    time_limit are translated to the option names of each solver, see
+    SOLVER_OPTION_NAMES, and options passes solver-specific settings through
+    unchanged.
+
+    The name of the solver that produced the result is reported as solver_used
+    by the optimizers.
+
+    Example:
+        >>> config = SolverConfig("OSQP", fallbacks=["CLARABEL"], tolerance=1e-4)
+        >>> z, solver = single_period_optimization(
+        ...     r_t, w_t, 1.0, phi_trade, phi_hold, solver=config, return_solver=True
+        ... )
+    """
+
+    def __init__(
+        self,
+        solver: str = None,
+        fallbacks=(),
+        tolerance: float = None,
+        max_iters: int = None,
+        time_limit: float = None,
+        warm_start: bool = True,
+        options: dict = None,
+    ):
+        """
+        Configure the solvers.
+
+        Args:
+            solver: Name of the primary solver, e.g. "OSQP" or "CLARABEL", or None
+                for the solver CVXPY picks
+            fallbacks: Names of the solvers tried in order when the previous one
+                fails
+            tolerance: Absolute and relative convergence tolerance, or None for
+                the solver defaults
+            max_iters: Iteration limit of each solver, or None for the default
+            time_limit: Time limit in seconds of each solver, or None for no limit
+            warm_start: Whether to warm start from the previous solution
+            options: Mapping of solver name to a dict of solver-specific options,
+                applied after the generic settings
+
+        Raises:
+            ValidationError: If a solver name or setting is invalid
+        """
+        if isinstance(fallbacks, str):
+            fallbacks = [fallbacks]
+        solvers = [None if solver is None else self._solver_name(solver)]
+        solvers += [self._solver_name(name) for name in fallbacks]
+
+        if tolerance is not None and not tolerance > 0:
+            raise ValidationError(
+                "Invalid solver tolerance",
+                details=f"tolerance must be positive, got {tolerance}",
+            )
+        if max_iters is not None and (not isinstance(max_iters, int) or max_iters <= 0):
+            raise ValidationError(
+                "Invalid solver iteration limit",
+                details=f"max_iters must be a positive integer, got {max_iters}",
+            )
+        if time_limit is not None and not time_limit > 0:
+            raise ValidationError(
+                "Invalid solver time limit",
+                details=f"time_limit must be positive, got {time_limit}",
+            )
+
+        options = dict(options or {})
+        for name, solver_options in list(options.items()):
+            if not isinstance(solver_options, dict):
+                raise ValidationError(
+                    "Invalid solver options",
+                    details=f"Expected a dict of options for {name}",
+                )
+            options[self._solver_name(name)] = options.pop(name)
+
+        self.solvers = tuple(solvers)
+        self.tolerance = tolerance
+        self.max_iters = max_iters
+        self.time_limit = time_limit
+        self.warm_start = bool(warm_start)
+        self.options = options
+
+    @staticmethod
+    def _solver_name(name) -> str:
+        """Upper-case solver name, validated against the solvers CVXPY knows"""
+        if not isinstance(name, str) or name.upper() not in cp.settings.SOLVERS:
+            raise ValidationError("Invalid solver", details=f"Unknown solver {name!r}")
+        return name.upper()
+
+    @classmethod
+    def coerce(cls, solver) -> "SolverConfig":
+        """
+        Return solver as a SolverConfig.
+
+        Args:
+            solver: None for the default configuration, a solver name or a
+                SolverConfig
+
+        Raises:
+            ValidationError: If solver is neither
+        """
+        if solver is None:
+            return DEFAULT_SOLVER_CONFIG
+        if isinstance(solver, SolverConfig):
+            return solver
+        if isinstance(solver, str):
+            return cls(solver)
+        raise ValidationError(
+            "Invalid solver",
+            details=f"Expected a solver name or SolverConfig, got {type(solver).__name__}",
+        )
+
+    def solver_options(self, solver: str) -> dict:
+        """
+        Keyword arguments passed to problem.solve for the given solver.
+
+        Args:
+            solver: Solver name, or None for the solver CVXPY picks
+
+        Returns:
+            dict: Translated generic settings and the solver-specific options
+        """
+        names = SOLVER_OPTION_NAMES.get(solver, {})
+        options = {}
+        for setting in ("tolerance", "max_iters", "time_limit"):
+            value = getattr(self, setting)
+            if value is not None:
+                for option in names.get(setting, ()):
+                    options[option] = value
+        options.update(self.options.get(solver, {}))
+        return options
+
+    def solve(self, problem: cp.Problem, statuses=(cp.OPTIMAL,)) -> str:
+        """
+        Solve a problem with the first solver of the chain that succeeds.
+
+        Args:
+            problem: CVXPY problem
+            statuses: Problem statuses accepted as success
+
+        Returns:
+            str: Name of the solver whose result the problem holds; if every
+            solver stopped at an unaccepted status, the problem holds the status
+            of the last one
+
+        Raises:
+            cvxpy.error.SolverError: If the last solver of the chain raised, with
+                the failures of every solver in the message
+        """
+        failures = []
+        for solver in self.solvers:
+            try:
+                problem.solve(
+                    solver=solver,
+                    warm_start=self.warm_start,
+                    **self.solver_options(solver),
+                )
+            except cp.error.SolverError as e:
+                failures.append(f"{solver or 'default'}: {e}")
+                error = e
+                continue
+
+            error = None
+            name = problem.solver_stats.solver_name
+            if problem.status in statuses:
+                return name
+            failures.append(f"{name}: {problem.status}")
+
+        if error is not None:
+            if len(failures) == 1:
+                raise error
+            raise cp.error.SolverError("; ".join(failures))
+        return name
+
+    def __repr__(self):
+        return (
+            f"SolverConfig(solvers={self.solvers}, tolerance={self.tolerance}, "
+            f"max_iters={self.max_iters}, time_limit={self.time_limit}, "
+            f"warm_start={self.warm_start})"
+        )
+
+
+# CVXPY's default solver and settings with warm start, the optimizers' default
+DEFAULT_SOLVER_CONFIG = SolverConfig()
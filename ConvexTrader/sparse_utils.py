@@ -0,0 +1,62 @@
+import numpy as np
+import scipy.sparse as sp
+from .portfolio_exceptions import ValidationError
+
+# Trades with an absolute size at or below this are dropped from sparse results;
+# well above the noise the default solvers leave on untraded assets relative to
+# typical weights, and well below any tradeable size
+SPARSE_TOLERANCE = 1e-6
+
+
+def to_dense(values):
+    """
+    Return values as a dense numpy array.
+
+    scipy.sparse vectors and matrices are converted and lists containing sparse
+    rows are stacked row by row. Other inputs are returned unchanged so the
+    existing validation still sees them. Only used for O(n) parameter values:
+    CVXPY parameter values are always dense.
+    """
+    if sp.issparse(values):
+        return values.toarray()
+    if isinstance(values, (list, tuple)) and any(sp.issparse(v) for v in values):
+        return np.array([np.ravel(to_dense(v)) for v in values], dtype=float)
+    return values
+
+
+def to_dense_vector(values):
+    """Like to_dense, flattening sparse (1, n) and (n, 1) matrices to 1-D vectors"""
+    if sp.issparse(values):
+        return np.ravel(values.toarray())
+    return values
+
+
+def sparse_trades(trades: np.ndarray, tolerance: float = SPARSE_TOLERANCE):
+    """
+    Convert optimal trades to a scipy.sparse array, dropping negligible entries.
+
+    Large-universe rebalances typically touch a small fraction of the assets,
+    and the solvers return tiny nonzero values instead of exact zeros for the
+    untouched ones.
+
+    Args:
+        trades: Trade vector of shape (n,) or trade matrix of shape (n, periods)
+        tolerance: Entries with an absolute value at or below this are dropped
+
+    Returns:
+        scipy.sparse.csr_array of shape (n,) for a vector, or
+        scipy.sparse.csc_array of shape (n, periods) for a matrix, so that the
+        trades of a period are a contiguous column
+
+    Raises:
+        ValidationError: If the tolerance is negative
+    """
+    if tolerance < 0:
+        raise ValidationError(
+            "Invalid sparse tolerance",
+            details=f"tolerance must be non-negative, got {tolerance}",
+        )
+    trades = np.where(np.abs(trades) > tolerance, trades, 0.0)
+    if trades.ndim == 1:
+        return sp.csr_array(trades)
+    return sp.csc_array(trades)
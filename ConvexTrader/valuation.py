@@ -0,0 +1,294 @@
+from collections.abc import Mapping
+import numpy as np
+from .portfolio_exceptions import ValidationError
+
+
+def feed_symbols(prices) -> list:
+    """Symbols of the columns of a DataFrame or the keys of a mapping price feed"""
+    if hasattr(prices, "columns"):
+        return list(prices.columns)
+    if isinstance(prices, Mapping):
+        return list(prices.keys())
+    raise ValidationError(
+        "Invalid price feed",
+        details="Only DataFrames and mappings name their symbols",
+    )
+
+
+def feed_matrix(prices) -> np.ndarray:
+    """
+    Prices of a feed as a float array in the order of its columns.
+
+    Args:
+        prices: Array of shape (m,) or (T, m), DataFrame with one column per
+            symbol, or mapping of symbol to a price or a series of T prices
+
+    Returns:
+        numpy.ndarray: Array of shape (m,) or (T, m); a view for float arrays
+        and single-dtype float DataFrames
+
+    Raises:
+        ValidationError: If the prices are not numeric
+    """
+    try:
+        if hasattr(prices, "columns") and hasattr(prices, "to_numpy"):
+            return prices.to_numpy(dtype=float)
+        if isinstance(prices, Mapping):
+            # Dicts keep insertion order, so values line up with feed_symbols
+            return np.array(list(prices.values()), dtype=float).T
+        return np.asarray(prices, dtype=float)
+    except (TypeError, ValueError) as e:
+        raise ValidationError("Invalid price feed", details=str(e))
+
+
+class SymbolAlignment:
+    """
+    Columns of a price feed matched to the symbols of a portfolio, prepared once.
+
+    Matching symbols by name costs a dictionary lookup per symbol; an alignment
+    does those lookups when it is created and keeps the column of each portfolio
+    symbol, so every later snapshot or matrix of prices from the same feed is
+    valued with array operations only. Feeds must keep the column order, or key
+    order for mappings, the alignment was prepared with; extra feed columns are
+    ignored.
+
+    Example:
+        >>> alignment = portfolio.symbol_alignment(frame.columns)
+        >>> values = portfolio.value_series(frame, alignment)
+    """
+
+    def __init__(self, symbols, feed_symbols):
+        """
+        Args:
+            symbols: Symbols in portfolio order, e.g. Portfolio.symbols
+            feed_symbols: Symbols of the feed columns, in column order
+
+        Raises:
+            ValidationError: If the feed repeats a symbol or lacks a portfolio symbol
+        """
+        self.symbols = tuple(symbols)
+        self.feed_symbols = tuple(feed_symbols)
+        columns = {symbol: j for j, symbol in enumerate(self.feed_symbols)}
+        if len(columns) != len(self.feed_symbols):
+            raise ValidationError(
+                "Duplicate feed symbols",
+                details="Every feed column needs its own symbol",
+            )
+        missing = [symbol for symbol in self.symbols if symbol not in columns]
+        if missing:
+            raise ValidationError(
+                "Missing prices",
+                details=f"No feed column for {len(missing)} symbols, e.g. {missing[:5]}",
+            )
+
+        # Feed column of each portfolio symbol
+        self.indices = np.fromiter(
+            (columns[symbol] for symbol in self.symbols),
+            dtype=np.intp,
+            count=len(self.symbols),
+        )
+        self._identity = len(self.feed_symbols) == len(self.symbols) and np.array_equal(
+            self.indices, np.arange(len(self.symbols))
+        )
+
+    @classmethod
+    def from_feed(cls, symbols, prices) -> "SymbolAlignment":
+        """Alignment of a DataFrame or mapping feed, taking the symbols from its columns or keys"""
+        return cls(symbols, feed_symbols(prices))
+
+    def feed_matrix(self, prices) -> np.ndarray:
+        """Prices of the feed in feed column order, see feed_matrix; checks the number of columns"""
+        matrix = feed_matrix(prices)
+        if matrix.ndim not in (1, 2) or matrix.shape[-1] != len(self.feed_symbols):
+            raise ValidationError(
+                "Price feed shape mismatch",
+                details=f"Expected {len(self.feed_symbols)} columns, got shape {matrix.shape}",
+            )
+        return matrix
+
+    def align(self, prices) -> np.ndarray:
+        """
+        Prices of a feed in portfolio symbol order.
+
+        Returns:
+            numpy.ndarray: Array of shape (n,) or (T, n); the feed itself when
+            its columns are already in portfolio order, else a copy
+        """
+        matrix = self.feed_matrix(prices)
+        if self._identity:
+            return matrix
+        return matrix[..., self.indices]
+
+    def scatter(self, values) -> np.ndarray:
+        """Values per portfolio symbol placed at their feed columns, zero elsewhere"""
+        scattered = np.zeros(len(self.feed_symbols))
+        scattered[self.indices] = values
+        return scattered
+
+    def values(self, holdings, prices) -> np.ndarray:
+        """
+        Market value of holdings at every row of a feed.
+
+        The holdings are scattered to feed order rather than the prices gathered
+        to portfolio order, so the feed matrix is used as is in a single
+        matrix-vector product.
+
+        Args:
+            holdings: Quantities in portfolio symbol order
+            prices: Price feed, see feed_matrix
+
+        Returns:
+            numpy.ndarray: Value per row of shape (T,), or a scalar for a single snapshot
+        """
+        matrix = self.feed_matrix(prices)
+        if self._identity:
+            return matrix @ np.asarray(holdings, dtype=float)
+        return matrix @ self.scatter(holdings)
+
+
+class PriceBook:
+    """
+    Latest price of every portfolio symbol, kept in portfolio symbol order.
+
+    The book shares the symbols list and symbol to index map of its portfolio
+    and keeps the prices in a contiguous float64 backing array that grows with
+    the holdings when trades add symbols; new symbols are unpriced (NaN) until
+    a tick sets them. Ticks are written in place, so prices is a view that
+    valuation and market-value weights read without rebuilding a vector.
+    Portfolio creates its book, see Portfolio.price_book.
+
+    Example:
+        >>> book = portfolio.price_book
+        >>> columns = book.index(["AAPL", "MSFT"])
+        >>> book.update(columns, np.array([151.2, 302.5]))
+        >>> portfolio.total_value()
+    """
+
+    def __init__(self, symbols: list, symbol_index: dict, capacity: int):
+        """
+        Args:
+            symbols: Symbols list of the portfolio, shared rather than copied
+            symbol_index: Symbol to index map of the portfolio, shared rather than copied
+            capacity: Initial length of the backing array
+        """
+        self.symbols = symbols
+        self._symbol_index = symbol_index
+        self._buffer = np.full(capacity, np.nan)
+
+    @property
+    def prices(self) -> np.ndarray:
+        """
+        Numpy array of the price of each symbol, in the same order as symbols.
+
+        This is a view of the backing array; it reflects later ticks until the
+        backing array grows to make room for new symbols.
+        """
+        return self._buffer[: len(self.symbols)]
+
+    def _reserve(self, capacity: int):
+        """Grow the backing array to capacity, keeping the prices of existing symbols"""
+        buffer = np.full(capacity, np.nan)
+        n = len(self.symbols)
+        buffer[:n] = self._buffer[:n]
+        self._buffer = buffer
+
+    def index(self, symbols) -> np.ndarray:
+        """
+        Indices of symbols, prepared once for a tick source that always sends them.
+
+        Raises:
+            ValidationError: If a symbol is not in the portfolio
+        """
+        try:
+            return np.fromiter(
+                (self._symbol_index[symbol] for symbol in symbols), dtype=np.intp
+            )
+        except KeyError as e:
+            raise ValidationError(
+                "Unknown symbol", details=f"{e.args[0]} is not in the portfolio"
+            )
+
+    def update(self, indices, prices):
+        """
+        Apply a batch of ticks in place.
+
+        Args:
+            indices: Integer array of symbol indices, e.g. from index
+            prices: Array of the new prices, one per index; later ticks of a
+                repeated index win
+
+        Raises:
+            ValidationError: If the arrays differ in length, an index is out of
+                range or a price is not positive
+        """
+        indices = np.asarray(indices)
+        prices = np.asarray(prices, dtype=float)
+        if indices.shape != prices.shape or indices.ndim != 1:
+            raise ValidationError(
+                "Tick length mismatch",
+                details=f"Got {indices.shape} indices and {prices.shape} prices",
+            )
+        if len(indices) == 0:
+            return
+        if not np.issubdtype(indices.dtype, np.integer) or (
+            indices.min() < 0 or indices.max() >= len(self.symbols)
+        ):
+            raise ValidationError(
+                "Invalid symbol index",
+                details=f"Indices must be integers below {len(self.symbols)}",
+            )
+        if not np.all(prices > 0):
+            raise ValidationError("Invalid price", details="Prices must be positive")
+        self._buffer[indices] = prices
+
+    def update_snapshot(self, prices, alignment: SymbolAlignment = None):
+        """
+        Set every price from one snapshot.
+
+        Args:
+            prices: Vector of prices in symbol order or, with alignment, a
+                snapshot of the feed the alignment was prepared for
+            alignment: Optional SymbolAlignment of the feed
+
+        Raises:
+            ValidationError: If the snapshot does not match the symbols or a
+                price is not positive
+        """
+        if alignment is None:
+            prices = feed_matrix(prices)
+            if prices.shape != (len(self.symbols),):
+                raise ValidationError(
+                    "Price vector length mismatch",
+                    details=f"Expected {len(self.symbols)}, got {prices.shape}",
+                )
+        else:
+            if len(alignment.symbols) != len(self.symbols):
+                raise ValidationError(
+                    "Stale symbol alignment",
+                    details=f"Prepared for {len(alignment.symbols)} symbols, "
+                    f"the book has {len(self.symbols)}",
+                )
+            prices = alignment.align(prices)
+            if prices.ndim != 1:
+                raise ValidationError(
+                    "Price vector length mismatch",
+                    details=f"Expected a single snapshot, got shape {prices.shape}",
+                )
+        if not np.all(prices > 0):
+            raise ValidationError("Invalid price", details="Prices must be positive")
+        self._buffer[: len(self.symbols)] = prices
+
+    def unpriced(self) -> list:
+        """Symbols without a price yet"""
+        return [self.symbols[i] for i in np.flatnonzero(np.isnan(self.prices))]
+
+    def __getitem__(self, symbol: str) -> float:
+        return float(self._buffer[self._symbol_index[symbol]])
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __repr__(self):
+        return (
+            f"PriceBook({len(self.symbols)} symbols, {len(self.unpriced())} unpriced)"
+        )
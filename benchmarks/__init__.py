@@ -0,0 +1 @@
+"""Benchmark suite of ConvexTrader; run with `python -m benchmarks`"""
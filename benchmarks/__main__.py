@@ -0,0 +1,81 @@
+"""
+Command line entry point of the benchmark suite.
+
+    python -m benchmarks run --quick --output results.json
+    python -m benchmarks run --baseline baseline.json --threshold 0.25
+    python -m benchmarks compare baseline.json results.json
+
+Both `run --baseline` and `compare` exit with status 1 when a metric slows
+down by more than the threshold.
+"""
+
+import argparse
+import sys
+from .suite import run_suite
+from .compare import (
+    DEFAULT_THRESHOLD,
+    DEFAULT_MIN_TIME,
+    load_results,
+    save_results,
+    compare_results,
+    format_comparisons,
+)
+
+
+def check(baseline, current, threshold, min_time) -> int:
+    """Print the comparison and return the exit status"""
+    comparisons = compare_results(baseline, current, threshold, min_time)
+    print(format_comparisons(comparisons))
+    regressions = sum(c.regression for c in comparisons)
+    print(f"{regressions} regression(s) in {len(comparisons)} metric(s)")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="ConvexTrader benchmarks"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark suite")
+    run.add_argument("--quick", action="store_true", help="small grids only")
+    run.add_argument("--repeats", type=int, default=5)
+    run.add_argument("--only", help="benchmark name prefix to run")
+    run.add_argument("--output", help="write results to this JSON file")
+    run.add_argument("--baseline", help="compare against this results file")
+
+    compare = commands.add_parser("compare", help="compare two results files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+
+    for command in (run, compare):
+        command.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        command.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return check(
+            load_results(args.baseline),
+            load_results(args.current),
+            args.threshold,
+            args.min_time,
+        )
+
+    def progress(record):
+        params = ", ".join(f"{k}={v}" for k, v in record["params"].items())
+        metrics = ", ".join(f"{k}={v:.3g}s" for k, v in record["metrics"].items())
+        print(f"{record['name']}[{params}] {metrics}", flush=True)
+
+    results = run_suite(args.quick, args.repeats, args.only, progress)
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        return check(
+            load_results(args.baseline), results, args.threshold, args.min_time
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
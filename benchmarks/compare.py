@@ -0,0 +1,106 @@
+import json
+from typing import List, NamedTuple
+
+# Relative slowdown above which a metric counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Baseline times below this many seconds are dominated by timer noise and are
+# not checked
+DEFAULT_MIN_TIME = 1e-4
+
+
+class Comparison(NamedTuple):
+    """
+    Change of one metric between a baseline and a current run.
+
+    Attributes:
+        name: Benchmark name, e.g. "single_period.cvxpy"
+        params: Benchmark parameters, e.g. {"n": 100}
+        metric: Metric name, e.g. "solve"
+        baseline: Baseline time in seconds
+        current: Current time in seconds
+        ratio: current / baseline
+        regression: Whether the slowdown exceeds the threshold
+    """
+
+    name: str
+    params: dict
+    metric: str
+    baseline: float
+    current: float
+    ratio: float
+    regression: bool
+
+
+def load_results(path) -> dict:
+    """Read a results file written by `python -m benchmarks run`"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path):
+    """Write results as indented JSON"""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def result_key(record: dict):
+    """Key matching the same benchmark case across runs"""
+    return record["name"], tuple(sorted(record["params"].items()))
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_time: float = DEFAULT_MIN_TIME,
+) -> List[Comparison]:
+    """
+    Compare the metrics of the cases present in both runs.
+
+    Args:
+        baseline: Results of the reference run
+        current: Results of the run being checked
+        threshold: Relative slowdown counted as a regression, e.g. 0.25 for 25%
+        min_time: Baseline times below this are reported but never regressions
+
+    Returns:
+        list of Comparison, one per metric present in both runs
+    """
+    reference = {result_key(record): record for record in baseline["results"]}
+    comparisons = []
+    for record in current["results"]:
+        base = reference.get(result_key(record))
+        if base is None:
+            continue
+        for metric, value in record["metrics"].items():
+            base_value = base["metrics"].get(metric)
+            if base_value is None or value is None:
+                continue
+            ratio = value / base_value if base_value > 0 else float("inf")
+            comparisons.append(
+                Comparison(
+                    record["name"],
+                    record["params"],
+                    metric,
+                    base_value,
+                    value,
+                    ratio,
+                    base_value >= min_time and ratio > 1.0 + threshold,
+                )
+            )
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    """Plain-text table of comparisons, regressions flagged"""
+    lines = []
+    for c in comparisons:
+        params = ", ".join(f"{k}={v}" for k, v in c.params.items())
+        flag = "  REGRESSION" if c.regression else ""
+        lines.append(
+            f"{c.name}[{params}] {c.metric}: {c.baseline:.3g}s -> "
+            f"{c.current:.3g}s ({c.ratio:.2f}x){flag}"
+        )
+    return "\n".join(lines)
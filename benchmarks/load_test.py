@@ -0,0 +1,175 @@
+"""
+Load test of the optimization server.
+
+    python -m benchmarks.load_test --clients 16 --requests 4000 --n 100
+    python -m benchmarks.load_test --url http://127.0.0.1:8765 --kind multi_period
+
+Without --url a local server is started in a subprocess for the duration of the
+test. Reports throughput, p50/p99 latency and how many requests the server
+coalesced into batches.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ConvexTrader.client import OptimizationClient
+from ConvexTrader.server import DEFAULT_BATCH_WINDOW, DEFAULT_MAX_BATCH_SIZE
+from .suite import SEED, synthetic_returns, synthetic_weights
+
+# Number of distinct problems cycled through by the clients
+DISTINCT_INPUTS = 64
+
+# Kinds of requests the load test can send
+KINDS = ("single_period", "multi_period")
+
+
+def start_server(
+    batch_window=DEFAULT_BATCH_WINDOW, max_batch_size=DEFAULT_MAX_BATCH_SIZE
+):
+    """Start a server on a free local port; returns the process and its URL"""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "ConvexTrader.server",
+            "--port",
+            "0",
+            "--batch-window",
+            str(batch_window),
+            "--max-batch-size",
+            str(max_batch_size),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError(f"Optimization server failed to start: {line!r}")
+    return process, line.split()[-1]
+
+
+def request_inputs(kind, n, H, count, seed=SEED):
+    """Positional arguments of count distinct client calls"""
+    inputs = []
+    for k in range(count):
+        w = synthetic_weights(n, seed + k)
+        if kind == "single_period":
+            inputs.append((w, synthetic_returns(n, seed=seed + k), 1.0))
+        else:
+            inputs.append(
+                (
+                    w,
+                    H,
+                    synthetic_returns(n, H, seed=seed + k),
+                    np.ones(H),
+                    np.full(H, 0.1),
+                    np.full(H, 0.001),
+                    np.zeros(H),
+                )
+            )
+    return inputs
+
+
+def run_load_test(url, kind="single_period", clients=8, requests=1000, n=100, H=5):
+    """
+    Send requests from concurrent clients and measure their latency.
+
+    Args:
+        url: Base URL of the server
+        kind: "single_period" or "multi_period"
+        clients: Number of client threads, each with its own connection
+        requests: Total number of requests
+        n: Number of assets
+        H: Number of periods of multi-period requests
+
+    Returns:
+        dict: Throughput in requests per second, latency percentiles in seconds,
+        error count and the server's batch counters
+    """
+    client = OptimizationClient(url)
+    optimize = getattr(client, f"{kind}_optimize")
+    inputs = request_inputs(kind, n, H, min(requests, DISTINCT_INPUTS))
+    before = client.health()
+
+    def send(k):
+        start = time.perf_counter()
+        try:
+            optimize(*inputs[k % len(inputs)])
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        latencies = list(executor.map(send, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    after = client.health()
+    ok = np.array([t for t in latencies if t is not None])
+    batches = after["batches"] - before["batches"]
+    return {
+        "kind": kind,
+        "clients": clients,
+        "requests": requests,
+        "n": n,
+        "errors": requests - len(ok),
+        "seconds": elapsed,
+        "throughput": len(ok) / elapsed,
+        "p50": float(np.percentile(ok, 50)) if len(ok) else None,
+        "p99": float(np.percentile(ok, 99)) if len(ok) else None,
+        "batches": batches,
+        "mean_batch_size": (after["requests"] - before["requests"]) / max(batches, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Load test of the ConvexTrader optimization server",
+    )
+    parser.add_argument("--url", help="server to test; default starts a local one")
+    parser.add_argument("--kind", choices=KINDS, default="single_period")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--n", type=int, default=100)
+    parser.add_argument("--H", type=int, default=5)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.batch_window, args.max_batch_size)
+    try:
+        # Compile the problem shape before timing
+        run_load_test(url, args.kind, 1, 1, args.n, args.H)
+        report = run_load_test(
+            url, args.kind, args.clients, args.requests, args.n, args.H
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"{report['kind']} n={report['n']}: {report['requests']} requests from "
+            f"{report['clients']} clients in {report['seconds']:.2f}s, "
+            f"{report['throughput']:.0f} req/s, p50 {report['p50'] * 1e3:.2f}ms, "
+            f"p99 {report['p99'] * 1e3:.2f}ms, mean batch {report['mean_batch_size']:.1f}, "
+            f"{report['errors']} errors"
+        )
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
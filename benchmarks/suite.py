@@ -0,0 +1,365 @@
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import cvxpy as cp
+import ConvexTrader
+from ConvexTrader import Portfolio, Trade, TradeType
+from ConvexTrader.single_period_optimization import (
+    SinglePeriodOptimizer,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import MultiPeriodOptimizer
+from ConvexTrader.native_solver import solve_default
+from ConvexTrader.problem_cache import get_problem_cache, set_problem_cache
+
+# Version of the JSON result format written by run_suite
+FORMAT_VERSION = 1
+
+# Seed of the synthetic data, so every run measures the same problems
+SEED = 0
+
+# Grids of the full suite
+SYMBOL_GRID = (10, 100, 1000, 10000)
+N_GRID = (10, 100, 1000, 5000)
+H_GRID = (2, 10, 100)
+
+# Grids of the quick suite, small enough for CI
+QUICK_SYMBOL_GRID = (10, 100)
+QUICK_N_GRID = (10, 100)
+QUICK_H_GRID = (2, 10)
+
+# Multi-period problems with more than this many trade variables n * (H - 1)
+# are skipped; the full grid would otherwise take hours and tens of GB
+MAX_MULTI_PERIOD_SIZE = 100_000
+
+# Multi-period shapes run in the quick suite too, so compile time regressions
+# of long horizons show up in CI
+MULTI_PERIOD_REGRESSION_CASES = ((500, 50),)
+
+# Horizon of the problem cache benchmark
+PROBLEM_CACHE_H = 10
+
+# Number of trades executed per bookkeeping measurement
+TRADES_PER_RUN = 2000
+
+# Number of price snapshots valued per value_series measurement
+VALUATION_SNAPSHOTS = 250
+
+# Number of price ticks applied per price book update measurement
+TICKS_PER_BATCH = 1000
+
+
+def synthetic_returns(n, periods=None, seed=SEED):
+    """Deterministic expected returns, a vector of length n or a (periods, n) matrix"""
+    rng = np.random.default_rng(seed)
+    shape = n if periods is None else (periods, n)
+    return rng.normal(0.001, 0.02, shape)
+
+
+def synthetic_weights(n, seed=SEED):
+    """Deterministic long-only weights summing to one"""
+    rng = np.random.default_rng(seed + 1)
+    return rng.dirichlet(np.ones(n))
+
+
+def synthetic_trades(n_symbols, count, seed=SEED):
+    """Deterministic buy trades spread over n_symbols symbols"""
+    rng = np.random.default_rng(seed + 2)
+    symbols = [f"S{i:05d}" for i in range(n_symbols)]
+    # Every symbol is traded at least once, so the portfolio reaches full size
+    order = np.concatenate(
+        [np.arange(n_symbols), rng.integers(0, n_symbols, max(count - n_symbols, 0))]
+    )
+    quantities = rng.integers(1, 100, len(order))
+    prices = rng.uniform(10.0, 500.0, len(order))
+    start = datetime(2024, 1, 1)
+    return [
+        Trade(
+            symbols[i],
+            int(quantity),
+            float(price),
+            start + timedelta(seconds=k),
+            TradeType.BUY,
+        )
+        for k, (i, quantity, price) in enumerate(zip(order, quantities, prices))
+    ]
+
+
+def median_time(func, repeats):
+    """Median wall time in seconds of repeats calls to func"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def result(name, params, metrics, info=None):
+    """One benchmark record; metrics are wall times in seconds, lower is better"""
+    record = {"name": name, "params": params, "metrics": metrics}
+    if info:
+        record["info"] = info
+    return record
+
+
+def import_time(statement):
+    """Wall time of statement in a fresh interpreter, after importing numpy"""
+    code = (
+        "import time, numpy\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return float(output)
+
+
+def bench_import(repeats):
+    """Import cost of the package alone and with the optimizer stack"""
+    return result(
+        "package.import",
+        {},
+        {
+            "import": float(
+                np.median([import_time("import ConvexTrader") for _ in range(repeats)])
+            ),
+            "import_optimizers": float(
+                np.median(
+                    [
+                        import_time(
+                            "import ConvexTrader.single_period_optimization, "
+                            "ConvexTrader.multi_period_optimization"
+                        )
+                        for _ in range(repeats)
+                    ]
+                )
+            ),
+        },
+    )
+
+
+def bench_execute_trade(n_symbols, repeats):
+    """Per-trade cost of Portfolio.execute_trade and of batched execute_trades"""
+    trades = synthetic_trades(n_symbols, max(TRADES_PER_RUN, n_symbols))
+
+    def single():
+        portfolio = Portfolio()
+        for trade in trades:
+            portfolio.execute_trade(trade)
+
+    def batch():
+        Portfolio().execute_trades(trades)
+
+    per_trade = median_time(single, repeats) / len(trades)
+    per_trade_batch = median_time(batch, repeats) / len(trades)
+    return result(
+        "portfolio.execute_trade",
+        {"symbols": n_symbols, "trades": len(trades)},
+        {"per_trade": per_trade, "per_trade_batch": per_trade_batch},
+        {"trades_per_second": 1.0 / per_trade},
+    )
+
+
+def bench_valuation(n_symbols, repeats):
+    """
+    Cost of update_weights, total_value with a price dict and with the price
+    book, market weights and batched ticks on a portfolio of n_symbols symbols,
+    and per-snapshot cost of value_series over a matrix of snapshots whose
+    columns are in reverse symbol order
+    """
+    portfolio = Portfolio()
+    portfolio.execute_trades(synthetic_trades(n_symbols, n_symbols))
+    rng = np.random.default_rng(SEED + 3)
+    prices = dict(zip(portfolio.symbols, rng.uniform(10.0, 500.0, n_symbols)))
+    matrix = rng.uniform(10.0, 500.0, (VALUATION_SNAPSHOTS, n_symbols))
+    alignment = portfolio.symbol_alignment(portfolio.symbols[::-1])
+    portfolio.price_book.update_snapshot(matrix[0])
+    ticks = rng.integers(0, n_symbols, TICKS_PER_BATCH)
+    tick_prices = rng.uniform(10.0, 500.0, TICKS_PER_BATCH)
+
+    return result(
+        "portfolio.valuation",
+        {"symbols": n_symbols, "snapshots": VALUATION_SNAPSHOTS},
+        {
+            "update_weights": median_time(portfolio.update_weights, repeats),
+            "total_value": median_time(lambda: portfolio.total_value(prices), repeats),
+            "total_value_price_book": median_time(portfolio.total_value, repeats),
+            "market_weights": median_time(
+                lambda: portfolio.market_weights_vector, repeats
+            ),
+            "tick_update_per_tick": median_time(
+                lambda: portfolio.price_book.update(ticks, tick_prices), repeats
+            )
+            / TICKS_PER_BATCH,
+            "value_series_per_snapshot": median_time(
+                lambda: portfolio.value_series(matrix, alignment), repeats
+            )
+            / VALUATION_SNAPSHOTS,
+        },
+    )
+
+
+def bench_single_period(n, repeats):
+    """Build, compile and warm solve time of the single-period problem"""
+    r_t = synthetic_returns(n)
+    w_t = synthetic_weights(n)
+
+    start = time.perf_counter()
+    optimizer = SinglePeriodOptimizer(n, default_phi_trade, default_phi_hold)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimizer.solve(r_t, w_t, 1.0)
+    first_solve = time.perf_counter() - start
+    compile_time = optimizer.problem.compilation_time
+
+    # Re-solves with new returns only update parameter values
+    shifted = [synthetic_returns(n, seed=SEED + 10 + k) for k in range(repeats)]
+    solves = iter(shifted)
+    solve = median_time(lambda: optimizer.solve(next(solves), w_t, 1.0), repeats)
+
+    return result(
+        "single_period.cvxpy",
+        {"n": n},
+        {
+            "build": build,
+            "compile": compile_time,
+            "first_solve": first_solve,
+            "solve": solve,
+            "native": median_time(lambda: solve_default(r_t, w_t, 1.0), repeats),
+        },
+        {"solver": optimizer.solver_used},
+    )
+
+
+def bench_multi_period(n, H, repeats):
+    """Build, compile and warm solve time of the multi-period problem"""
+    r_t = synthetic_returns(n, H)
+    w_0 = synthetic_weights(n)
+    gamma_t = np.ones(H)
+    psi_t = np.full(H, 0.1)
+    phi_trade = np.full(H, 0.001)
+    phi_hold = np.zeros(H)
+
+    start = time.perf_counter()
+    optimizer = MultiPeriodOptimizer(n, H)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimizer.solve(w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold)
+    first_solve = time.perf_counter() - start
+    compile_time = optimizer.problem.compilation_time
+
+    shifted = [synthetic_returns(n, H, seed=SEED + 10 + k) for k in range(repeats)]
+    solves = iter(shifted)
+    solve = median_time(
+        lambda: optimizer.solve(w_0, next(solves), gamma_t, psi_t, phi_trade, phi_hold),
+        repeats,
+    )
+
+    return result(
+        "multi_period.cvxpy",
+        {"n": n, "H": H},
+        {
+            "build": build,
+            "compile": compile_time,
+            "first_solve": first_solve,
+            "solve": solve,
+        },
+        {"solver": optimizer.solver_used},
+    )
+
+
+def bench_problem_cache(n, repeats):
+    """Cold start of a multi-period problem: build and compile, or load from disk"""
+    risk = np.full((n, PROBLEM_CACHE_H - 1), 0.1)
+
+    def build():
+        MultiPeriodOptimizer(n, PROBLEM_CACHE_H)._build(risk)
+
+    def compile():
+        optimizer = MultiPeriodOptimizer(n, PROBLEM_CACHE_H)
+        optimizer._build(risk)
+        optimizer.problem.get_problem_data(None)
+
+    previous = get_problem_cache()
+    try:
+        set_problem_cache(None)
+        times = {"compile": median_time(compile, repeats)}
+        with tempfile.TemporaryDirectory() as directory:
+            set_problem_cache(directory)
+            build()
+            times["load"] = median_time(build, repeats)
+    finally:
+        set_problem_cache(previous)
+
+    return result("problem_cache.multi_period", {"n": n, "H": PROBLEM_CACHE_H}, times)
+
+
+def run_suite(quick=False, repeats=5, only=None, progress=None):
+    """
+    Run the benchmark suite.
+
+    Args:
+        quick: Whether to run the small grids of the quick suite
+        repeats: Number of timed repetitions per measurement; the median is kept
+        only: Optional benchmark name prefix, e.g. "single_period", to run a subset
+        progress: Optional callable receiving each record as it completes
+
+    Returns:
+        dict: JSON-serializable results with run metadata
+    """
+    symbol_grid = QUICK_SYMBOL_GRID if quick else SYMBOL_GRID
+    n_grid = QUICK_N_GRID if quick else N_GRID
+    h_grid = QUICK_H_GRID if quick else H_GRID
+
+    cases = [("package.import", bench_import, ())]
+    for n_symbols in symbol_grid:
+        cases.append(("portfolio.execute_trade", bench_execute_trade, (n_symbols,)))
+        cases.append(("portfolio.valuation", bench_valuation, (n_symbols,)))
+    for n in n_grid:
+        cases.append(("single_period.cvxpy", bench_single_period, (n,)))
+    for n in n_grid:
+        for H in h_grid:
+            if n * (H - 1) <= MAX_MULTI_PERIOD_SIZE:
+                cases.append(("multi_period.cvxpy", bench_multi_period, (n, H)))
+    for n, H in MULTI_PERIOD_REGRESSION_CASES:
+        cases.append(("multi_period.cvxpy", bench_multi_period, (n, H)))
+
+    for n in n_grid:
+        if n * (PROBLEM_CACHE_H - 1) <= MAX_MULTI_PERIOD_SIZE:
+            cases.append(("problem_cache.multi_period", bench_problem_cache, (n,)))
+
+    results = []
+    for name, bench, args in cases:
+        if only is not None and not name.startswith(only):
+            continue
+        record = bench(*args, repeats)
+        results.append(record)
+        if progress is not None:
+            progress(record)
+
+    return {
+        "format": FORMAT_VERSION,
+        "metadata": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "quick": quick,
+            "repeats": repeats,
+            "seed": SEED,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "numpy": np.__version__,
+            "cvxpy": cp.__version__,
+            "convextrader": ConvexTrader.__version__,
+        },
+        "results": results,
+    }
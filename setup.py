@@ -17,6 +17,7 @@ CLASSIFIERS = [
 INSTALL_REQUIRES = [
     "cvxpy",
     "numpy",
+    "scipy",
 ]
 ENTRY_POINTS = {}
 SCRIPTS = []
@@ -39,7 +40,7 @@ if __name__ == "__main__":
     setuptools.setup(
         name=NAME,
         version=VERSION,
-        packages=setuptools.find_packages(),
+        packages=setuptools.find_packages(exclude=["benchmarks", "benchmarks.*"]),
         author=AUTHOR,
         author_email=AUTHOR_EMAIL,
         description=DESCRIPTION,
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+import pytest
+import numpy as np
+from datetime import datetime
+from ConvexTrader import Portfolio, Trade, TradeType, OptimizationExecutor
+from ConvexTrader.async_optimization import (
+    single_period_optimization_async,
+    snapshot_portfolio,
+)
+from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio()
+    for symbol, quantity in (("AAPL", 10), ("GOOG", 30), ("MSFT", 60)):
+        portfolio.execute_trade(
+            Trade(symbol, quantity, 100.0, datetime(2024, 1, 1), TradeType.BUY)
+        )
+    return portfolio
+
+
+def multi_period_inputs(H, n):
+    r_t = np.tile(np.linspace(0.01, 0.05, n), (H, 1))
+    return r_t, np.ones(H), np.full(H, 0.1), np.full(H, 0.001), np.zeros(H)
+
+
+def test_async_matches_sync(portfolio):
+    r_t = np.array([0.05, 0.02, -0.01])
+    H = 3
+    multi_inputs = multi_period_inputs(H, 3)
+
+    async def main():
+        with OptimizationExecutor(max_workers=2) as executor:
+            return await asyncio.gather(
+                portfolio.single_period_optimize_async(
+                    r_t, 1.0, engine="cvxpy", executor=executor
+                ),
+                portfolio.multi_period_optimize_async(
+                    H, *multi_inputs, executor=executor
+                ),
+            )
+
+    z, Z = asyncio.run(main())
+    np.testing.assert_allclose(
+        z, portfolio.single_period_optimize(r_t, 1.0, engine="cvxpy"), atol=1e-6
+    )
+    np.testing.assert_allclose(
+        Z, portfolio.multi_period_optimize(H, *multi_inputs), atol=1e-6
+    )
+    assert portfolio.last_solver is not None
+
+
+def test_weights_snapshotted_at_submit(portfolio):
+    r_t = np.array([0.05, 0.02, -0.01])
+    expected = portfolio.single_period_optimize(r_t, 1.0)
+    weights = portfolio.weights_vector.copy()
+    snapshot = snapshot_portfolio(portfolio)
+
+    async def main():
+        task = asyncio.create_task(portfolio.single_period_optimize_async(r_t, 1.0))
+        # Let the task snapshot the weights and submit, then trade during the solve
+        await asyncio.sleep(0)
+        portfolio.execute_trade(
+            Trade("AAPL", 500, 100.0, datetime(2024, 1, 2), TradeType.BUY)
+        )
+        return await task
+
+    np.testing.assert_allclose(asyncio.run(main()), expected)
+    np.testing.assert_array_equal(snapshot.weights_vector, weights)
+    assert not np.allclose(portfolio.weights_vector, weights)
+
+
+def test_optimizations_overlap():
+    # Both calls only return once the other is running as well
+    barrier = threading.Barrier(2, timeout=5)
+
+    async def main():
+        with OptimizationExecutor(max_workers=2) as executor:
+            return await asyncio.gather(
+                executor.run(barrier.wait), executor.run(barrier.wait)
+            )
+
+    assert sorted(asyncio.run(main())) == [0, 1]
+
+
+def test_bounded_queue_and_cancellation():
+    release = threading.Event()
+
+    async def main():
+        with OptimizationExecutor(max_workers=1, max_pending=2) as executor:
+            running = asyncio.create_task(executor.run(release.wait, 5))
+            queued = asyncio.create_task(executor.run(time.sleep, 0))
+            await asyncio.sleep(0.05)
+            assert executor.pending == 2
+            with pytest.raises(OptimizationError, match="queue is full"):
+                await executor.run(time.sleep, 0)
+
+            # A queued call is withdrawn, freeing its slot
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            assert executor.pending == 1
+
+            with pytest.raises(OptimizationError, match="timed out"):
+                await executor.run(time.sleep, 0, timeout=0.01)
+            release.set()
+            assert await running
+
+    asyncio.run(main())
+
+
+def test_invalid_inputs(portfolio):
+    with pytest.raises(ValidationError, match="Invalid queue size"):
+        OptimizationExecutor(max_workers=4, max_pending=2)
+    with pytest.raises(ValidationError, match="Invalid executor kind"):
+        OptimizationExecutor(kind="fiber")
+    with pytest.raises(ValidationError, match="length mismatch"):
+        asyncio.run(portfolio.single_period_optimize_async(np.ones(2), 1.0))
+
+    executor = OptimizationExecutor(max_workers=1)
+    executor.shutdown()
+    with pytest.raises(OptimizationError, match="shut down"):
+        asyncio.run(
+            single_period_optimization_async(
+                np.ones(3), np.ones(3) / 3, 1.0, executor=executor
+            )
+        )
@@ -0,0 +1,176 @@
+import pytest
+import numpy as np
+from ConvexTrader.Backtester import Backtester, BacktestResult
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    return rng.normal(0.001, 0.02, (40, 4))
+
+
+def momentum(t, history):
+    if t == 0:
+        return np.full(4, 1e-3)
+    return history[-10:].mean(axis=0)
+
+
+def test_backtest_matches_manual_loop(returns):
+    result = Backtester(returns, momentum, gamma=1.0).run()
+    assert isinstance(result, BacktestResult)
+    assert result.status == ["optimal"] * len(returns)
+    assert result.errors == [None] * len(returns)
+
+    w = np.full(4, 0.25)
+    value = 1.0
+    for t in range(len(returns)):
+        z = single_period_optimization(
+            momentum(t, returns[:t]), w, 1.0, default_phi_trade, default_phi_hold
+        )
+        w_post = w + z
+        cost = 0.01 * np.sum(np.abs(z)) + 0.01 * np.sum(w_post**2)
+        value *= 1 + w_post @ returns[t] - cost
+
+        assert np.allclose(result.trades[t], z)
+        assert np.allclose(result.weights[t], w_post)
+        w = w_post * (1 + returns[t])
+        w /= w.sum()
+
+    assert np.isclose(result.values[-1], value)
+    assert np.allclose(result.turnover, np.sum(np.abs(result.trades), axis=1))
+    assert np.allclose(
+        result.net_returns,
+        result.gross_returns - result.trading_costs - result.holding_costs,
+    )
+
+
+def test_single_period_backtest_uses_cost_coefficients(returns):
+    result = Backtester(returns[:10], momentum, trade_cost=0.05, hold_cost=0.02).run()
+    assert result.status == ["optimal"] * 10
+    assert np.allclose(result.trading_costs, 0.05 * result.turnover)
+
+    w = np.full(4, 0.25)
+    for t in range(10):
+        z = single_period_optimization(
+            momentum(t, returns[:t]),
+            w,
+            0.5,
+            lambda z: 5 * default_phi_trade(z),
+            lambda w: 2 * default_phi_hold(w),
+        )
+        assert np.allclose(result.trades[t], z, atol=1e-4)
+        w = (w + z) * (1 + returns[t])
+        w /= w.sum()
+
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        Backtester(returns, momentum, engine="native", trade_cost=0.05)
+
+
+def test_single_and_multi_period_weigh_gamma_alike(returns):
+    # A one-period plan with long-only weights is the single-period problem
+    def forecast(t, history):
+        return momentum(t, history)[None, :]
+
+    kwargs = dict(gamma=2.0, trade_cost=0.002, hold_cost=0.03)
+    single = Backtester(returns[:10], momentum, **kwargs).run()
+    multi = Backtester(
+        returns[:10], forecast, method="multi", horizon=1, **kwargs
+    ).run()
+    assert np.all(single.weights > 0)
+    assert np.allclose(single.weights, multi.weights, atol=1e-3)
+
+
+def test_from_prices_and_forecast_array(returns):
+    prices = 100 * np.vstack([np.ones(4), np.cumprod(1 + returns, axis=0)])
+    forecasts = np.array([momentum(t, returns[:t]) for t in range(len(returns))])
+
+    from_prices = Backtester.from_prices(prices, momentum).run(start=5)
+    from_array = Backtester(returns, forecasts).run(start=5)
+
+    assert len(from_prices.values) == len(returns) - 5
+    assert np.allclose(from_prices.weights, from_array.weights)
+    assert np.allclose(from_prices.values, from_array.values)
+
+
+def test_multi_period_backtest(returns):
+    def forecast(t, history):
+        return np.tile(momentum(t, history), (3, 1))
+
+    result = Backtester(
+        returns[:10], forecast, gamma=1.0, method="multi", horizon=3
+    ).run()
+    assert result.status == ["optimal"] * 10
+    assert np.allclose(result.weights.sum(axis=1), 1)
+
+
+def test_multi_period_backtest_uses_current_forecast(returns):
+    # Asset 0 is forecast to do well over the current period and asset 1
+    # afterwards, with trading cheap enough to follow the forecast
+    def forecast(t, history):
+        return np.array([[0.05, -0.05, 0.0, 0.0], [-0.05, 0.05, 0.0, 0.0]])
+
+    result = Backtester(
+        returns[:1],
+        forecast,
+        gamma=0.1,
+        method="multi",
+        horizon=2,
+        trade_cost=1e-4,
+    ).run()
+    assert result.status == ["optimal"]
+    assert result.weights[0, 0] > result.weights[0, 1] + 0.3
+
+
+def test_multi_period_backtest_holding_cost(returns):
+    # The quadratic holding cost is what is attributed, so raising it spreads
+    # the optimized weights and lowers the attributed holding cost
+    def forecast(t, history):
+        return np.tile([0.02, 0.0, 0.0, 0.0], (2, 1))
+
+    costs = [
+        Backtester(
+            returns[:3], forecast, gamma=0.0, method="multi", horizon=2, hold_cost=c
+        )
+        .run()
+        .holding_costs
+        / c
+        for c in (0.01, 1.0)
+    ]
+    assert np.all(costs[1] < costs[0])
+
+
+def test_failed_step_keeps_weights(returns):
+    def forecast(t, history):
+        return np.full(4, np.nan) if t == 2 else momentum(t, history)
+
+    result = Backtester(returns[:5], forecast).run()
+    # Non-finite returns are rejected by the solver input checks
+    assert result.status[2] == "solver_error"
+    assert "Invalid returns" in result.errors[2]
+    assert result.errors[3] is None
+    assert np.all(result.trades[2] == 0)
+
+
+def test_depleted_portfolio_raises():
+    returns = np.array([[-1.0, -1.0], [0.01, 0.01]])
+    with pytest.raises(ValidationError, match="Portfolio value depleted"):
+        Backtester(returns, np.zeros((2, 2))).run()
+
+
+def test_backtester_validation(returns):
+    with pytest.raises(ValidationError, match="Invalid returns matrix"):
+        Backtester(returns[0], momentum)
+    with pytest.raises(ValidationError, match="Invalid backtest method"):
+        Backtester(returns, momentum, method="daily")
+    with pytest.raises(ValidationError, match="Invalid horizon parameter"):
+        Backtester(returns, momentum, method="multi")
+    with pytest.raises(ValidationError, match="Invalid initial weights"):
+        Backtester(returns, momentum, initial_weights=[1.0])
+    with pytest.raises(ValidationError, match="Invalid backtest period range"):
+        Backtester(returns, momentum).run(start=40)
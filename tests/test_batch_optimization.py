@@ -0,0 +1,196 @@
+import os
+import pytest
+import numpy as np
+import cvxpy as cp
+from datetime import datetime
+from ConvexTrader.Portfolio import Portfolio
+from ConvexTrader.Trade import Trade, TradeType
+from ConvexTrader.batch_optimization import (
+    single_period_optimization_batch,
+    efficient_frontier,
+    EfficientFrontier,
+    get_stacked_optimizer,
+    BatchResult,
+    INVALID,
+)
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
+
+
+@pytest.fixture
+def batch_inputs():
+    rng = np.random.default_rng(0)
+    R = rng.normal(0.05, 0.03, (6, 3))
+    W = rng.random((6, 3))
+    W /= W.sum(axis=1, keepdims=True)
+    gammas = np.linspace(0.1, 2.0, 6)
+    return R, W, gammas
+
+
+@pytest.mark.parametrize("backend", ["serial", "stacked", "process"])
+def test_batch_matches_single_solves(batch_inputs, backend):
+    R, W, gammas = batch_inputs
+    result = single_period_optimization_batch(
+        R, W, gammas, backend=backend, max_workers=2
+    )
+
+    assert isinstance(result, BatchResult)
+    assert result.trades.shape == R.shape
+    assert result.status == [cp.OPTIMAL] * len(R)
+    assert result.errors == [None] * len(R)
+
+    for i in range(len(R)):
+        expected = single_period_optimization(
+            R[i], W[i], gammas[i], default_phi_trade, default_phi_hold
+        )
+        assert np.allclose(result.trades[i], expected, atol=1e-4)
+
+
+@pytest.mark.parametrize("backend", ["serial", "stacked"])
+def test_batch_reports_invalid_rows(batch_inputs, backend):
+    R, W, gammas = batch_inputs
+    R = R.copy()
+    gammas = gammas.copy()
+    R[1] = np.nan
+    gammas[4] = -1.0
+
+    trades, status, errors = single_period_optimization_batch(
+        R, W, gammas, backend=backend
+    )
+
+    assert status[1] == INVALID and status[4] == INVALID
+    assert "NaN" in errors[1]
+    assert "non-negative" in errors[4]
+    assert np.all(np.isnan(trades[[1, 4]]))
+    assert not np.any(np.isnan(trades[[0, 2, 3, 5]]))
+
+
+def test_batch_scalar_gamma_and_zero_returns(batch_inputs):
+    _, W, _ = batch_inputs
+    result = single_period_optimization_batch(np.zeros_like(W), W, 1.0)
+    assert np.allclose(result.trades, 0, atol=1e-3)
+
+
+def crash_worker(z):
+    os._exit(1)
+
+
+def failing_cost(z):
+    raise TypeError("unsupported cost")
+
+
+def test_process_backend_errors(batch_inputs):
+    R, W, gammas = batch_inputs
+    with pytest.raises(OptimizationError, match="Cannot send inputs"):
+        single_period_optimization_batch(
+            R, W, gammas, lambda z: cp.sum(cp.abs(z)), backend="process"
+        )
+    with pytest.raises(OptimizationError, match="Worker process failed"):
+        single_period_optimization_batch(
+            R, W, gammas, crash_worker, backend="process", max_workers=1
+        )
+    # Errors raised in the workers are not mistaken for pickling errors
+    with pytest.raises(OptimizationError, match="Invalid cost functions") as error:
+        single_period_optimization_batch(
+            R, W, gammas, failing_cost, backend="process", max_workers=1
+        )
+    assert "unsupported cost" in str(error.value)
+
+
+def test_stacked_optimizer_cached(batch_inputs):
+    optimizer = get_stacked_optimizer(6, 3, default_phi_trade, default_phi_hold)
+    assert get_stacked_optimizer(6, 3, default_phi_trade, default_phi_hold) is (
+        optimizer
+    )
+
+
+def test_batch_validation_errors(batch_inputs):
+    R, W, gammas = batch_inputs
+
+    with pytest.raises(ValidationError, match="2-D numpy array"):
+        single_period_optimization_batch(R[0], W[0], 1.0)
+
+    with pytest.raises(ValidationError, match="Dimension mismatch"):
+        single_period_optimization_batch(R, W[:, :2], gammas)
+
+    with pytest.raises(ValidationError, match="Invalid risk aversion parameters"):
+        single_period_optimization_batch(R, W, gammas[:2])
+
+    with pytest.raises(ValidationError, match="Invalid batch backend"):
+        single_period_optimization_batch(R, W, gammas, backend="gpu")
+
+    def invalid_phi_trade(z):
+        return "invalid"
+
+    with pytest.raises(OptimizationError, match="Invalid cost functions"):
+        single_period_optimization_batch(R, W, gammas, phi_trade=invalid_phi_trade)
+
+
+@pytest.fixture
+def sample_portfolio():
+    portfolio = Portfolio()
+    trades = [
+        Trade("AAPL", 100, 150.0, datetime(2023, 1, 1), TradeType.BUY),
+        Trade("GOOGL", 50, 2000.0, datetime(2023, 1, 2), TradeType.BUY),
+        Trade("MSFT", 75, 300.0, datetime(2023, 1, 3), TradeType.BUY),
+    ]
+    for trade in trades:
+        portfolio.execute_trade(trade)
+    return portfolio
+
+
+def test_efficient_frontier_matches_single_solves(sample_portfolio):
+    r_t = np.array([0.05, 0.07, 0.02])
+    gammas = np.array([0.1, 1.0, 10.0])
+
+    frontier = sample_portfolio.efficient_frontier(r_t, gammas)
+    assert isinstance(frontier, EfficientFrontier)
+    assert frontier.trades.shape == (3, 3)
+    assert frontier.status == [cp.OPTIMAL] * 3
+
+    for gamma, trade in zip(gammas, frontier.trades):
+        expected = sample_portfolio.single_period_optimize(r_t, gamma)
+        assert np.allclose(trade, expected, atol=1e-4)
+
+    w_next = sample_portfolio.weights_vector + frontier.trades
+    assert np.allclose(frontier.expected_returns, w_next @ r_t)
+    # Higher risk aversion trades return for lower risk
+    assert np.all(np.diff(frontier.risks) < 0)
+    assert np.all(np.diff(frontier.expected_returns) < 0)
+
+
+def test_efficient_frontier_process_workers(sample_portfolio):
+    r_t = np.array([0.05, 0.07, 0.02])
+    gammas = np.linspace(0.1, 5.0, 6)
+
+    serial = efficient_frontier(r_t, sample_portfolio.weights_vector, gammas)
+    parallel = sample_portfolio.efficient_frontier(
+        r_t, gammas, max_workers=2, engine="cvxpy"
+    )
+    assert np.allclose(serial.trades, parallel.trades, atol=1e-3)
+
+    # The native solver runs in this process, so workers are not silently dropped
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        sample_portfolio.efficient_frontier(r_t, gammas, max_workers=2)
+
+
+def test_efficient_frontier_validation(sample_portfolio):
+    r_t = np.array([0.05, 0.07, 0.02])
+
+    with pytest.raises(ValidationError, match="Expected returns length mismatch"):
+        sample_portfolio.efficient_frontier(np.array([0.1]), [1.0])
+
+    with pytest.raises(ValidationError, match="Invalid risk aversion parameter"):
+        sample_portfolio.efficient_frontier(r_t, [1.0, -1.0])
+
+    with pytest.raises(ValidationError, match="Invalid gamma grid"):
+        efficient_frontier(r_t, sample_portfolio.weights_vector, [])
+
+    with pytest.raises(OptimizationError, match="Invalid returns"):
+        efficient_frontier(
+            np.array([np.nan, 0.1, 0.2]), sample_portfolio.weights_vector, [1.0]
+        )
@@ -0,0 +1,69 @@
+import json
+import pytest
+from benchmarks.suite import run_suite
+from benchmarks.compare import compare_results, save_results, load_results
+from benchmarks.__main__ import main
+
+
+def record(name, params, **metrics):
+    return {"name": name, "params": params, "metrics": metrics}
+
+
+@pytest.fixture
+def baseline():
+    return {
+        "results": [
+            record("single_period.cvxpy", {"n": 10}, compile=0.01, solve=0.002),
+            record("portfolio.valuation", {"symbols": 10}, total_value=1e-6),
+        ]
+    }
+
+
+def test_quick_suite_writes_comparable_json(tmp_path):
+    results = run_suite(quick=True, repeats=1, only="single_period")
+    assert [r["params"] for r in results["results"]] == [{"n": 10}, {"n": 100}]
+    for r in results["results"]:
+        assert set(r["metrics"]) == {
+            "build",
+            "compile",
+            "first_solve",
+            "solve",
+            "native",
+        }
+        assert all(value >= 0 for value in r["metrics"].values())
+
+    path = tmp_path / "results.json"
+    save_results(results, path)
+    loaded = load_results(path)
+    assert loaded == json.loads(json.dumps(results))
+    assert not any(c.regression for c in compare_results(loaded, loaded))
+
+
+def test_regression_check(baseline):
+    current = {
+        "results": [
+            record("single_period.cvxpy", {"n": 10}, compile=0.011, solve=0.004),
+            # Below the noise floor, a 3x slowdown is not flagged
+            record("portfolio.valuation", {"symbols": 10}, total_value=3e-6),
+            # Not in the baseline
+            record("single_period.cvxpy", {"n": 100}, solve=1.0),
+        ]
+    }
+    comparisons = {c.metric: c for c in compare_results(baseline, current, 0.25)}
+    assert set(comparisons) == {"compile", "solve", "total_value"}
+    assert not comparisons["compile"].regression
+    assert comparisons["solve"].regression and comparisons["solve"].ratio == 2.0
+    assert not comparisons["total_value"].regression
+    assert not any(c.regression for c in compare_results(baseline, current, 1.5))
+
+
+def test_compare_command_exit_status(baseline, tmp_path, capsys):
+    slower = json.loads(json.dumps(baseline))
+    slower["results"][0]["metrics"]["solve"] = 0.01
+    save_results(baseline, tmp_path / "baseline.json")
+    save_results(slower, tmp_path / "current.json")
+
+    paths = [str(tmp_path / "baseline.json"), str(tmp_path / "current.json")]
+    assert main(["compare", *paths]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert main(["compare", *paths, "--threshold", "5"]) == 0
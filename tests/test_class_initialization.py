@@ -134,3 +134,131 @@ def test_portfolio_repr(sample_portfolio):
     assert isinstance(str(trade), str)
     assert "AAPL" in str(trade)
     assert "BUY" in str(trade)
+
+
+def test_portfolio_grows_past_initial_capacity():
+    portfolio = Portfolio()
+    n = 100
+    for i in range(n):
+        portfolio.execute_trade(
+            Trade(f"SYM{i}", i + 1, 10.0, datetime(2023, 1, 1), TradeType.BUY)
+        )
+
+    assert portfolio.symbols == [f"SYM{i}" for i in range(n)]
+    assert np.array_equal(portfolio.holdings_vector, np.arange(1, n + 1))
+    assert np.isclose(np.sum(portfolio.weights_vector), 1)
+    assert portfolio._symbol_index["SYM42"] == 42
+
+    portfolio.execute_trade(
+        Trade("SYM42", 3, 10.0, datetime(2023, 1, 2), TradeType.SELL)
+    )
+    assert portfolio.holdings_vector[42] == 40
+    assert len(portfolio.symbols) == n
+
+
+def test_vector_setters(sample_portfolio):
+    sample_portfolio.weights_vector = np.array([0.2, 0.3, 0.5])
+    assert np.array_equal(sample_portfolio.weights_vector, [0.2, 0.3, 0.5])
+
+    with pytest.raises(ValidationError, match="Vector length mismatch"):
+        sample_portfolio.holdings_vector = np.array([1.0, 2.0])
+
+
+def test_lazy_weights(sample_portfolio):
+    sample_portfolio.execute_trade(
+        Trade("AAPL", 25, 150.0, datetime(2023, 1, 4), TradeType.SELL)
+    )
+    assert sample_portfolio._weights_dirty
+    assert sample_portfolio._total_holdings == 200
+
+    assert np.allclose(sample_portfolio.weights_vector, [75 / 200, 50 / 200, 75 / 200])
+    assert not sample_portfolio._weights_dirty
+    assert np.isclose(sample_portfolio.get_weights()["GOOGL"], 0.25)
+
+    # In-place edits of holdings_vector are picked up by update_weights
+    sample_portfolio.holdings_vector[1] = 150
+    sample_portfolio.update_weights()
+    assert sample_portfolio._total_holdings == 300
+    assert np.allclose(sample_portfolio.weights_vector, [0.25, 0.5, 0.25])
+
+
+# Bulk Execution Tests
+def test_execute_trades_matches_sequential(sample_portfolio):
+    trades = [
+        Trade("AAPL", 20, 151.0, datetime(2023, 1, 4), TradeType.SELL),
+        Trade("TSLA", 10, 200.0, datetime(2023, 1, 4), TradeType.BUY),
+        Trade("TSLA", 10, 201.0, datetime(2023, 1, 5), TradeType.SELL),
+        Trade("MSFT", 5, 305.0, datetime(2023, 1, 5), TradeType.BUY),
+    ]
+    sequential = Portfolio()
+    for trade in list(sample_portfolio.trades) + trades:
+        sequential.execute_trade(trade)
+
+    sample_portfolio.execute_trades(trades)
+
+    assert sample_portfolio.symbols == sequential.symbols
+    assert sample_portfolio.holdings == sequential.holdings
+    assert "TSLA" not in sample_portfolio.holdings
+    assert np.array_equal(sample_portfolio.holdings_vector, sequential.holdings_vector)
+    assert np.allclose(sample_portfolio.weights_vector, sequential.weights_vector)
+    assert len(sample_portfolio.trades) == 7
+
+
+def test_execute_trades_from_arrays():
+    pd = pytest.importorskip("pandas")
+    columns = {
+        "symbol": np.array(["AAPL", "GOOGL", "AAPL"]),
+        "quantity": np.array([10, 5, 4]),
+        "price": np.array([150.0, 2000.0, 155.0]),
+        "trade_date": np.array(["2023-01-01", "2023-01-01", "2023-01-02"], "M8[D]"),
+        "trade_type": np.array(["BUY", "BUY", "SELL"]),
+    }
+
+    from_mapping = Portfolio()
+    from_mapping.execute_trades(columns)
+    from_frame = Portfolio()
+    from_frame.execute_trades(pd.DataFrame(columns))
+
+    for portfolio in (from_mapping, from_frame):
+        assert portfolio.holdings == {"AAPL": 6, "GOOGL": 5}
+        assert np.allclose(portfolio.weights_vector, [6 / 11, 5 / 11])
+        assert portfolio.trades[2].trade_type == TradeType.SELL
+        assert portfolio.trades[2].trade_date == datetime(2023, 1, 2)
+
+
+def test_execute_trades_oversell_is_atomic(sample_portfolio):
+    trades = [
+        Trade("AAPL", 50, 150.0, datetime(2023, 1, 4), TradeType.SELL),
+        Trade("MSFT", 80, 300.0, datetime(2023, 1, 4), TradeType.SELL),
+        Trade("MSFT", 10, 300.0, datetime(2023, 1, 5), TradeType.BUY),
+    ]
+    holdings = dict(sample_portfolio.holdings)
+
+    # The buy comes after the sell, so the sell exceeds the 75 shares held
+    with pytest.raises(ValidationError, match="Insufficient shares to sell MSFT"):
+        sample_portfolio.execute_trades(trades)
+
+    assert sample_portfolio.holdings == holdings
+    assert len(sample_portfolio.trades) == 3
+
+
+def test_execute_trades_validation(sample_portfolio):
+    with pytest.raises(ValidationError, match="Invalid trade object"):
+        sample_portfolio.execute_trades(["invalid trade"])
+
+    with pytest.raises(ValidationError, match="Missing trade columns"):
+        sample_portfolio.execute_trades({"symbol": np.array(["AAPL"])})
+
+    with pytest.raises(ValidationError, match="Invalid quantity"):
+        sample_portfolio.execute_trades(
+            {
+                "symbol": ["AAPL"],
+                "quantity": [-1],
+                "price": [1.0],
+                "trade_date": [datetime(2023, 1, 1)],
+                "trade_type": [TradeType.BUY],
+            }
+        )
+
+    sample_portfolio.execute_trades([])
+    assert len(sample_portfolio.trades) == 3
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that bookkeeping-only users must not load
+HEAVY_MODULES = (
+    "cvxpy",
+    "scipy",
+    "ConvexTrader.single_period_optimization",
+    "ConvexTrader.multi_period_optimization",
+    "ConvexTrader.batch_optimization",
+)
+
+
+def run_python(code):
+    """Run code in a fresh interpreter and return its JSON output"""
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def test_import_does_not_load_solver_stack():
+    # Import time itself is measured by the package.import benchmark, see
+    # benchmarks/suite.py, rather than asserted on shared CI runners
+    result = run_python(
+        "import json, sys\n"
+        "import ConvexTrader\n"
+        "from ConvexTrader import Portfolio, Trade, TradeType\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps(heavy))\n"
+    )
+    assert result == []
+
+
+def test_lazy_exports_load_on_first_use():
+    result = run_python(
+        "import json, sys\n"
+        "import ConvexTrader\n"
+        "before = 'cvxpy' in sys.modules\n"
+        "config = ConvexTrader.SolverConfig('OSQP')\n"
+        "from ConvexTrader import ResultCache, FactorRiskModel\n"
+        "print(json.dumps({\n"
+        "    'before': before,\n"
+        "    'after': 'cvxpy' in sys.modules,\n"
+        "    'exported': sorted(set(ConvexTrader.__all__) - set(dir(ConvexTrader))),\n"
+        "}))\n"
+    )
+    assert result == {"before": False, "after": True, "exported": []}
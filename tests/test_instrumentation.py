@@ -0,0 +1,123 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from ConvexTrader import (
+    Portfolio,
+    Trade,
+    TradeType,
+    OptimizationStats,
+    register_hook,
+    unregister_hook,
+)
+from ConvexTrader.instrumentation import clear_hooks, has_hooks
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+    SinglePeriodOptimizer,
+)
+from ConvexTrader.multi_period_optimization import (
+    multi_period_optimization,
+    RecedingHorizonOptimizer,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_hooks():
+    clear_hooks()
+    yield
+    clear_hooks()
+
+
+@pytest.fixture
+def inputs():
+    r_t = np.array([0.05, 0.07, 0.02, -0.01])
+    w_t = np.full(4, 0.25)
+    return r_t, w_t, 1.0, default_phi_trade, default_phi_hold
+
+
+def check_timings(stats):
+    timings = stats.timings
+    assert set(timings) == {"validation", "build", "compile", "solve", "total"}
+    assert all(value >= 0 for value in timings.values())
+    assert timings["total"] == pytest.approx(
+        sum(timings[phase] for phase in ("validation", "build", "compile", "solve"))
+    )
+
+
+def test_single_period_stats(inputs):
+    z, stats = single_period_optimization(*inputs, engine="cvxpy", return_stats=True)
+    assert isinstance(stats, OptimizationStats)
+    assert stats.optimizer == "single_period"
+    assert stats.solver == "OSQP" and stats.status == "optimal"
+    assert stats.iterations == stats.solver_stats.num_iters
+    assert stats.n_assets == 4 and stats.periods == 1
+    assert stats.num_variables >= 8 and stats.num_constraints > 0
+    check_timings(stats)
+
+    z, solver, stats = single_period_optimization(
+        *inputs, return_solver=True, return_stats=True
+    )
+    assert solver == stats.solver == "NATIVE"
+    assert stats.solver_stats is None and stats.num_variables is None
+    check_timings(stats)
+
+
+def test_optimizer_last_stats(inputs):
+    optimizer = SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    assert optimizer.last_stats is None
+    optimizer.solve(*inputs[:3])
+    first = optimizer.last_stats
+    assert first.timings["compile"] > 0
+    optimizer.solve(*inputs[:3])
+    assert optimizer.last_stats.timings["build"] == 0
+
+
+def test_multi_period_stats():
+    portfolio = Portfolio()
+    for symbol in ("AAPL", "MSFT"):
+        portfolio.execute_trade(Trade(symbol, 10, 100.0, datetime.now(), TradeType.BUY))
+    H = 4
+    args = (
+        np.tile([0.03, 0.01], (H, 1)),
+        np.ones(H),
+        np.ones(H),
+        np.full(H, 0.01),
+        np.zeros(H),
+    )
+    z, stats = multi_period_optimization(
+        H, args[0], portfolio, *args[1:], return_stats=True
+    )
+    assert stats.optimizer == "multi_period"
+    assert stats.n_assets == 2 and stats.periods == H - 1
+    assert stats.value is not None
+    check_timings(stats)
+
+    mpc = RecedingHorizonOptimizer(2, H)
+    mpc.step(portfolio.weights_vector, *args)
+    assert mpc.last_stats.solver == mpc.solver_used
+
+
+def test_hooks(inputs):
+    received = []
+    hook = register_hook(received.append)
+    assert has_hooks()
+
+    single_period_optimization(*inputs)
+    single_period_optimization(*inputs, engine="cvxpy")
+    assert [stats.solver for stats in received] == ["NATIVE", "OSQP"]
+
+    # A failing hook only warns
+    @register_hook
+    def broken(stats):
+        raise RuntimeError("metrics backend down")
+
+    with pytest.warns(RuntimeWarning, match="metrics backend down"):
+        single_period_optimization(*inputs)
+    assert len(received) == 3
+
+    unregister_hook(broken)
+    unregister_hook(hook)
+    assert not has_hooks()
+    single_period_optimization(*inputs)
+    assert len(received) == 3
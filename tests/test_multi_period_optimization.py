@@ -1,9 +1,17 @@
 import pytest
 import numpy as np
+import cvxpy as cp
 from datetime import datetime
 from ConvexTrader.Portfolio import Portfolio
 from ConvexTrader.Trade import Trade, TradeType
-from ConvexTrader.multi_period_optimization import multi_period_optimization
+from ConvexTrader.multi_period_optimization import (
+    multi_period_optimization,
+    MultiPeriodOptimizer,
+    get_multi_period_optimizer,
+    clear_optimizer_cache,
+    RecedingHorizonOptimizer,
+    shift_blocks,
+)
 from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
 
 
@@ -148,3 +156,196 @@ def test_multi_period_optimize_negative_gamma(basic_portfolio):
         multi_period_optimization(
             H, r_t, basic_portfolio, gamma_t, psi_t, phi_trade, phi_hold
         )
+
+
+def test_matrix_form_matches_per_period_formulation(mock_portfolio):
+    H = 4
+    r_t = np.array([[0.05, 0.02], [0.04, 0.03], [0.06, 0.01], [0.02, 0.05]])
+    gamma_t = np.array([0.5, 0.4, 0.3, 0.2])
+    psi_t = np.array([[0.1, 0.2], [0.15, 0.25], [0.1, 0.15], [0.2, 0.1]])
+    phi_trade = [np.array([0.02, 0.03])] * H
+    phi_hold = [np.array([0.01, 0.01])] * H
+
+    # Reference formulation built period by period
+    z = cp.Variable((2, H - 1))
+    prev_w = mock_portfolio.weights_vector
+    terms, constraints = [], []
+    for i in range(1, H):
+        cur_w = prev_w + z[:, i - 1]
+        terms.append(
+            r_t[i] @ cur_w
+            - gamma_t[i] * cp.sum(cp.multiply(psi_t[i], cp.square(cur_w)))
+            - cp.sum(cp.multiply(phi_hold[i], cur_w))
+            - cp.sum(cp.multiply(phi_trade[i], cp.abs(z[:, i - 1])))
+        )
+        constraints.append(cp.sum(cur_w) == 1)
+        prev_w = cur_w
+    cp.Problem(cp.Maximize(cp.sum(terms)), constraints).solve()
+
+    result = multi_period_optimization(
+        H, r_t, mock_portfolio, gamma_t, psi_t, phi_trade, phi_hold
+    )
+    assert np.allclose(result, z.value, atol=1e-4)
+
+
+def test_optimizer_cache_per_shape(mock_portfolio):
+    clear_optimizer_cache()
+    optimizer = get_multi_period_optimizer(2, 3)
+    assert get_multi_period_optimizer(2, 3) is optimizer
+    assert get_multi_period_optimizer(2, 4) is not optimizer
+
+    r_t = np.array([[0.05, 0.02], [0.04, 0.03], [0.06, 0.01]])
+    gamma_t = np.ones(3)
+    psi_t = np.ones(3)  # Scalar risk factor per period
+    first = multi_period_optimization(
+        3, r_t, mock_portfolio, gamma_t, psi_t, np.full(3, 0.01), np.full(3, 0.01)
+    )
+    problem = optimizer.problem
+    second = multi_period_optimization(
+        3, r_t[::-1], mock_portfolio, gamma_t, psi_t, np.full(3, 0.01), np.zeros(3)
+    )
+    assert optimizer.problem is problem
+    assert first.shape == second.shape == (2, 2)
+    assert np.allclose(np.sum(second, axis=0)[0], 0, atol=1e-6)
+
+
+def test_gamma_sweep_reuses_compiled_problems():
+    optimizer = MultiPeriodOptimizer(2, 3)
+    w_0 = np.array([0.5, 0.5])
+    r_t = np.array([[0.05, 0.02], [0.04, 0.03], [0.06, 0.01]])
+    costs = np.full(3, 0.01)
+
+    def solve(gamma):
+        z = optimizer.solve(w_0, r_t, np.full(3, gamma), np.ones(3), costs, costs)
+        return optimizer.problem, z
+
+    problems = {}
+    for gamma in (0.5, 1.0, 2.0):
+        problems[gamma], z = solve(gamma)
+        fresh = MultiPeriodOptimizer(2, 3).solve(
+            w_0, r_t, np.full(3, gamma), np.ones(3), costs, costs
+        )
+        np.testing.assert_allclose(z, fresh, atol=1e-4)
+    assert len({id(problem) for problem in problems.values()}) == 3
+
+    for gamma in (0.5, 1.0, 2.0):
+        problem, z = solve(gamma)
+        assert problem is problems[gamma]
+        assert optimizer._budget_id == problem.constraints[-1].id
+
+
+def test_multi_period_optimizer_negative_trade_cost():
+    optimizer = MultiPeriodOptimizer(2, 3)
+    with pytest.raises(OptimizationError, match="DCP"):
+        optimizer.solve(
+            np.array([0.5, 0.5]),
+            np.ones((3, 2)),
+            np.ones(3),
+            np.ones(3),
+            np.full(3, -0.01),
+            np.zeros(3),
+        )
+
+
+def test_multi_period_optimizer_invalid_shapes():
+    with pytest.raises(ValidationError, match="Invalid number of assets"):
+        MultiPeriodOptimizer(0, 3)
+
+    optimizer = MultiPeriodOptimizer(2, 3)
+    with pytest.raises(ValidationError, match="Invalid portfolio weights"):
+        optimizer.solve(
+            np.ones(3), np.ones((3, 2)), np.ones(3), np.ones(3), np.ones(3), np.ones(3)
+        )
+    with pytest.raises(ValidationError, match="Invalid trading costs"):
+        optimizer.solve(
+            np.array([0.5, 0.5]),
+            np.ones((3, 2)),
+            np.ones(3),
+            np.ones(3),
+            np.ones((3, 3)),
+            np.ones(3),
+        )
+
+
+def test_shift_blocks():
+    # A (2, 3) block stored column-major, a flagged per-period block and a
+    # fixed block
+    vector = np.arange(11.0)
+    blocks = [(0, (2, 3), False), (6, (3,), True), (9, (2,), False)]
+    shifted = shift_blocks(vector, blocks, 3)
+    assert np.array_equal(shifted, [2, 3, 4, 5, 4, 5, 7, 8, 8, 9, 10])
+
+
+def test_receding_horizon_matches_fresh_solves():
+    rng = np.random.default_rng(0)
+    n, H = 6, 4
+    forecasts = 0.01 + np.cumsum(rng.normal(0, 0.002, (8 + H, n)), axis=0)
+    args = (np.ones(H), np.ones(H), np.full(H, 0.01), np.zeros(H))
+
+    mpc = RecedingHorizonOptimizer(n, H)
+    w = np.full(n, 1 / n)
+    for t in range(8):
+        z = mpc.step(w, forecasts[t : t + H], *args)
+        assert mpc.plan.shape == (n, H - 1)
+        assert np.array_equal(z, mpc.plan[:, 0])
+
+        fresh = MultiPeriodOptimizer(n, H).solve(w, forecasts[t : t + H], *args)
+        assert np.allclose(z, fresh[:, 0], atol=1e-3)
+        w = w + z
+
+    mpc.reset()
+    assert mpc.plan is None
+
+
+def test_receding_horizon_uses_shifted_warm_start(monkeypatch):
+    # The shift rewrites CVXPY's private OSQP warm start cache; if CVXPY moves
+    # it, steps fall back to a plain warm start and the first assertion fails
+    rng = np.random.default_rng(0)
+    n, H = 20, 10
+    forecasts = 0.01 + np.cumsum(rng.normal(0, 0.002, (10 + H, n)), axis=0)
+    args = (np.ones(H), np.ones(H), np.full(H, 0.01), np.zeros(H))
+
+    def run(mode):
+        mpc = RecedingHorizonOptimizer(n, H)
+        w = np.full(n, 1 / n)
+        counts, trades = [], []
+        for t in range(10):
+            if mode == "cold":
+                mpc.reset()
+            trades.append(mpc.step(w, forecasts[t : t + H], *args))
+            w = w + trades[-1]
+            counts.append(mpc.last_stats.iterations)
+        return sum(counts[1:]), np.array(trades)
+
+    shifted, shifted_trades = run("shifted")
+    cold, cold_trades = run("cold")
+    # Without the private state, as on a CVXPY release that moved it, steps
+    # still warm start from the previous iterates and find the same trades
+    monkeypatch.setattr(
+        "ConvexTrader.multi_period_optimization._osqp_warm_start",
+        lambda problem: None,
+    )
+    plain, plain_trades = run("plain")
+
+    assert shifted < plain < cold
+    np.testing.assert_allclose(shifted_trades, cold_trades, atol=1e-3)
+    np.testing.assert_allclose(plain_trades, cold_trades, atol=1e-3)
+
+
+def test_portfolio_multi_period_step(basic_portfolio):
+    H = 3
+    r_t = np.array([[0.05, 0.07], [0.06, 0.08], [0.04, 0.09]])
+    args = (H, r_t, np.ones(H), np.ones(H), np.full(H, 0.01), np.zeros(H))
+
+    z = basic_portfolio.multi_period_step(*args)
+    assert z.shape == (2,)
+    assert np.allclose(z, basic_portfolio.multi_period_optimize(*args)[:, 0], atol=1e-3)
+
+    optimizer = basic_portfolio._receding_horizon
+    basic_portfolio.multi_period_step(*args)
+    assert basic_portfolio._receding_horizon is optimizer
+
+    with pytest.raises(ValidationError, match="Invalid risk aversion parameters"):
+        basic_portfolio.multi_period_step(
+            H, r_t, np.ones(2), np.ones(H), np.full(H, 0.01), np.zeros(H)
+        )
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+import cvxpy as cp
+from ConvexTrader.native_solver import solve_default, solve_default_batch
+from ConvexTrader.batch_optimization import single_period_optimization_batch, INVALID
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    get_single_period_optimizer,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+def reference_solve(r_t, w_t, gamma):
+    """Solve the CVXPY problem to high accuracy"""
+    optimizer = get_single_period_optimizer(
+        len(r_t), default_phi_trade, default_phi_hold
+    )
+    optimizer.r_t.value = r_t
+    optimizer.w_t.value = w_t
+    optimizer.gamma.value = gamma
+    optimizer.trade_cap.value = 100.0
+    optimizer.problem.solve(
+        solver=cp.CLARABEL, tol_gap_abs=1e-12, tol_gap_rel=1e-12, tol_feas=1e-12
+    )
+    return optimizer.z.value
+
+
+@pytest.fixture
+def random_problems():
+    rng = np.random.default_rng(1)
+    problems = []
+    for k in range(12):
+        n = int(rng.integers(2, 40))
+        r_t = rng.normal(0.0, [0.001, 0.05, 1.0][k % 3], n)
+        w_t = rng.dirichlet(np.ones(n))
+        if k % 2:
+            # Some assets not held at all
+            w_t[rng.random(n) < 0.5] = 0
+            w_t /= w_t.sum()
+        gamma = [0.0, 0.1, 1.0, 10.0][k % 4]
+        problems.append((r_t, w_t, gamma))
+    return problems
+
+
+def test_native_matches_cvxpy(random_problems):
+    for r_t, w_t, gamma in random_problems:
+        z = solve_default(r_t, w_t, gamma)
+        assert np.allclose(z, reference_solve(r_t, w_t, gamma), atol=1e-7)
+        assert np.isclose(np.sum(w_t + z), 1)
+        assert np.all(w_t + z >= 0)
+
+
+def test_native_batch_matches_single():
+    rng = np.random.default_rng(2)
+    R = rng.normal(0.05, 0.03, (20, 8))
+    W = rng.dirichlet(np.ones(8), 20)
+    gammas = rng.uniform(0, 5, 20)
+
+    Z = solve_default_batch(R, W, gammas)
+    for i in range(20):
+        assert np.allclose(Z[i], solve_default(R[i], W[i], gammas[i]), atol=1e-12)
+
+
+def test_engine_selection():
+    r_t = np.array([0.05, 0.07, 0.02])
+    w_t = np.array([0.3, 0.3, 0.4])
+
+    native = single_period_optimization(
+        r_t, w_t, 1.0, default_phi_trade, default_phi_hold
+    )
+    cvxpy_result = single_period_optimization(
+        r_t, w_t, 1.0, default_phi_trade, default_phi_hold, engine="cvxpy"
+    )
+    assert np.allclose(native, cvxpy_result, atol=1e-4)
+
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        single_period_optimization(
+            r_t, w_t, 1.0, lambda z: cp.norm(z, 1), default_phi_hold, engine="native"
+        )
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        single_period_optimization(
+            r_t, w_t, 1.0, default_phi_trade, default_phi_hold, engine="fast"
+        )
+
+
+def test_native_batch_backend():
+    rng = np.random.default_rng(3)
+    R = rng.normal(0.05, 0.03, (5, 4))
+    R[1] = 0.0
+    R[3, 0] = np.nan
+    W = rng.dirichlet(np.ones(4), 5)
+
+    result = single_period_optimization_batch(R, W, 1.0, backend="native")
+    assert result.status[3] == INVALID
+    assert np.all(np.isnan(result.trades[3]))
+
+    # Zero returns go through CVXPY, which limits the trade size
+    assert np.sum(np.abs(result.trades[1])) <= 1e-3 + 1e-6
+    for i in (0, 2, 4):
+        assert result.status[i] == cp.OPTIMAL
+        assert np.allclose(result.trades[i], solve_default(R[i], W[i], 1.0))
+
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        single_period_optimization_batch(
+            R, W, 1.0, phi_trade=lambda z: cp.norm(z, 1), backend="native"
+        )
@@ -0,0 +1,169 @@
+import os
+import subprocess
+import sys
+import pytest
+import numpy as np
+import cvxpy as cp
+from cvxpy.lin_ops import lin_utils
+from ConvexTrader import problem_cache
+from ConvexTrader.problem_cache import (
+    ProblemCache,
+    set_problem_cache,
+    function_key,
+    CACHE_DIR_ENV,
+)
+from ConvexTrader.single_period_optimization import (
+    SinglePeriodOptimizer,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import MultiPeriodOptimizer
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+r_t = np.array([0.05, 0.07, 0.02, -0.01])
+w_t = np.full(4, 0.25)
+H = 3
+multi_inputs = (w_t, np.tile(r_t, (H, 1)), np.ones(H), np.full(H, 0.1), 0.001, 0.0)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # Restores the cache setting of the process afterwards
+    monkeypatch.setattr(problem_cache, "_active", problem_cache._UNSET)
+    return set_problem_cache(tmp_path / "problems")
+
+
+def test_compiled_problems_are_reused(cache):
+    z = SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold).solve(
+        r_t, w_t, 1.0
+    )
+    Z = MultiPeriodOptimizer(4, H).solve(*multi_inputs)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 2)
+
+    single = SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    multi = MultiPeriodOptimizer(4, H)
+    np.testing.assert_allclose(single.solve(r_t, w_t, 1.0), z, atol=1e-6)
+    np.testing.assert_allclose(multi.solve(*multi_inputs), Z, atol=1e-6)
+    assert cache.hits == 2
+    # The loaded problems are already compiled for the default solver
+    assert single.problem._cache.param_prog is not None
+
+    # Different constants compiled into the problem are stored separately
+    MultiPeriodOptimizer(4, H).solve(*multi_inputs[:3], np.full(H, 0.2), 0.001, 0.0)
+    assert len(cache) == 3
+
+
+def test_uncacheable_and_unreadable_problems(cache):
+    SinglePeriodOptimizer(4, lambda z: 0 * z[0], default_phi_hold)
+    assert len(cache) == 0
+
+    SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    (path,) = cache.directory.iterdir()
+    path.write_bytes(b"garbage")
+    with pytest.warns(RuntimeWarning, match="unreadable problem cache"):
+        optimizer = SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    assert cache.errors == 1
+    assert optimizer.solve(r_t, w_t, 1.0).shape == (4,)
+    # The file was replaced by a readable one
+    SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    assert cache.hits == 1
+
+
+def test_cache_disabled_without_id_counter(cache, monkeypatch):
+    Z = MultiPeriodOptimizer(4, H).solve(*multi_inputs)
+    # As on a CVXPY release that moved its private id counter
+    monkeypatch.setattr(problem_cache, "lin_utils", None)
+    monkeypatch.setattr(problem_cache, "_unsupported_warned", False)
+    with pytest.warns(RuntimeWarning, match="Problem cache disabled"):
+        optimizer = MultiPeriodOptimizer(4, H)
+        np.testing.assert_allclose(optimizer.solve(*multi_inputs), Z, atol=1e-6)
+    SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    assert problem_cache.get_problem_cache() is None
+    assert (cache.hits, len(cache)) == (0, 1)
+
+
+def test_loaded_problem_ids_never_collide(cache, monkeypatch):
+    Z = MultiPeriodOptimizer(4, H).solve(*multi_inputs)
+    # A fresh process starts counting ids from the beginning
+    monkeypatch.setattr(lin_utils.ID_COUNTER, "count", 1)
+    loaded = MultiPeriodOptimizer(4, H)
+    np.testing.assert_allclose(loaded.solve(*multi_inputs), Z, atol=1e-6)
+    assert cache.hits == 1
+
+    problem = loaded.problem
+    ids = {item.id for item in problem.variables() + problem.parameters()}
+    ids |= {constraint.id for constraint in problem.constraints}
+    built = SinglePeriodOptimizer(4, default_phi_trade, default_phi_hold)
+    new_ids = {item.id for item in built.problem.variables() + [cp.Variable()]}
+    assert max(ids) < min(new_ids)
+
+
+def test_function_key_follows_the_code():
+    def define(source):
+        namespace = {"__name__": "notebook"}
+        exec(source, namespace)
+        return namespace["phi"]
+
+    square = "def phi(z, c=1.0):\n    return c * cp.sum_squares(z)\n"
+    key = function_key(define(square))
+    assert key.startswith("notebook.phi:")
+    assert function_key(define(square)) == key
+    assert function_key(define(square.replace("sum_squares", "abs"))) != key
+    assert function_key(define(square.replace("1.0", "2.0"))) != key
+    assert function_key(define(square.replace("c *", "2 * c *"))) != key
+    assert function_key(lambda z: z) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX file ownership")
+def test_untrusted_files_are_refused(tmp_path):
+    cache = ProblemCache(tmp_path / "problems")
+    assert cache.directory.stat().st_mode & 0o077 == 0
+
+    cache.save(("test", 0), {"value": np.arange(3.0)})
+    path = cache.path(("test", 0))
+    path.chmod(0o666)
+    with pytest.warns(RuntimeWarning, match="writable by other users"):
+        assert cache.load(("test", 0)) is None
+    path.chmod(0o600)
+    assert cache.load(("test", 0)) is not None
+    if os.getuid() == 0:
+        os.chown(path, 12345, -1)
+        with pytest.warns(RuntimeWarning, match="owned by another user"):
+            assert cache.load(("test", 0)) is None
+    assert cache.errors == (2 if os.getuid() == 0 else 1)
+
+
+def test_eviction_and_settings(tmp_path):
+    with pytest.raises(ValidationError, match="Invalid cache size"):
+        ProblemCache(tmp_path, max_files=0)
+
+    cache = ProblemCache(tmp_path, max_files=2)
+    for k in range(4):
+        cache.save(("test", k), {"value": np.arange(k + 1.0)})
+    assert len(cache) == 2
+    np.testing.assert_array_equal(cache.load(("test", 3))["value"], np.arange(4.0))
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_new_process_loads_from_environment_directory(tmp_path):
+    code = (
+        "import numpy as np\n"
+        "from ConvexTrader.problem_cache import get_problem_cache\n"
+        "from ConvexTrader.multi_period_optimization import MultiPeriodOptimizer\n"
+        "MultiPeriodOptimizer(4, 3).solve(np.full(4, 0.25), np.full((3, 4), 0.01),"
+        " np.ones(3), np.full(3, 0.1), 0.001, 0.0)\n"
+        "cache = get_problem_cache()\n"
+        "print(cache.hits, cache.misses)\n"
+    )
+    env = dict(os.environ, **{CACHE_DIR_ENV: str(tmp_path)})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+
+    def run():
+        return subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True
+        ).stdout.split()
+
+    assert run() == ["0", "1"]
+    assert run() == ["1", "0"]
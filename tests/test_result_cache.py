@@ -0,0 +1,117 @@
+import pytest
+import numpy as np
+import scipy.sparse as sp
+from datetime import datetime
+from ConvexTrader import Portfolio, Trade, TradeType, ResultCache, FactorRiskModel
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import multi_period_optimization
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+@pytest.fixture
+def inputs():
+    r_t = np.array([0.05, 0.07, 0.02, -0.01])
+    w_t = np.full(4, 0.25)
+    return r_t, w_t, 1.0, default_phi_trade, default_phi_hold
+
+
+def test_cache_keys():
+    cache = ResultCache(tolerance=1e-6)
+    a = np.array([0.1, -0.0, 0.3])
+    assert cache.key([a, 1.0], "f") == cache.key([a + 1e-9, 1.0], "f")
+    assert cache.key([a], "f") == cache.key([np.array([0.1, 0.0, 0.3])], "f")
+    assert cache.key([a], "f") != cache.key([a + 1e-3], "f")
+    assert cache.key([a], "f") != cache.key([a], "g")
+    assert cache.key([a]) != cache.key([a.reshape(3, 1)])
+    assert cache.key([sp.csr_matrix(a)]) == cache.key([sp.csc_matrix(a)])
+
+    model = FactorRiskModel(np.ones((3, 1)), idiosyncratic=np.ones(3))
+    same = FactorRiskModel(np.ones((3, 1)), idiosyncratic=np.ones(3))
+    assert cache.key([model]) == cache.key([same])
+    assert cache.key([model]) != cache.key([model.covariance()])
+
+
+def test_invalid_cache_settings():
+    with pytest.raises(ValidationError, match="Invalid cache size"):
+        ResultCache(max_size=0)
+    with pytest.raises(ValidationError, match="Invalid cache age"):
+        ResultCache(max_age=0)
+    with pytest.raises(ValidationError, match="Invalid cache tolerance"):
+        ResultCache(tolerance=-1.0)
+
+
+def test_lru_and_age_eviction(monkeypatch):
+    cache = ResultCache(max_size=2, max_age=10.0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.info() == (1, 1, 1, 2, 2)
+
+    now = [0.0]
+    monkeypatch.setattr("ConvexTrader.result_cache.time.monotonic", lambda: now[0])
+    cache.put("d", 4)
+    now[0] = 11.0
+    assert cache.get("d") is None
+    assert len(cache) == 1
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 2)
+
+
+@pytest.mark.parametrize("engine", ["native", "cvxpy"])
+def test_single_period_cache(inputs, engine):
+    cache = ResultCache(tolerance=1e-8)
+    z, solver, stats = single_period_optimization(
+        *inputs, engine=engine, cache=cache, return_solver=True, return_stats=True
+    )
+    first = z.copy()
+    z[:] = np.nan  # Results are copies of the cached values
+
+    r_t = inputs[0] + 1e-12
+    again, solver_again, stats_again = single_period_optimization(
+        r_t,
+        *inputs[1:],
+        engine=engine,
+        cache=cache,
+        return_solver=True,
+        return_stats=True,
+    )
+    assert cache.info()[:2] == (1, 1)
+    assert solver_again == solver and stats_again == stats
+    np.testing.assert_array_equal(again, first)
+
+    sparse = single_period_optimization(
+        *inputs, engine=engine, cache=cache, sparse=True
+    )
+    assert isinstance(sparse, sp.csr_array)
+    single_period_optimization(
+        *inputs[:2], 2.0, *inputs[3:], engine=engine, cache=cache
+    )
+    assert cache.info()[:2] == (2, 2)
+
+
+def test_multi_period_cache():
+    portfolio = Portfolio()
+    for symbol in ("AAPL", "MSFT"):
+        portfolio.execute_trade(Trade(symbol, 10, 100.0, datetime.now(), TradeType.BUY))
+    H = 3
+    cache = ResultCache()
+    args = (np.ones(H), np.ones(H), np.full(H, 0.01), np.zeros(H))
+    r_t = np.tile([0.03, 0.01], (H, 1))
+
+    z = multi_period_optimization(H, r_t, portfolio, *args, cache=cache)
+    # Per-period scalars and their broadcast vectors stack to the same inputs
+    broadcast = (args[0], np.ones((H, 2)), [np.full(2, 0.01)] * H, args[3])
+    again = multi_period_optimization(H, r_t, portfolio, *broadcast, cache=cache)
+    assert cache.info()[:2] == (1, 1)
+    np.testing.assert_array_equal(z, again)
+
+    multi_period_optimization(H, r_t * 2, portfolio, *args, cache=cache)
+    assert cache.info()[:2] == (1, 2)
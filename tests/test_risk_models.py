@@ -0,0 +1,319 @@
+import pytest
+from datetime import datetime
+import numpy as np
+import cvxpy as cp
+from ConvexTrader import Portfolio, Trade, TradeType
+from ConvexTrader.risk_models import (
+    FactorRiskModel,
+    RunningCovariance,
+    EWMACovariance,
+    LedoitWolfCovariance,
+    load_risk_model,
+    psd_factor,
+)
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    get_single_period_optimizer,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import MultiPeriodOptimizer
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(3)
+    mixing = rng.normal(size=(6, 6))
+    # Heavy tails make the fourth-moment terms of Ledoit-Wolf matter
+    return 0.01 * rng.standard_t(4, size=(80, 6)) @ mixing
+
+
+def ledoit_wolf_reference(X):
+    """Batch Ledoit-Wolf estimate, following the scikit-learn formula"""
+    T, p = X.shape
+    X = X - X.mean(axis=0)
+    sample = X.T @ X / T
+    mu = np.trace(sample) / p
+    delta = np.sum((sample - mu * np.eye(p)) ** 2) / p
+    beta = np.sum((X**2).T @ (X**2)) / T - np.sum(sample**2)
+    shrinkage = min(beta / (p * T), delta) / delta
+    return (1 - shrinkage) * sample + shrinkage * mu * np.eye(p)
+
+
+def test_running_covariance(returns):
+    model = RunningCovariance(6).update_many(returns[:50])
+    for x in returns[50:]:
+        model.update(x)
+
+    assert model.count == len(returns)
+    np.testing.assert_allclose(model.mean, returns.mean(axis=0))
+    np.testing.assert_allclose(model.covariance(), np.cov(returns.T))
+
+
+def test_ewma_covariance(returns):
+    decay = 0.9
+    model = EWMACovariance(6, decay=decay).update_many(returns)
+
+    mean, sigma = returns[0], np.zeros((6, 6))
+    for x in returns[1:]:
+        delta = x - mean
+        sigma = decay * sigma + decay * (1 - decay) * np.outer(delta, delta)
+        mean = decay * mean + (1 - decay) * x
+
+    np.testing.assert_allclose(model.mean, mean)
+    np.testing.assert_allclose(model.covariance(), sigma)
+    assert EWMACovariance(6, halflife=1).decay == pytest.approx(0.5)
+
+
+def test_ledoit_wolf_covariance(returns):
+    model = LedoitWolfCovariance(6).update_many(returns)
+    np.testing.assert_allclose(
+        model.covariance(), ledoit_wolf_reference(returns), rtol=1e-8
+    )
+    assert 0 < model.shrinkage < 1
+
+
+def test_save_and_load(tmp_path, returns):
+    for model in (
+        RunningCovariance(6),
+        EWMACovariance(6, halflife=10),
+        LedoitWolfCovariance(6),
+    ):
+        model.update_many(returns[:40])
+        path = tmp_path / f"{model.kind}.npz"
+        model.save(path)
+        restored = load_risk_model(path)
+        assert type(restored) is type(model)
+
+        # Restored estimators continue exactly where the saved ones stopped
+        model.update_many(returns[40:])
+        restored.update_many(returns[40:])
+        assert restored.count == model.count
+        np.testing.assert_allclose(restored.covariance(), model.covariance())
+
+
+def test_invalid_inputs(returns):
+    with pytest.raises(ValidationError, match="Invalid return vector"):
+        RunningCovariance(6).update(np.ones(5))
+    with pytest.raises(ValidationError, match="Invalid return vector"):
+        RunningCovariance(6).update(np.full(6, np.nan))
+    with pytest.raises(ValidationError, match="Invalid EWMA parameters"):
+        EWMACovariance(6)
+    with pytest.raises(ValidationError, match="Invalid EWMA parameters"):
+        EWMACovariance(6, decay=1.5)
+    with pytest.raises(ValidationError, match="Invalid covariance matrix"):
+        psd_factor(np.ones((3, 4)))
+    with pytest.raises(ValidationError, match="Incompatible risk model state"):
+        EWMACovariance(5, decay=0.9).load_state_dict(
+            RunningCovariance(6).update_many(returns).state_dict()
+        )
+
+
+def test_psd_factor_of_singular_matrix():
+    v = np.array([1.0, 2.0, 3.0])
+    sigma = np.outer(v, v)
+    factor = psd_factor(sigma)
+    np.testing.assert_allclose(factor @ factor.T, sigma, atol=1e-12)
+
+
+def test_single_period_with_covariance():
+    rng = np.random.default_rng(5)
+    n = 8
+    r_t = rng.normal(0.0, 0.05, n)
+    w_t = rng.dirichlet(np.ones(n))
+    gamma = 2.0
+
+    # The identity / n covariance reproduces the default risk term
+    default = single_period_optimization(
+        r_t, w_t, gamma, default_phi_trade, default_phi_hold
+    )
+    z = single_period_optimization(
+        r_t, w_t, gamma, default_phi_trade, default_phi_hold, sigma=np.eye(n) / n
+    )
+    np.testing.assert_allclose(z, default, atol=1e-3)
+
+    # A full covariance gives the solution of the explicit quadratic form
+    X = rng.normal(0.0, 0.1, (50, n))
+    model = LedoitWolfCovariance(n).update_many(X)
+    z = single_period_optimization(
+        r_t, w_t, gamma, default_phi_trade, default_phi_hold, sigma=model
+    )
+    sigma = model.covariance()
+    x = cp.Variable(n)
+    w_next = w_t + x
+    problem = cp.Problem(
+        cp.Maximize(
+            r_t @ w_next
+            - gamma * cp.quad_form(w_next, sigma)
+            - 0.01 * default_phi_trade(x)
+            - 0.01 * default_phi_hold(w_next)
+        ),
+        [cp.sum(w_next) == 1, w_next >= 0],
+    )
+    problem.solve(solver=cp.CLARABEL)
+    np.testing.assert_allclose(z, x.value, atol=1e-3)
+
+
+def test_single_period_covariance_errors():
+    n = 4
+    r_t, w_t = np.full(n, 0.01), np.full(n, 0.25)
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        single_period_optimization(
+            r_t, w_t, 1.0, default_phi_trade, default_phi_hold, "native", np.eye(n)
+        )
+    with pytest.raises(ValidationError, match="Dimension mismatch"):
+        single_period_optimization(
+            r_t, w_t, 1.0, default_phi_trade, default_phi_hold, sigma=np.eye(n + 1)
+        )
+    with pytest.raises(ValidationError, match="Missing covariance"):
+        get_single_period_optimizer(
+            n, default_phi_trade, default_phi_hold, risk_factors=n
+        ).solve(r_t, w_t, 1.0)
+
+
+def test_multi_period_with_covariance():
+    rng = np.random.default_rng(6)
+    n, H = 5, 4
+    w_0 = np.full(n, 1.0 / n)
+    r_t = rng.normal(0.0, 0.05, (H, n))
+    gamma_t, psi_t = np.full(H, 1.0), np.full(H, 0.5)
+    phi = np.full(H, 0.01)
+
+    optimizer = MultiPeriodOptimizer(n, H)
+    plain = optimizer.solve(w_0, r_t, gamma_t, psi_t, phi, phi)
+
+    # Half of the diagonal risk moved into the covariance leaves the problem unchanged
+    split = optimizer.solve(
+        w_0, r_t, gamma_t, psi_t / 2, phi, phi, sigma=0.25 * np.eye(n)
+    )
+    np.testing.assert_allclose(split, plain, atol=1e-3)
+
+    # Switching back to the diagonal-only problem rebuilds it without loadings
+    np.testing.assert_allclose(
+        optimizer.solve(w_0, r_t, gamma_t, psi_t, phi, phi), plain, atol=1e-3
+    )
+
+    with pytest.raises(ValidationError, match="Dimension mismatch"):
+        optimizer.solve(w_0, r_t, gamma_t, psi_t, phi, phi, sigma=np.eye(n + 1))
+
+
+def test_portfolio_with_risk_model():
+    portfolio = Portfolio()
+    for symbol, quantity in (("AAPL", 10), ("MSFT", 5), ("GOOG", 2)):
+        portfolio.execute_trade(
+            Trade(symbol, quantity, 100.0, datetime.now(), TradeType.BUY)
+        )
+    n = len(portfolio.symbols)
+    rng = np.random.default_rng(7)
+    model = EWMACovariance(n, halflife=20).update_many(rng.normal(0, 0.02, (60, n)))
+
+    z = portfolio.single_period_optimize(
+        np.full(n, 0.01), 1.0, engine="cvxpy", sigma=model
+    )
+    assert z.shape == (n,)
+    assert np.isclose(np.sum(portfolio.weights_vector + z), 1.0, atol=1e-4)
+
+
+def test_factor_risk_model():
+    rng = np.random.default_rng(8)
+    F = rng.normal(size=(6, 2))
+    omega = np.array([[2.0, 0.5], [0.5, 1.0]])
+    d = rng.uniform(0.1, 0.2, 6)
+    model = FactorRiskModel(F, omega, d)
+    assert (model.n, model.k) == (6, 2)
+    np.testing.assert_allclose(model.covariance(), F @ omega @ F.T + np.diag(d))
+    np.testing.assert_allclose(model.factor() @ model.factor().T, F @ omega @ F.T)
+
+    diagonal = FactorRiskModel.diagonal(d)
+    assert diagonal.k == 0
+    np.testing.assert_allclose(diagonal.covariance(), np.diag(d))
+
+    # With as many factors as assets the fit reproduces the sample covariance
+    X = rng.normal(size=(40, 6))
+    full = FactorRiskModel.from_returns(X, 6)
+    np.testing.assert_allclose(full.covariance(), np.cov(X.T), atol=1e-12)
+    partial = FactorRiskModel.from_returns(X, 2)
+    assert partial.loadings.shape == (6, 2)
+    assert np.all(partial.idiosyncratic >= 0)
+
+
+def test_factor_risk_model_errors():
+    with pytest.raises(ValidationError, match="Invalid factor covariance"):
+        FactorRiskModel(np.ones((4, 2)), np.eye(3))
+    with pytest.raises(ValidationError, match="Invalid idiosyncratic variances"):
+        FactorRiskModel(np.ones((4, 2)), idiosyncratic=-np.ones(4))
+    with pytest.raises(ValidationError, match="Invalid factor risk model"):
+        FactorRiskModel(np.zeros((4, 0)))
+    with pytest.raises(ValidationError, match="Invalid number of factors"):
+        FactorRiskModel.from_returns(np.ones((5, 3)), 4)
+
+
+def test_single_period_with_factor_model():
+    rng = np.random.default_rng(9)
+    n = 30
+    r_t = rng.normal(0.0, 0.05, n)
+    w_t = rng.dirichlet(np.ones(n))
+    args = (r_t, w_t, 2.0, default_phi_trade, default_phi_hold)
+    model = FactorRiskModel.from_returns(rng.normal(0.0, 0.1, (60, n)), 3)
+
+    z = single_period_optimization(*args, sigma=model)
+    np.testing.assert_allclose(
+        z, single_period_optimization(*args, sigma=model.covariance()), atol=1e-3
+    )
+
+    # The problem holds the (n, k) loadings, never an (n, n) matrix
+    optimizer = get_single_period_optimizer(
+        n, default_phi_trade, default_phi_hold, 3, True
+    )
+    assert optimizer.loadings.shape == (n, 3)
+    assert optimizer.problem.size_metrics.max_data_dimension < n * n
+
+    # A purely diagonal model reproduces the default identity / n risk
+    np.testing.assert_allclose(
+        single_period_optimization(
+            *args, sigma=FactorRiskModel.diagonal(np.full(n, 1.0 / n))
+        ),
+        single_period_optimization(*args),
+        atol=1e-3,
+    )
+
+    with pytest.raises(ValidationError, match="Dimension mismatch"):
+        optimizer.solve(
+            r_t, w_t, 1.0, FactorRiskModel.from_returns(rng.normal(size=(60, n)), 2)
+        )
+
+
+def test_multi_period_with_factor_model():
+    rng = np.random.default_rng(10)
+    n, H = 8, 4
+    w_0 = np.full(n, 1.0 / n)
+    r_t = rng.normal(0.0, 0.05, (H, n))
+    gamma_t = np.full(H, 2.0)
+    phi = np.full(H, 0.01)
+    optimizer = MultiPeriodOptimizer(n, H)
+
+    # psi_t is the diagonal special case of a factor model
+    psi = rng.uniform(0.1, 0.5, n)
+    np.testing.assert_allclose(
+        optimizer.solve(
+            w_0,
+            r_t,
+            gamma_t,
+            np.zeros(H),
+            phi,
+            phi,
+            sigma=FactorRiskModel.diagonal(psi),
+        ),
+        optimizer.solve(w_0, r_t, gamma_t, [psi] * H, phi, phi),
+        atol=1e-3,
+    )
+
+    model = FactorRiskModel.from_returns(rng.normal(0.0, 0.2, (50, n)), 2)
+    np.testing.assert_allclose(
+        optimizer.solve(w_0, r_t, gamma_t, np.full(H, 0.1), phi, phi, sigma=model),
+        optimizer.solve(
+            w_0, r_t, gamma_t, np.full(H, 0.1), phi, phi, sigma=model.covariance()
+        ),
+        atol=1e-3,
+    )
@@ -0,0 +1,123 @@
+import threading
+import pytest
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ThreadPoolExecutor
+from ConvexTrader import OptimizationClient, FactorRiskModel, SolverConfig
+from ConvexTrader.server import OptimizationServer
+from ConvexTrader.client import encode_sigma
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.async_optimization import PortfolioSnapshot
+from ConvexTrader.multi_period_optimization import multi_period_optimization
+from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
+from benchmarks.load_test import run_load_test
+
+
+@pytest.fixture(scope="module")
+def server():
+    # A long window, so that concurrent requests are reliably coalesced
+    server = OptimizationServer(("127.0.0.1", 0), batch_window=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def inputs(k, n=5):
+    rng = np.random.default_rng(k)
+    return rng.normal(0.01, 0.02, n), rng.dirichlet(np.ones(n))
+
+
+def test_concurrent_requests_are_batched(server):
+    client = OptimizationClient(server.url)
+    before = client.health()
+
+    def optimize(k):
+        r_t, w_t = inputs(k)
+        return client.single_period_optimize(w_t, r_t, 1.0), client.last_solver
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(optimize, range(8)))
+
+    for k, (z, solver) in enumerate(results):
+        r_t, w_t = inputs(k)
+        expected = single_period_optimization(
+            r_t, w_t, 1.0, default_phi_trade, default_phi_hold
+        )
+        np.testing.assert_allclose(z, expected, atol=1e-12)
+        assert solver == "NATIVE"
+
+    after = client.health()
+    assert after["requests"] - before["requests"] == 8
+    assert after["batches"] - before["batches"] < 8
+
+
+def test_cvxpy_and_multi_period_requests(server):
+    client = OptimizationClient(server.url)
+    r_t, w_t = inputs(0)
+    sigma = FactorRiskModel(np.ones((5, 1)), idiosyncratic=np.full(5, 0.1))
+    solver = SolverConfig("CLARABEL", fallbacks=["OSQP"])
+    z = client.single_period_optimize(w_t, r_t, 1.0, sigma=sigma, solver=solver)
+    expected = single_period_optimization(
+        r_t, w_t, 1.0, default_phi_trade, default_phi_hold, sigma=sigma, solver=solver
+    )
+    np.testing.assert_allclose(z, expected, atol=1e-6)
+    assert client.last_solver == "CLARABEL"
+
+    H = 3
+    args = (np.tile(r_t, (H, 1)), np.ones(H), np.full(H, 0.1), np.full(H, 0.001))
+    Z = client.multi_period_optimize(w_t, H, *args, np.zeros(H))
+    expected = multi_period_optimization(
+        H, args[0], PortfolioSnapshot((), w_t), *args[1:], np.zeros(H)
+    )
+    np.testing.assert_allclose(Z, expected, atol=1e-6)
+
+
+def test_sparse_sigma_is_sent_as_triplets(server):
+    client = OptimizationClient(server.url)
+    r_t, w_t = inputs(1)
+    sigma = sp.diags(np.linspace(0.1, 0.5, 5), format="csr")
+    encoded = encode_sigma(sigma)
+    assert encoded["format"] == "coo" and len(encoded["data"]) == 5
+
+    z = client.single_period_optimize(w_t, r_t, 1.0, sigma=sigma)
+    expected = single_period_optimization(
+        r_t, w_t, 1.0, default_phi_trade, default_phi_hold, sigma=sigma
+    )
+    np.testing.assert_allclose(z, expected, atol=1e-6)
+
+    encoded["shape"] = [4, 4]
+    with pytest.raises(ValidationError, match="Invalid request field"):
+        client._request(
+            "POST",
+            "/single_period",
+            {"r_t": r_t.tolist(), "w_t": w_t.tolist(), "gamma": 1.0, "sigma": encoded},
+        )
+
+
+def test_errors_are_raised_on_the_client(server):
+    client = OptimizationClient(server.url)
+    r_t, w_t = inputs(0)
+    with pytest.raises(ValidationError):
+        client.single_period_optimize(w_t[:3], r_t, 1.0)
+    with pytest.raises(ValidationError, match="Invalid engine"):
+        client.single_period_optimize(w_t, r_t, 1.0, engine="gpu")
+    with pytest.raises(ValidationError, match="Missing request field"):
+        client._request("POST", "/single_period", {"r_t": [0.1]})
+    with pytest.raises(OptimizationError, match="Unknown path"):
+        client._request("POST", "/frontier", {})
+    # The connection is still usable after errors
+    assert client.health()["status"] == "ok"
+
+
+def test_load_test_report(server):
+    report = run_load_test(server.url, clients=4, requests=40, n=10)
+    assert report["errors"] == 0
+    assert report["p50"] <= report["p99"]
+    assert report["throughput"] > 0 and report["mean_batch_size"] >= 1
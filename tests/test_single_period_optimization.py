@@ -4,7 +4,14 @@ import cvxpy as cp
 from datetime import datetime
 from ConvexTrader.Portfolio import Portfolio
 from ConvexTrader.Trade import Trade, TradeType
-from ConvexTrader.single_period_optimization import single_period_optimization
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    SinglePeriodOptimizer,
+    get_single_period_optimizer,
+    clear_optimizer_cache,
+    default_phi_trade,
+    default_phi_hold,
+)
 from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
 
 
@@ -138,3 +145,57 @@ def test_low_risk_aversion(sample_portfolio):
 
     result = single_period_optimization(r_t, w_t, gamma, phi_trade, phi_hold)
     assert np.any(np.abs(result) > 0.1)  # Low gamma should allow larger trades
+
+
+def test_single_period_optimizer_matches_function(sample_portfolio):
+    r_t = np.array([0.05, 0.07, 0.02])
+    w_t = sample_portfolio.weights_vector
+
+    optimizer = SinglePeriodOptimizer(3, default_phi_trade, default_phi_hold)
+    assert optimizer.problem.is_dpp()
+
+    expected = single_period_optimization(
+        r_t, w_t, 1.0, default_phi_trade, default_phi_hold
+    )
+    result = optimizer.solve(r_t, w_t, 1.0)
+    assert np.allclose(result, expected, atol=1e-4)
+    assert np.isclose(np.sum(w_t + result), 1)
+    assert np.all(w_t + result >= -1e-6)
+
+
+def test_single_period_optimizer_resolves_with_new_parameters(sample_portfolio):
+    w_t = sample_portfolio.weights_vector
+    optimizer = SinglePeriodOptimizer(3, default_phi_trade, default_phi_hold)
+
+    low = optimizer.solve(np.array([0.05, 0.07, 0.02]), w_t, 0.1)
+    high = optimizer.solve(np.array([0.05, 0.07, 0.02]), w_t, 10.0)
+    assert np.sum(np.abs(high)) < np.sum(np.abs(low))
+
+    zero = optimizer.solve(np.zeros(3), w_t, 1.0)
+    assert np.allclose(zero, 0, atol=1e-3)
+
+    with pytest.raises(ValidationError, match="Dimension mismatch"):
+        optimizer.solve(np.array([0.1, 0.2]), np.array([0.5, 0.5]), 1.0)
+
+
+def test_optimizer_cache_reuses_compiled_problem(sample_portfolio):
+    clear_optimizer_cache()
+    first = get_single_period_optimizer(3, default_phi_trade, default_phi_hold)
+    second = get_single_period_optimizer(3, default_phi_trade, default_phi_hold)
+    assert first is second
+    assert get_single_period_optimizer(4, default_phi_trade, default_phi_hold) is not (
+        first
+    )
+
+    r_t = np.array([0.05, 0.07, 0.02])
+    sample_portfolio.single_period_optimize(r_t, 1.0, engine="cvxpy")
+    assert get_single_period_optimizer(3, default_phi_trade, default_phi_hold) is first
+    problem = first.problem
+    assert problem is not None and problem.status == cp.OPTIMAL
+    sample_portfolio.single_period_optimize(r_t[::-1], 2.0, engine="cvxpy")
+    assert first.problem is problem
+
+
+def test_single_period_optimizer_invalid_size():
+    with pytest.raises(ValidationError, match="Invalid number of assets"):
+        SinglePeriodOptimizer(0, default_phi_trade, default_phi_hold)
@@ -0,0 +1,147 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from ConvexTrader import Portfolio, Trade, TradeType, SolverConfig
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import (
+    multi_period_optimization,
+    RecedingHorizonOptimizer,
+)
+from ConvexTrader.portfolio_exceptions import ValidationError, OptimizationError
+
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(3)
+    n = 12
+    return (
+        rng.normal(0.0, 0.05, n),
+        np.full(n, 1.0 / n),
+        1.0,
+        default_phi_trade,
+        default_phi_hold,
+        "cvxpy",
+    )
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio()
+    for symbol, quantity in (("AAPL", 10), ("MSFT", 20), ("GOOG", 5)):
+        portfolio.execute_trade(
+            Trade(symbol, quantity, 100.0, datetime.now(), TradeType.BUY)
+        )
+    return portfolio
+
+
+def test_solver_options():
+    config = SolverConfig(
+        "osqp",
+        fallbacks=["CLARABEL", "SCS"],
+        tolerance=1e-5,
+        max_iters=500,
+        time_limit=2.0,
+        options={"scs": {"acceleration_lookback": 0}},
+    )
+    assert config.solvers == ("OSQP", "CLARABEL", "SCS")
+    assert config.solver_options("OSQP") == {
+        "eps_abs": 1e-5,
+        "eps_rel": 1e-5,
+        "max_iter": 500,
+        "time_limit": 2.0,
+    }
+    assert config.solver_options("CLARABEL")["tol_feas"] == 1e-5
+    assert config.solver_options("SCS")["time_limit_secs"] == 2.0
+    assert config.solver_options("SCS")["acceleration_lookback"] == 0
+    assert SolverConfig().solvers == (None,)
+    assert SolverConfig.coerce("clarabel").solvers == ("CLARABEL",)
+
+
+def test_invalid_solver_config():
+    with pytest.raises(ValidationError, match="Invalid solver"):
+        SolverConfig("NOT_A_SOLVER")
+    with pytest.raises(ValidationError, match="Invalid solver"):
+        SolverConfig.coerce(42)
+    with pytest.raises(ValidationError, match="Invalid solver tolerance"):
+        SolverConfig(tolerance=0.0)
+    with pytest.raises(ValidationError, match="Invalid solver iteration limit"):
+        SolverConfig(max_iters=1.5)
+    with pytest.raises(ValidationError, match="Invalid solver time limit"):
+        SolverConfig(time_limit=-1.0)
+    with pytest.raises(ValidationError, match="Invalid solver options"):
+        SolverConfig(options={"OSQP": 1e-3})
+
+
+def test_single_period_solver_choice(inputs):
+    # The native solver is exact for the default cost functions
+    reference = single_period_optimization(*inputs[:-1], engine="native")
+    for name in ("OSQP", "CLARABEL"):
+        z, solver = single_period_optimization(
+            *inputs, solver=SolverConfig(name, tolerance=1e-9), return_solver=True
+        )
+        assert solver == name
+        np.testing.assert_allclose(z, reference, atol=1e-4)
+
+    _, solver = single_period_optimization(
+        *inputs[:-1], engine="native", return_solver=True
+    )
+    assert solver == "NATIVE"
+
+
+@pytest.mark.filterwarnings("ignore:Solution may be inaccurate")
+def test_fallback_chain(inputs):
+    # A solver that is not installed and one stopped by its iteration limit
+    # both hand over to the next solver
+    config = SolverConfig(
+        "MOSEK", fallbacks=["OSQP", "CLARABEL"], options={"OSQP": {"max_iter": 1}}
+    )
+    z, solver = single_period_optimization(*inputs, solver=config, return_solver=True)
+    assert solver == "CLARABEL"
+    np.testing.assert_allclose(
+        z, single_period_optimization(*inputs[:-1], engine="native"), atol=1e-4
+    )
+
+    with pytest.raises(OptimizationError, match="Optimization failed"):
+        single_period_optimization(
+            *inputs, solver=SolverConfig("OSQP", max_iters=1, warm_start=False)
+        )
+    with pytest.raises(OptimizationError, match="Solver failed"):
+        single_period_optimization(*inputs, solver=SolverConfig("MOSEK"))
+
+
+def test_multi_period_solver_choice(portfolio):
+    H = 3
+    args = (
+        H,
+        np.tile([0.02, 0.05, 0.01], (H, 1)),
+        portfolio,
+        np.ones(H),
+        np.ones(H),
+        np.full(H, 0.01),
+        np.zeros(H),
+    )
+    reference = multi_period_optimization(*args)
+    z, solver = multi_period_optimization(*args, solver="CLARABEL", return_solver=True)
+    assert solver == "CLARABEL"
+    np.testing.assert_allclose(z, reference, atol=1e-4)
+
+    mpc = RecedingHorizonOptimizer(3, H)
+    mpc.step(portfolio.weights_vector, *args[1:2], *args[3:], solver="SCS")
+    assert mpc.solver_used == "SCS"
+
+
+def test_portfolio_last_solver(portfolio):
+    r_t = np.array([0.02, 0.05, 0.01])
+    portfolio.single_period_optimize(r_t, 0.5)
+    assert portfolio.last_solver == "NATIVE"
+    portfolio.single_period_optimize(r_t, 0.5, engine="cvxpy", solver="CLARABEL")
+    assert portfolio.last_solver == "CLARABEL"
+
+    H = 3
+    period_inputs = (np.ones(H), np.ones(H), np.full(H, 0.01), np.zeros(H))
+    portfolio.multi_period_step(H, np.tile(r_t, (H, 1)), *period_inputs, solver="OSQP")
+    assert portfolio.last_solver == "OSQP"
@@ -0,0 +1,150 @@
+import pytest
+import numpy as np
+import scipy.sparse as sp
+from datetime import datetime
+from ConvexTrader import Portfolio, Trade, TradeType, FactorRiskModel
+from ConvexTrader.sparse_utils import sparse_trades
+from ConvexTrader.risk_models import sparse_covariance
+from ConvexTrader.single_period_optimization import (
+    single_period_optimization,
+    default_phi_trade,
+    default_phi_hold,
+)
+from ConvexTrader.multi_period_optimization import MultiPeriodOptimizer
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+def banded_covariance(n, rng):
+    """Sparse tridiagonal, diagonally dominant covariance"""
+    off = rng.uniform(0.0, 0.01, n - 1)
+    diagonal = rng.uniform(0.03, 0.05, n)
+    return sp.diags([off, diagonal, off], [-1, 0, 1], format="csc")
+
+
+@pytest.fixture
+def single_inputs():
+    rng = np.random.default_rng(11)
+    n = 25
+    r_t = sp.random(1, n, density=0.3, random_state=rng, format="csr") * 0.1
+    w_t = rng.dirichlet(np.ones(n))
+    return r_t, w_t, banded_covariance(n, rng)
+
+
+def test_sparse_trades():
+    z = np.array([0.2, 1e-9, -0.2, -1e-8, 0.0])
+    sparse = sparse_trades(z)
+    assert isinstance(sparse, sp.csr_array)
+    assert sparse.shape == (5,) and sparse.nnz == 2
+    np.testing.assert_array_equal(sparse.toarray(), [0.2, 0.0, -0.2, 0.0, 0.0])
+
+    matrix = sparse_trades(np.array([[0.1, 0.0], [0.0, 1e-12]]))
+    assert isinstance(matrix, sp.csc_array) and matrix.nnz == 1
+
+    with pytest.raises(ValidationError, match="Invalid sparse tolerance"):
+        sparse_trades(z, tolerance=-1.0)
+
+
+def test_sparse_covariance_validation():
+    assert sparse_covariance(sp.diags([1.0, 2.0])).ndim == 1
+    with pytest.raises(ValidationError, match="Invalid covariance matrix"):
+        sparse_covariance(sp.csc_matrix(np.ones((2, 3))))
+    with pytest.raises(ValidationError, match="Invalid covariance matrix"):
+        sparse_covariance(sp.csc_matrix(np.array([[1.0, 0.5], [0.0, 1.0]])))
+    with pytest.raises(ValidationError, match="Invalid covariance matrix"):
+        sparse_covariance(sp.diags([1.0, -2.0]))
+
+
+def test_single_period_sparse_inputs(single_inputs):
+    r_t, w_t, sigma = single_inputs
+    dense_r = r_t.toarray().ravel()
+    args = (w_t, 1.0, default_phi_trade, default_phi_hold)
+
+    z = single_period_optimization(r_t, *args, sparse=True)
+    assert isinstance(z, sp.csr_array)
+    np.testing.assert_allclose(
+        z.toarray(), single_period_optimization(dense_r, *args), atol=1e-6
+    )
+
+    sparse_sigma = single_period_optimization(r_t, *args, sigma=sigma)
+    dense_sigma = single_period_optimization(r_t, *args, sigma=sigma.toarray())
+    np.testing.assert_allclose(sparse_sigma, dense_sigma, atol=1e-3)
+
+    # A diagonal sparse covariance takes the same path as diagonal variances
+    variances = sigma.diagonal()
+    np.testing.assert_allclose(
+        single_period_optimization(r_t, *args, sigma=sp.diags(variances)),
+        single_period_optimization(
+            r_t, *args, sigma=FactorRiskModel.diagonal(variances)
+        ),
+        atol=1e-3,
+    )
+
+
+def test_factor_model_with_sparse_parts():
+    rng = np.random.default_rng(12)
+    n = 20
+    loadings = sp.random(n, 3, density=0.4, random_state=rng, format="csr")
+    residual = banded_covariance(n, rng)
+    model = FactorRiskModel(loadings, idiosyncratic=residual)
+    np.testing.assert_allclose(
+        model.covariance(),
+        loadings.toarray() @ loadings.toarray().T + residual.toarray(),
+    )
+
+    r_t = rng.normal(0.0, 0.05, n)
+    w_t = np.full(n, 1.0 / n)
+    args = (r_t, w_t, 2.0, default_phi_trade, default_phi_hold)
+    np.testing.assert_allclose(
+        single_period_optimization(*args, sigma=model),
+        single_period_optimization(*args, sigma=model.covariance()),
+        atol=1e-3,
+    )
+
+
+def test_multi_period_sparse_inputs():
+    rng = np.random.default_rng(13)
+    n, H = 10, 3
+    w_0 = np.full(n, 1.0 / n)
+    r_t = sp.random(H, n, density=0.4, random_state=rng, format="csr") * 0.1
+    phi_trade = sp.random(H, n, density=0.5, random_state=rng, format="csr") * 0.02
+    gamma_t, psi_t, phi_hold = np.ones(H), np.full(H, 0.1), np.zeros(H)
+    sigma = banded_covariance(n, rng)
+    optimizer = MultiPeriodOptimizer(n, H)
+
+    np.testing.assert_allclose(
+        optimizer.solve(w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold),
+        optimizer.solve(
+            w_0, r_t.toarray(), gamma_t, psi_t, phi_trade.toarray(), phi_hold
+        ),
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(
+        optimizer.solve(w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma=sigma),
+        optimizer.solve(
+            w_0, r_t, gamma_t, psi_t, phi_trade, phi_hold, sigma=sigma.toarray()
+        ),
+        atol=1e-3,
+    )
+
+
+def test_portfolio_sparse_results():
+    portfolio = Portfolio()
+    for symbol in ("AAPL", "MSFT", "GOOG", "AMZN"):
+        portfolio.execute_trade(Trade(symbol, 10, 100.0, datetime.now(), TradeType.BUY))
+    r_t = sp.csr_array(np.array([0.0, 0.08, 0.0, 0.0]))
+
+    z = portfolio.single_period_optimize(r_t, 0.5, sparse=True)
+    assert isinstance(z, sp.csr_array)
+    assert np.isclose(np.sum(portfolio.weights_vector + z.toarray()), 1.0)
+
+    H = 3
+    plan = portfolio.multi_period_optimize(
+        H,
+        sp.csr_matrix(np.tile(r_t.toarray(), (H, 1))),
+        np.ones(H),
+        np.ones(H),
+        np.full(H, 0.01),
+        np.zeros(H),
+        sparse=True,
+    )
+    assert isinstance(plan, sp.csc_array) and plan.shape == (4, H - 1)
@@ -0,0 +1,133 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from ConvexTrader.Portfolio import Portfolio
+from ConvexTrader.Trade import Trade, TradeType
+from ConvexTrader.TradeJournal import TradeJournal, RECORD_DTYPE, HEADER_SIZE
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+def make_trades(count, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = ["AAPL", "GOOGL", "MSFT", "AMZN"]
+    return [
+        Trade(
+            symbols[rng.integers(len(symbols))],
+            int(rng.integers(1, 100)),
+            float(rng.uniform(10, 500)),
+            datetime(2023, 1, 1, 9, 30, i % 60),
+            TradeType.BUY,
+        )
+        for i in range(count)
+    ]
+
+
+def test_journal_records_executed_trades(tmp_path):
+    path = tmp_path / "trades.journal"
+    portfolio = Portfolio(journal=path)
+    trades = make_trades(10)
+    portfolio.execute_trades(trades[:6])
+    for trade in trades[6:]:
+        portfolio.execute_trade(trade)
+
+    # A rejected sell is not journaled
+    with pytest.raises(ValidationError):
+        portfolio.execute_trade(
+            Trade("IBM", 1, 100.0, datetime(2023, 1, 2), TradeType.SELL)
+        )
+
+    records = TradeJournal(path).read()
+    assert isinstance(records, np.memmap)
+    assert len(records) == 10
+    assert records["symbol"][0].decode() == trades[0].symbol
+    assert np.array_equal(records["quantity"], [trade.quantity for trade in trades])
+    assert np.allclose(records["price"], [trade.price for trade in trades])
+    assert np.all(records["side"] == 1)
+
+
+def test_journal_truncates_partial_record(tmp_path):
+    path = tmp_path / "trades.journal"
+    with TradeJournal(path) as journal:
+        Portfolio(journal=journal).execute_trades(make_trades(3))
+
+    with open(path, "ab") as f:
+        f.write(b"\1" * (RECORD_DTYPE.itemsize // 2))
+
+    journal = TradeJournal(path)
+    assert len(journal) == 3
+    assert path.stat().st_size == HEADER_SIZE + 3 * RECORD_DTYPE.itemsize
+    assert len(journal.read(1)) == 2
+
+
+def test_journal_rejects_long_symbols_and_bad_files(tmp_path):
+    portfolio = Portfolio(journal=tmp_path / "trades.journal")
+    with pytest.raises(ValidationError, match="Symbol too long for journal"):
+        portfolio.execute_trade(
+            Trade("X" * 17, 1, 1.0, datetime(2023, 1, 1), TradeType.BUY)
+        )
+    assert portfolio.holdings == {}
+
+    bad = tmp_path / "bad.journal"
+    bad.write_bytes(b"not a journal")
+    with pytest.raises(ValidationError, match="Invalid journal file"):
+        TradeJournal(bad)
+
+
+@pytest.mark.parametrize("with_snapshot", [False, True])
+def test_recover_matches_live_portfolio(tmp_path, with_snapshot):
+    journal_path = tmp_path / "trades.journal"
+    snapshot_path = tmp_path / "portfolio.npz" if with_snapshot else None
+    live = Portfolio(
+        journal=journal_path, snapshot_path=snapshot_path, snapshot_interval=25
+    )
+    trades = make_trades(60)
+    for trade in trades[:40]:
+        live.execute_trade(trade)
+    live.price_book.update_snapshot(np.linspace(10.0, 20.0, len(live.symbols)))
+    live.execute_trades(trades[40:])
+    live.execute_trade(
+        Trade(trades[0].symbol, 1, 100.0, datetime(2023, 1, 2), TradeType.SELL)
+    )
+
+    recovered = Portfolio.recover(journal_path, snapshot_path)
+    assert recovered.symbols == live.symbols
+    assert recovered.holdings == live.holdings
+    assert np.allclose(recovered.holdings_vector, live.holdings_vector)
+    assert np.allclose(recovered.weights_vector, live.weights_vector)
+    if with_snapshot:
+        np.testing.assert_array_equal(
+            recovered.price_book.prices, live.price_book.prices
+        )
+
+    # Only the journal tail after the last snapshot (taken at 60 records) is replayed
+    assert len(recovered.trades) == (1 if with_snapshot else 61)
+
+    recovered.execute_trade(trades[0])
+    assert len(recovered.journal) == 62
+
+
+def test_rejected_sells_leave_log_and_journal_in_sync(tmp_path):
+    journal_path = tmp_path / "trades.journal"
+    portfolio = Portfolio(journal=journal_path)
+    portfolio.execute_trades(make_trades(5))
+    held = portfolio.trades[0].symbol
+    for symbol, quantity in ((held, 10_000), ("IBM", 1)):
+        with pytest.raises(ValidationError, match="Insufficient shares"):
+            portfolio.execute_trade(
+                Trade(symbol, quantity, 100.0, datetime(2023, 1, 2), TradeType.SELL)
+            )
+
+    assert len(portfolio.trades) == len(portfolio.journal) == 5
+    assert "IBM" not in portfolio.symbols
+    recovered = Portfolio.recover(journal_path)
+    assert len(recovered.trades) == len(portfolio.trades)
+    assert recovered.symbols == portfolio.symbols
+
+
+def test_recover_rejects_snapshot_ahead_of_journal(tmp_path):
+    portfolio = Portfolio(journal=tmp_path / "a.journal")
+    portfolio.execute_trades(make_trades(5))
+    portfolio.save_snapshot(tmp_path / "portfolio.npz")
+
+    with pytest.raises(ValidationError, match="Snapshot is ahead of journal"):
+        Portfolio.recover(tmp_path / "b.journal", tmp_path / "portfolio.npz")
@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from datetime import datetime, timezone, timedelta
+from ConvexTrader.Portfolio import Portfolio
+from ConvexTrader.Trade import Trade, TradeType
+from ConvexTrader.TradeLog import TradeLog, types_to_sides, dates_to_timestamps
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+@pytest.fixture
+def trades():
+    return [
+        Trade("AAPL", 100, 150.0, datetime(2023, 1, 1, 9, 30), TradeType.BUY),
+        Trade("GOOGL", 50, 2000.0, datetime(2023, 1, 2), TradeType.BUY),
+        Trade("AAPL", 40, 160.0, datetime(2023, 1, 3, 15, 59, 59, 1), TradeType.SELL),
+    ]
+
+
+def test_trade_log_roundtrip(trades):
+    log = TradeLog(["AAPL", "GOOGL"], capacity=1)
+    for trade in trades:
+        log.append(trade, 0 if trade.symbol == "AAPL" else 1)
+
+    assert len(log) == 3
+    for original, stored in zip(trades, log):
+        assert stored.symbol == original.symbol
+        assert stored.quantity == original.quantity
+        assert stored.price == original.price
+        assert stored.trade_date == original.trade_date
+        assert stored.trade_type == original.trade_type
+
+    assert log[-1].trade_type == TradeType.SELL
+    assert [trade.symbol for trade in log[:2]] == ["AAPL", "GOOGL"]
+    with pytest.raises(IndexError):
+        log[3]
+
+
+def test_trade_log_aggregations(trades):
+    log = TradeLog(["AAPL", "GOOGL", "MSFT"])
+    log.extend(
+        np.array([0, 1, 0]),
+        np.array([trade.quantity for trade in trades]),
+        np.array([trade.price for trade in trades]),
+        dates_to_timestamps([trade.trade_date for trade in trades]),
+        types_to_sides([trade.trade_type for trade in trades]),
+    )
+
+    assert np.array_equal(log.signed_quantities(), [100, 50, -40])
+    assert np.array_equal(log.net_quantities(), [60, 50, 0])
+    assert np.array_equal(log.traded_volume(), [140, 50, 0])
+    assert np.allclose(log.vwap()[:2], [(15000 + 6400) / 140, 2000.0])
+    assert np.isnan(log.vwap()[2])
+    assert log.nbytes == 3 * 29
+
+
+def test_trade_log_timezone_aware_dates():
+    log = TradeLog(["AAPL"])
+    eastern = timezone(timedelta(hours=-5))
+    log.append(
+        Trade("AAPL", 1, 1.0, datetime(2023, 1, 1, 9, tzinfo=eastern), TradeType.BUY), 0
+    )
+    assert log[0].trade_date == datetime(2023, 1, 1, 14)
+
+
+def test_trade_log_invalid_columns():
+    with pytest.raises(ValidationError, match="Invalid trade type"):
+        types_to_sides(["BUY", "HOLD"])
+    with pytest.raises(ValidationError, match="Invalid trade date"):
+        dates_to_timestamps(["2023-01-01"])
+
+
+def test_portfolio_trade_log_matches_holdings(trades):
+    portfolio = Portfolio()
+    for trade in trades:
+        portfolio.execute_trade(trade)
+
+    assert isinstance(portfolio.trades, TradeLog)
+    assert portfolio.trades.symbols is portfolio.symbols
+    assert np.array_equal(portfolio.trades.net_quantities(), portfolio.holdings_vector)
+    assert not hasattr(trades[0], "__dict__")
@@ -0,0 +1,140 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from ConvexTrader.Portfolio import Portfolio
+from ConvexTrader.Trade import Trade, TradeType
+from ConvexTrader.valuation import SymbolAlignment
+from ConvexTrader.portfolio_exceptions import ValidationError
+
+
+@pytest.fixture
+def sample_portfolio():
+    portfolio = Portfolio()
+    trades = [
+        Trade("AAPL", 100, 150.0, datetime(2023, 1, 1), TradeType.BUY),
+        Trade("GOOGL", 50, 2000.0, datetime(2023, 1, 2), TradeType.BUY),
+        Trade("MSFT", 75, 300.0, datetime(2023, 1, 3), TradeType.BUY),
+    ]
+    portfolio.execute_trades(trades)
+    return portfolio
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return rng.uniform(10.0, 500.0, (20, 3))
+
+
+def test_value_series_matches_total_value(sample_portfolio, prices):
+    values = sample_portfolio.value_series(prices)
+    assert values.shape == (20,)
+    for row, value in zip(prices, values):
+        snapshot = dict(zip(sample_portfolio.symbols, row))
+        assert value == pytest.approx(sample_portfolio.total_value(snapshot))
+    assert sample_portfolio.value_series(prices[0]) == pytest.approx(values[0])
+
+
+def test_value_series_with_alignment(sample_portfolio, prices):
+    expected = sample_portfolio.value_series(prices)
+    # Feed with its columns reordered and an extra symbol the portfolio does not hold
+    columns = ["TSLA", "MSFT", "AAPL", "GOOGL"]
+    feed = np.column_stack(
+        [np.full(20, 99.0), prices[:, 2], prices[:, 0], prices[:, 1]]
+    )
+    alignment = sample_portfolio.symbol_alignment(columns)
+    np.testing.assert_allclose(sample_portfolio.value_series(feed, alignment), expected)
+    np.testing.assert_array_equal(alignment.align(feed), prices)
+
+    frame = pd.DataFrame(feed, columns=columns)
+    np.testing.assert_allclose(
+        sample_portfolio.value_series(
+            frame, SymbolAlignment.from_feed(sample_portfolio.symbols, frame)
+        ),
+        expected,
+    )
+
+    snapshot = dict(zip(columns, feed[3]))
+    assert sample_portfolio.value_series(snapshot, alignment) == pytest.approx(
+        expected[3]
+    )
+    history = {symbol: feed[:, j] for j, symbol in enumerate(columns)}
+    np.testing.assert_allclose(
+        sample_portfolio.value_series(history, alignment), expected
+    )
+
+
+def test_value_series_validation(sample_portfolio, prices):
+    with pytest.raises(ValidationError, match="Price matrix shape mismatch"):
+        sample_portfolio.value_series(prices[:, :2])
+
+    with pytest.raises(ValidationError, match="Missing prices"):
+        sample_portfolio.symbol_alignment(["AAPL", "MSFT"])
+
+    with pytest.raises(ValidationError, match="Duplicate feed symbols"):
+        sample_portfolio.symbol_alignment(["AAPL", "MSFT", "GOOGL", "AAPL"])
+
+    alignment = sample_portfolio.symbol_alignment(["AAPL", "GOOGL", "MSFT", "TSLA"])
+    with pytest.raises(ValidationError, match="Price feed shape mismatch"):
+        sample_portfolio.value_series(prices, alignment)
+
+    sample_portfolio.execute_trade(
+        Trade("TSLA", 10, 200.0, datetime(2023, 1, 4), TradeType.BUY)
+    )
+    with pytest.raises(ValidationError, match="Stale symbol alignment"):
+        sample_portfolio.value_series(np.ones((2, 4)), alignment)
+
+
+def test_price_book_ticks_and_growth(sample_portfolio):
+    book = sample_portfolio.price_book
+    assert book.unpriced() == ["AAPL", "GOOGL", "MSFT"]
+
+    book.update_snapshot(np.array([150.0, 2000.0, 300.0]))
+    prices = book.prices
+    book.update(book.index(["MSFT", "AAPL", "MSFT"]), [310.0, 155.0, 320.0])
+    # Ticks are written in place, later ticks of a symbol win
+    np.testing.assert_array_equal(prices, [155.0, 2000.0, 320.0])
+    assert sample_portfolio.total_value() == pytest.approx(
+        sample_portfolio.total_value({"AAPL": 155.0, "GOOGL": 2000.0, "MSFT": 320.0})
+    )
+    market = sample_portfolio.market_weights_vector
+    np.testing.assert_allclose(
+        market, np.array([100 * 155.0, 50 * 2000.0, 75 * 320.0]) / 139500.0
+    )
+    assert np.shares_memory(market, sample_portfolio.market_weights_vector)
+
+    # Enough new symbols to grow the backing arrays
+    sample_portfolio.execute_trades(
+        [
+            Trade(f"S{k}", 1, 10.0, datetime(2023, 1, 4), TradeType.BUY)
+            for k in range(40)
+        ]
+    )
+    assert len(book) == 43
+    np.testing.assert_array_equal(book.prices[:3], [155.0, 2000.0, 320.0])
+    assert book["S0"] != book["S0"]
+    with pytest.raises(ValidationError, match="Missing prices"):
+        sample_portfolio.total_value()
+    book.update(np.arange(3, 43), np.full(40, 10.0))
+    assert sample_portfolio.total_value() == pytest.approx(139500.0 + 400.0)
+
+
+def test_price_book_validation(sample_portfolio):
+    book = sample_portfolio.price_book
+    with pytest.raises(ValidationError, match="Missing prices"):
+        sample_portfolio.total_value()
+    assert Portfolio().total_value() == 0
+    with pytest.raises(ValidationError, match="Unknown symbol"):
+        book.index(["TSLA"])
+    with pytest.raises(ValidationError, match="Tick length mismatch"):
+        book.update([0, 1], [1.0])
+    with pytest.raises(ValidationError, match="Invalid symbol index"):
+        book.update([3], [1.0])
+    with pytest.raises(ValidationError, match="Invalid price"):
+        book.update([0], [-1.0])
+    with pytest.raises(ValidationError, match="Price vector length mismatch"):
+        book.update_snapshot([1.0, 2.0])
+
+    alignment = sample_portfolio.symbol_alignment(["MSFT", "AAPL", "GOOGL"])
+    book.update_snapshot({"MSFT": 300.0, "AAPL": 150.0, "GOOGL": 2000.0}, alignment)
+    np.testing.assert_array_equal(book.prices, [150.0, 2000.0, 300.0])